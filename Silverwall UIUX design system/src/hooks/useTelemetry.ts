@@ -38,12 +38,19 @@ export function useTelemetry(): TelemetryState {
     const [retryCount, setRetryCount] = useState(0);
     const wsRef = useRef<WebSocket | null>(null);
     const reconnectTimeoutRef = useRef<number | null>(null);
+    // Last frame seen and the stream it belongs to, so a reconnect resumes
+    // instead of starting cold (seq starts over when the server restarts)
+    const lastSeqRef = useRef<number | null>(null);
+    const streamRef = useRef<string | null>(null);
     const maxRetries = 10;
 
     const connect = useCallback(() => {
         const baseUrl = getWsUrl();
         const wsEndpoint = '/ws/live';
-        const wsUrl = `${baseUrl}${wsEndpoint}`;
+        const since = lastSeqRef.current !== null && streamRef.current !== null
+            ? `?since=${streamRef.current}.${lastSeqRef.current}`
+            : '';
+        const wsUrl = `${baseUrl}${wsEndpoint}${since}`;
 
         console.log(`📡 Connecting to LIVE telemetry at ${wsUrl}`);
 
@@ -60,6 +67,17 @@ export function useTelemetry(): TelemetryState {
             ws.onmessage = (event) => {
                 try {
                     const data = JSON.parse(event.data);
+                    if (typeof data.seq === 'number' && data.type !== 'positions') {
+                        lastSeqRef.current = data.seq;
+                    }
+                    if (typeof data.stream === 'string') {
+                        streamRef.current = data.stream;
+                    }
+
+                    // Nothing changed since the last frame; keep showing it
+                    if (data.type === 'heartbeat') {
+                        return;
+                    }
 
                     // Handle different response types from live endpoint
                     if (data.status === 'waiting') {
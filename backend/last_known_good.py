@@ -0,0 +1,62 @@
+"""
+SilverWall - Last-Known-Good Live State
+Persists the latest good telemetry snapshot and the lookups behind it to a
+small local file, so a restart mid-session starts warm instead of blank
+
+Set LIVE_SNAPSHOT_PATH to choose the file, or to an empty string to turn
+persistence off. The file is plain JSON:
+    {"saved_at": epoch seconds, "session": {...}, "telemetry": {...},
+     "drivers": {number: info}, "stints": {number: stint}}
+"""
+
+import json
+import os
+import time
+from typing import Dict, Optional
+
+SNAPSHOT_PATH_ENV = "LIVE_SNAPSHOT_PATH"
+DEFAULT_SNAPSHOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "live_snapshot.json")
+
+# Older state is from a session that has long finished and isn't worth serving
+MAX_RESTORE_AGE = 3 * 3600
+
+
+def snapshot_path() -> Optional[str]:
+    """Where the state is kept, or None if persistence is turned off."""
+    path = os.getenv(SNAPSHOT_PATH_ENV, DEFAULT_SNAPSHOT_PATH)
+    return path or None
+
+
+def _int_keys(mapping: Optional[Dict]) -> Dict[int, Dict]:
+    """JSON object keys are strings; driver maps are keyed by car number."""
+    return {int(key): value for key, value in (mapping or {}).items() if str(key).isdigit()}
+
+
+def save_state(path: str, state: Dict) -> None:
+    """Write the state atomically, so a crash mid-write never leaves a torn file."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump({**state, "saved_at": state.get("saved_at", time.time())}, f, separators=(",", ":"))
+    os.replace(temp_path, path)
+
+
+def load_state(path: str, max_age: float = MAX_RESTORE_AGE) -> Optional[Dict]:
+    """Read the saved state, or None if there is none, it is unreadable or too old."""
+    try:
+        with open(path) as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Ignoring unreadable live snapshot {path}: {e}")
+        return None
+
+    saved_at = state.get("saved_at")
+    if not isinstance(saved_at, (int, float)) or time.time() - saved_at > max_age:
+        return None
+    state["drivers"] = _int_keys(state.get("drivers"))
+    state["stints"] = _int_keys(state.get("stints"))
+    return state
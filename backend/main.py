@@ -3,6 +3,7 @@ SilverWall Backend
 FastAPI application for F1 telemetry streaming
 """
 
+import asyncio
 import os
 from fastapi import FastAPI, Request, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
@@ -25,8 +26,14 @@ from routes.results import router as results_router
 from routes.standings import router as standings_router
 from routes.discord import router as discord_router
 
-# Import HTTP client cleanup
-from openf1_fetcher import close_http_client
+# Import HTTP clients and live hub cleanup
+from openf1_fetcher import (
+    close_http_client, prewarm_http_client, start_session_resolver, stop_session_resolver,
+    restore_live_state, start_snapshot_writer, stop_snapshot_writer,
+    start_push_ingestion, stop_push_ingestion
+)
+import spacetimedb
+from websocket.hub import close_hubs
 
 app = FastAPI(
     title="SilverWall F1 Telemetry",
@@ -86,6 +93,14 @@ app.include_router(standings_router, prefix="/api")
 app.include_router(discord_router, prefix="/api")
 
 
+async def prewarm_upstreams():
+    """Open the OpenF1 and SpacetimeDB connections before the first request needs them."""
+    openf1_ok, spacetime_ok = await asyncio.gather(
+        prewarm_http_client(), spacetimedb.prewarm_http_client()
+    )
+    logger.info(f"Upstream connections pre-warmed (OpenF1: {openf1_ok}, SpacetimeDB: {spacetime_ok})")
+
+
 @app.on_event("startup")
 async def startup_event():
     """System check on startup"""
@@ -96,6 +111,15 @@ async def startup_event():
     logger.info("Source: Supabase + OpenF1 Live")
     logger.info("Features: Connection Pooling, Circuit Breaker, Compression, Observability")
     logger.info("=" * 60)
+    # Runs in the background so a slow upstream can't hold up startup
+    app.state.prewarm_task = asyncio.create_task(prewarm_upstreams())
+    # Start from the last-known-good snapshot instead of a cold cache
+    restore_live_state()
+    start_session_resolver()
+    start_snapshot_writer()
+    # OPENF1_INGEST=mqtt: live samples pushed by OpenF1's broker instead of polled
+    if start_push_ingestion():
+        logger.info("Ingestion: OpenF1 real-time broker")
     logger.info("Backend ready at http://127.0.0.1:8000")
     logger.info("=" * 60)
 
@@ -106,8 +130,14 @@ async def shutdown_event():
     print("\n" + "="*60)
     print("SilverWall Backend Shutting Down")
     print("="*60)
+    print("Stopping live telemetry pollers...")
+    await close_hubs()
+    await stop_session_resolver()
+    await stop_snapshot_writer()
+    await stop_push_ingestion()
     print("Closing HTTP client connections...")
     await close_http_client()
+    await spacetimedb.close_http_client()
     print("Cleanup complete")
     print("="*60 + "\n")
 
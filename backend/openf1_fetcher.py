@@ -5,55 +5,205 @@ Fetches real-time car positions and telemetry from OpenF1 API
 
 import httpx
 import asyncio
+import csv
+import hashlib
+import json
+import os
 import time
+from array import array
 from datetime import datetime, timezone, timedelta
-from typing import Optional, List, Dict
+from functools import partial
+from typing import Optional, List, Dict, Any, Awaitable, Callable, AsyncIterator
 from pybreaker import CircuitBreaker
+from telemetry_store import TelemetryStore, get_store, now_ms
+from playout import get_estimator
+from last_known_good import snapshot_path, save_state, load_state
+from upstream import http2_enabled, prewarm
+from openf1_scheduler import (
+    PRIORITY_LIVE, PRIORITY_SESSION, PRIORITY_ON_DEMAND, scheduler_from_env
+)
+from openf1_hedging import hedger_from_env
+from openf1_stream import BrokerStream, stream_from_env
 
 OPENF1_API = "https://api.openf1.org/v1"
+OPENF1_TOKEN_URL = "https://api.openf1.org/token"
 
 # Module-level HTTP client for connection pooling
 _http_client: Optional[httpx.AsyncClient] = None
 
+
+class AsyncCircuitBreaker(CircuitBreaker):
+    """
+    pybreaker's call() is synchronous: handed a coroutine function it only
+    guards creating the coroutine, so failed requests were never counted.
+    This call() awaits func inside the breaker instead. A cancelled call
+    (e.g. a losing hedge) got no answer either way, so it is neither a
+    success nor a failure: it can't reset the count or close the circuit.
+    """
+
+    async def call(self, func: Callable, *args: Any, **kwargs: Any) -> Any:
+        # The same steps as CircuitBreakerState.call, with the lock released while awaiting
+        with self._lock:
+            state = self.state
+            state.before_call(func, *args, **kwargs)
+            for listener in self.listeners:
+                listener.before_call(self, func, *args, **kwargs)
+        try:
+            result = await func(*args, **kwargs)
+        except asyncio.CancelledError:
+            raise
+        except BaseException as e:
+            with self._lock:
+                state._handle_error(e)  # Counts the failure and re-raises
+        else:
+            with self._lock:
+                state._handle_success()
+            return result
+
+
 # Circuit breaker for OpenF1 API
-openf1_breaker = CircuitBreaker(
+openf1_breaker = AsyncCircuitBreaker(
     fail_max=5,  # Open circuit after 5 consecutive failures
     reset_timeout=60,  # Wait 60 seconds before attempting to close circuit
     exclude=[httpx.HTTPStatusError]  # Don't count HTTP errors as circuit failures
 )
 
+# Request budget shared by every OpenF1 call, served in priority order
+# (see openf1_scheduler.py). Live telemetry is never shed.
+openf1_budget = scheduler_from_env()
+
+# Opt-in hedging of slow requests (OPENF1_HEDGING=1, see openf1_hedging.py).
+# Every OpenF1 call is an idempotent GET, so any of them may be duplicated.
+openf1_hedger = hedger_from_env()
+
 # Cache for static driver data with TTL
 # Format: { "drivers_{session_key}": (data, timestamp) }
 _driver_cache: Dict[str, tuple] = {}
 _CACHE_TTL_SECONDS = 300  # 5 minutes
 _CACHE_MAX_SIZE = 50
 
-# Cache for session key with shorter TTL
-_session_key_cache: Optional[tuple] = None  # (session_key, timestamp)
+# Current session as reported by /sessions?session_key=latest, plus whether it
+# is inside OpenF1's live window. Refreshed in the background (see
+# start_session_resolver) so status, track and telemetry read it from memory.
+_current_session: Optional[tuple] = None  # (session, timestamp)
 _SESSION_KEY_TTL = 30  # 30 seconds - reduce repeated API calls
+# Refresh a little before the TTL runs out so readers never wait on OpenF1
+_SESSION_REFRESH_INTERVAL = 25
+_session_resolver_task: Optional[asyncio.Task] = None
 
 # Cache full telemetry snapshots so each WebSocket client does not create its
 # own burst of OpenF1 requests. OpenF1's free tier is intentionally modest.
 _telemetry_cache: Optional[tuple] = None  # (payload, timestamp)
-_LIVE_TELEMETRY_TTL = 4
 _IDLE_TELEMETRY_TTL = 30
+# Past its TTL the snapshot is still served immediately (tagged with its age)
+# while a background refresh runs. Live data older than this is marked "stale".
+_MAX_SNAPSHOT_STALENESS = 30
+
+# The last good live snapshot is written to disk this often (seconds) and
+# loaded again at startup, see last_known_good.py
+_SNAPSHOT_SAVE_INTERVAL = 15
+_snapshot_writer_task: Optional[asyncio.Task] = None
+_saved_snapshot: Optional[Dict] = None  # telemetry payload last written
+
+# Each OpenF1 feed refreshes on its own cadence (seconds). Car locations move
+# several times a second, gaps and positions settle more slowly, and stints and
+# driver entries change a handful of times per race (drivers are also
+# refetched on demand when an unknown car number shows up).
+_FEED_INTERVALS = {
+    "location": 2,
+    "position": 10,
+    "intervals": 10,
+    "stints": 60,
+    "drivers": 300,
+}
+_DRIVERS_ON_DEMAND_MIN_INTERVAL = 15
+# The merged snapshot can't change before the fastest feed is due again
+_LIVE_TELEMETRY_TTL = min(_FEED_INTERVALS.values())
+
+# Push ingestion (OPENF1_INGEST=mqtt, see openf1_stream.py): these feeds are
+# kept up to date by broker messages instead of polls. A feed is polled once
+# for its backlog, then read from memory on every refresh for as long as the
+# broker connection is up; if it drops, polling takes over again.
+_PUSH_TOPICS = {
+    "v1/location": "location",
+    "v1/position": "position",
+    "v1/intervals": "intervals",
+    "v1/stints": "stints",
+}
+_PUSH_TELEMETRY_TTL = 0.5
+_push_stream: Optional[BrokerStream] = None
+
+# Last result of every feed plus the snapshot merged from them; ok_at is when
+# a feed last came back with data.
+# Format: { session_key: {"data": {feed: result}, "fetched_at": {feed: ts}, "ok_at": ts, "snapshot": payload, "ts": float} }
+_session_feeds: Dict[int, Dict] = {}
+_SESSION_FEEDS_MAX_SIZE = 4
 _LIVE_WINDOW_PADDING = timedelta(minutes=30)
 
+# Upstream fetches currently in flight, so callers that miss the cache at the
+# same moment share one OpenF1 request instead of stampeding it.
+# Format: { (session_key, resource): asyncio.Task }
+_inflight: Dict[tuple, asyncio.Task] = {}
+
+# Incremental state for the high-volume time-series feeds (location, position,
+# intervals). Each refresh only asks OpenF1 for samples newer than the cursor
+# and merges them into a persistent latest-per-driver map, so the cost of a
+# refresh stays flat for the whole session instead of growing with it.
+# Format: { (session_key, endpoint): {"cursor": str, "latest": {driver: entry}, "ts": float} }
+_feed_state: Dict[tuple, Dict] = {}
+_FEED_STATE_MAX_SIZE = 16  # 4 sessions x 3 feeds, plus pushed stints
+# OpenF1 ingests each car's stream with slightly different delays, so re-read a
+# short overlap behind the cursor to pick up samples that landed late.
+_FEED_CURSOR_OVERLAP = timedelta(seconds=2)
+
+# Digest of the last raw body of each fully re-fetched feed (stints), with what
+# it decoded to. Between sessions and under red flags OpenF1 returns the same
+# bytes poll after poll; a matching digest skips decoding and hands back the
+# previous result object, so the snapshot isn't rebuilt either.
+# Format: { (session_key, endpoint): (digest, result) }
+_payload_digests: Dict[tuple, tuple] = {}
+_PAYLOAD_DIGESTS_MAX_SIZE = 8
+
+# Read timeouts (seconds) for openf1_get. A whole-session /location pull for
+# track geometry is tens of MB; everything else the routes ask for is small.
+_ENDPOINT_TIMEOUTS = {"location": 30.0, "sessions": 5.0, "team_radio": 5.0}
+_DEFAULT_ENDPOINT_TIMEOUT = 10.0
+
+# How long openf1_get reuses a response (seconds); endpoints not listed are not cached
+_ENDPOINT_CACHE_TTLS = {"sessions": 30, "team_radio": 15, "drivers": 300, "session_result": 300}
+
+# Cache for openf1_get responses
+# Format: { (endpoint, params): (data, timestamp) }
+_response_cache: Dict[tuple, tuple] = {}
+_RESPONSE_CACHE_MAX_SIZE = 64
+
 
 async def get_http_client() -> httpx.AsyncClient:
-    """Get or create the shared HTTP client with connection pooling."""
+    """
+    Get or create the shared HTTP client with connection pooling. With HTTP/2
+    the parallel feed requests of a refresh share one multiplexed connection.
+    """
     global _http_client
     if _http_client is None:
-        _http_client = httpx.AsyncClient(
-            timeout=10.0,
-            limits=httpx.Limits(
-                max_connections=50,  # Max concurrent connections
-                max_keepalive_connections=20  # Keep connections alive for reuse
-            )
+        limits = httpx.Limits(
+            max_connections=50,  # Max concurrent connections
+            max_keepalive_connections=20  # Keep connections alive for reuse
         )
+        http2 = http2_enabled()
+        transport = None
+        if os.getenv("OPENF1_RECORD_DIR") or os.getenv("OPENF1_REPLAY_DIR"):
+            # Opt-in archive/replay of raw responses, see openf1_recorder.py
+            from openf1_recorder import transport_from_env
+            transport = transport_from_env(limits, http2)
+        _http_client = httpx.AsyncClient(timeout=10.0, limits=limits, http2=http2, transport=transport)
     return _http_client
 
 
+async def prewarm_http_client() -> bool:
+    """Open the OpenF1 connection at startup so the first live poll skips the handshake."""
+    return await prewarm(await get_http_client(), OPENF1_API)
+
+
 async def close_http_client():
     """Close the shared HTTP client. Called on shutdown."""
     global _http_client
@@ -82,6 +232,103 @@ def _cache_set(key: str, data: Dict) -> None:
     _driver_cache[key] = (data, time.time())
 
 
+def _inflight_task(key: tuple, fetch: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+    """Get the running task for key, starting fetch() if there isn't one."""
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(fetch())
+        _inflight[key] = task
+
+        def _done(finished: asyncio.Task) -> None:
+            if _inflight.get(key) is finished:
+                del _inflight[key]
+            if not finished.cancelled():
+                finished.exception()  # Mark as retrieved if every caller went away
+
+        task.add_done_callback(_done)
+    return task
+
+
+async def _singleflight(key: tuple, fetch: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Run fetch() once per key at a time; concurrent callers await the same result.
+    The fetch runs as its own task, so one caller being cancelled (e.g. a
+    WebSocket closing) doesn't fail the request for everyone else.
+    """
+    return await asyncio.shield(_inflight_task(key, fetch))
+
+
+async def _call_openf1(priority: int, func: Callable, url: str, params: Dict) -> Any:
+    """
+    Spend a budget token, then make the request through the circuit breaker.
+    With hedging on, a request slower than its endpoint's p90 is sent a
+    second time if another token is free right now, and the first response
+    wins. The token is taken before the hedger starts its clock, so time
+    spent queueing for the budget never counts as upstream latency.
+    """
+    await openf1_budget.acquire(priority)
+
+    async def attempt():
+        return await openf1_breaker.call(func, url, params=params)
+
+    if openf1_hedger is None:
+        return await attempt()
+    return await openf1_hedger.call(
+        url.rsplit("/", 1)[-1], attempt, discard=_close_response,
+        admit=lambda: openf1_budget.try_acquire(priority),
+    )
+
+
+async def _close_response(response: Any) -> None:
+    """Release a hedged response that lost the race (streamed bodies hold a connection)."""
+    await response.aclose()
+
+
+async def openf1_get(endpoint: str, params: Optional[Dict] = None,
+                     priority: int = PRIORITY_ON_DEMAND) -> Optional[Any]:
+    """
+    GET an OpenF1 endpoint through the shared connection pool and circuit breaker.
+    Every module that talks to OpenF1 should go through here (or the feed
+    fetchers below) rather than opening its own client.
+
+    Returns the decoded JSON, or None if OpenF1 answered with a non-200 status.
+    Network errors, an open circuit and openf1_scheduler.RequestShed (the
+    request budget for `priority` ran out) propagate to the caller. Responses are
+    cached per endpoint (see _ENDPOINT_CACHE_TTLS) and concurrent identical
+    requests share one upstream call.
+    """
+    params = params or {}
+    key = (endpoint, tuple(sorted((name, str(value)) for name, value in params.items())))
+    ttl = _ENDPOINT_CACHE_TTLS.get(endpoint, 0)
+
+    cached = _response_cache.get(key)
+    if cached is not None:
+        data, ts = cached
+        if time.time() - ts < ttl:
+            return data
+        del _response_cache[key]
+
+    return await _singleflight(("get",) + key, lambda: _openf1_get(endpoint, params, key, ttl, priority))
+
+
+async def _openf1_get(endpoint: str, params: Dict, key: tuple, ttl: float, priority: int) -> Optional[Any]:
+    client = await get_http_client()
+    timeout = _ENDPOINT_TIMEOUTS.get(endpoint, _DEFAULT_ENDPOINT_TIMEOUT)
+    response = await _call_openf1(
+        priority, partial(client.get, timeout=timeout), f"{OPENF1_API}/{endpoint}", params
+    )
+    if response.status_code != 200:
+        return None
+
+    data = response.json()
+    if ttl:
+        while len(_response_cache) >= _RESPONSE_CACHE_MAX_SIZE:
+            oldest_key = min(_response_cache, key=lambda k: _response_cache[k][1])
+            del _response_cache[oldest_key]
+        _response_cache[key] = (data, time.time())
+    return data
+
+
 def _parse_openf1_datetime(value: Optional[str]) -> Optional[datetime]:
     """Parse OpenF1 ISO timestamps into timezone-aware UTC datetimes."""
     if not value:
@@ -116,15 +363,294 @@ def is_session_in_live_window(session: Dict) -> bool:
     return False
 
 
-def _get_telemetry_cache() -> Optional[Dict]:
+def _payload_digest(body: bytes) -> bytes:
+    return hashlib.blake2b(body, digest_size=16).digest()
+
+
+def _unchanged_payload(key: tuple, digest: bytes) -> Optional[Any]:
+    """The result decoded last time if this body hashes the same, else None."""
+    previous = _payload_digests.get(key)
+    if previous is not None and previous[0] == digest:
+        return previous[1]
+    return None
+
+
+def _remember_payload(key: tuple, digest: bytes, result: Any) -> None:
+    _payload_digests.pop(key, None)
+    while len(_payload_digests) >= _PAYLOAD_DIGESTS_MAX_SIZE:
+        del _payload_digests[next(iter(_payload_digests))]
+    _payload_digests[key] = (digest, result)
+
+
+def _get_feed_state(session_key: int, endpoint: str) -> Dict:
+    """Get (or create) the incremental state for one session feed."""
+    key = (session_key, endpoint)
+    state = _feed_state.get(key)
+    if state is None:
+        # Evict the least recently used feed if the store is full
+        while len(_feed_state) >= _FEED_STATE_MAX_SIZE:
+            oldest_key = min(_feed_state, key=lambda k: _feed_state[k]["ts"])
+            del _feed_state[oldest_key]
+        state = {"cursor": None, "latest": {}, "ts": time.time()}
+        _feed_state[key] = state
+    state["ts"] = time.time()
+    return state
+
+
+def _merge_sample(latest: Dict[int, Dict], entry: Dict) -> str:
+    """
+    Merge one sample into a latest-per-driver map in place.
+    Returns the sample's date ("" if it has none).
+    """
+    date = entry.get("date") or ""
+    driver_num = entry.get("driver_number")
+    if driver_num:
+        # Keep the most recent entry for each driver
+        if driver_num not in latest or date > latest[driver_num].get("date", ""):
+            latest[driver_num] = entry
+    return date
+
+
+async def _iter_json_array(chunks: AsyncIterator[str]) -> AsyncIterator[Any]:
+    """
+    Incrementally decode a top-level JSON array, yielding each element as soon
+    as it is complete. Only the undecoded tail of the body is kept in memory,
+    so a full-session /location response never exists as one big list.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    started = False
+    async for chunk in chunks:
+        buffer += chunk
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(buffer):
+                break
+            if not started:
+                if buffer[pos] != "[":
+                    raise ValueError("Expected a JSON array")
+                started = True
+                pos += 1
+                continue
+            if buffer[pos] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                break  # Element continues in the next chunk
+            if end == len(buffer) and not isinstance(item, (dict, list)):
+                break  # A bare number could still be cut off mid-digit
+            yield item
+            pos = end
+        buffer = buffer[pos:]
+
+
+async def _send_streaming(client: httpx.AsyncClient, url: str, params: Optional[Dict] = None,
+                          timeout: Optional[float] = None) -> httpx.Response:
+    """GET without reading the body, so it can be consumed with aiter_text()."""
+    if timeout is None:
+        request = client.build_request("GET", url, params=params)
+    else:
+        request = client.build_request("GET", url, params=params, timeout=timeout)
+    return await client.send(request, stream=True)
+
+
+async def _iter_csv_rows(chunks: AsyncIterator[str]) -> AsyncIterator[List[List[str]]]:
+    """Parse a streamed CSV body, yielding the rows of each chunk as they complete."""
+    tail = ""
+    async for chunk in chunks:
+        lines = (tail + chunk).split("\n")
+        tail = lines.pop()
+        if lines:
+            yield list(csv.reader(lines))
+    if tail.strip():
+        yield list(csv.reader([tail]))
+
+
+def _csv_timestamp_ms(value: str) -> int:
+    parsed = _parse_openf1_datetime(value)
+    return int(parsed.timestamp() * 1000) if parsed is not None else 0
+
+
+def _csv_float(value: str) -> float:
+    """OpenF1 leaves nulls empty; they decode as 0 like the JSON path's `or 0`."""
+    return float(value) if value else 0.0
+
+
+def _csv_int(value: str) -> int:
+    return int(value) if value else 0
+
+
+def _csv_decoder(name: str, typecode: str) -> Callable[[str], Any]:
+    if name == "date":
+        return _csv_timestamp_ms
+    return _csv_float if typecode in "fd" else _csv_int
+
+
+async def openf1_get_columns(endpoint: str, params: Dict, columns: Dict[str, str],
+                             priority: int = PRIORITY_ON_DEMAND) -> Optional[Dict[str, array]]:
+    """
+    Bulk variant of openf1_get: asks OpenF1 for CSV (`csv=true`), which doesn't
+    repeat every key on every row, and decodes it straight into one typed
+    array per requested column without building a dict per row.
+
+    `columns` maps column name to array typecode, e.g. {"x": "f", "y": "f"}.
+    "date" is decoded to epoch milliseconds (use "q"). Other columns are
+    read as numbers, empty cells as 0. Returns None on a non-200 status;
+    errors propagate as with openf1_get. Responses are not cached.
+    """
+    params = {**params, "csv": "true"}
+    key = ("csv", endpoint, tuple(sorted((name, str(value)) for name, value in params.items())), tuple(columns))
+    return await _singleflight(key, lambda: _openf1_get_columns(endpoint, params, columns, priority))
+
+
+async def _openf1_get_columns(endpoint: str, params: Dict, columns: Dict[str, str],
+                              priority: int) -> Optional[Dict[str, array]]:
+    client = await get_http_client()
+    timeout = _ENDPOINT_TIMEOUTS.get(endpoint, _DEFAULT_ENDPOINT_TIMEOUT)
+    response = await _call_openf1(
+        priority, partial(_send_streaming, client, timeout=timeout), f"{OPENF1_API}/{endpoint}", params
+    )
+    result = {name: array(typecode) for name, typecode in columns.items()}
+    try:
+        if response.status_code != 200:
+            return None
+        # (column position, output array, decoder) for each requested column
+        readers = None
+        async for rows in _iter_csv_rows(response.aiter_text()):
+            if readers is None:
+                if not rows:
+                    continue
+                header, rows = rows[0], rows[1:]
+                readers = [
+                    (header.index(name), result[name], _csv_decoder(name, columns[name]))
+                    for name in columns if name in header
+                ]
+            for row in rows:
+                if len(row) < len(header):
+                    continue
+                for index, column, decode in readers:
+                    column.append(decode(row[index]))
+    finally:
+        await response.aclose()
+    return result
+
+
+def _advance_cursor(state: Dict, newest: Optional[str]) -> None:
+    """Move a feed's high-water mark forward, keeping a small overlap."""
+    parsed = _parse_openf1_datetime(newest)
+    if parsed is None:
+        return
+    cursor = (parsed - _FEED_CURSOR_OVERLAP).isoformat()
+    if state["cursor"] is None or cursor > state["cursor"]:
+        state["cursor"] = cursor
+
+
+def _record_position(history: TelemetryStore, entry: Dict) -> None:
+    """Append a /location sample to the history; the store drops overlap re-reads."""
+    driver_num = entry.get("driver_number")
+    parsed = _parse_openf1_datetime(entry.get("date"))
+    if driver_num and parsed is not None:
+        history.append(
+            driver_num,
+            int(parsed.timestamp() * 1000),
+            entry.get("x") or 0,
+            entry.get("y") or 0,
+            entry.get("z") or 0,
+        )
+
+
+async def _fetch_latest_per_driver(endpoint: str, session_key: Optional[int] = None) -> Optional[Dict[int, Dict]]:
+    """
+    Fetch a time-series endpoint and reduce it to the latest sample per driver.
+
+    With an explicit session_key only samples newer than the feed's cursor are
+    requested (OpenF1's `date>` filter) and merged into the persistent state.
+    "latest" lookups cannot be tracked across session changes, so they fall
+    back to a full fetch. Returns None if the request failed.
+    """
+    if _push_covers(session_key, endpoint):
+        return _feed_state[(session_key, endpoint)]["latest"]
+    return await _singleflight(
+        (session_key or "latest", endpoint),
+        lambda: _poll_latest_per_driver(endpoint, session_key)
+    )
+
+
+async def _poll_latest_per_driver(endpoint: str, session_key: Optional[int]) -> Optional[Dict[int, Dict]]:
+    client = await get_http_client()
+    params = {"session_key": session_key or "latest"}
+
+    state = _get_feed_state(session_key, endpoint) if session_key else None
+    if state is not None and state.get("pushed_newest"):
+        # Resume after the last pushed sample rather than the last poll
+        _advance_cursor(state, state.pop("pushed_newest"))
+    if state is not None and state["cursor"]:
+        params["date>"] = state["cursor"]
+
+    response = await _call_openf1(
+        PRIORITY_LIVE, partial(_send_streaming, client), f"{OPENF1_API}/{endpoint}", params
+    )
+    arrived_ms = now_ms()
+
+    # Reduce the body while it streams in: peak memory is bounded by the
+    # number of drivers, not the length of the session
+    latest = state["latest"] if state is not None else {}
+    # Every location sample is also kept in the per-driver position history
+    history = get_store(session_key) if session_key and endpoint == "location" else None
+    newest = None
+    # Newest sample per car in this response, for the upstream lag estimate.
+    # Only location feeds it: that's the feed playout positions come from, and
+    # the slower feeds' lag is mostly their own poll interval.
+    arrivals: Optional[Dict[int, str]] = {} if endpoint == "location" else None
+    try:
+        if response.status_code != 200:
+            return None
+        async for entry in _iter_json_array(response.aiter_text()):
+            if isinstance(entry, dict):
+                date = _merge_sample(latest, entry)
+                if date and (newest is None or date > newest):
+                    newest = date
+                driver_num = entry.get("driver_number")
+                if arrivals is not None and driver_num and date > arrivals.get(driver_num, ""):
+                    arrivals[driver_num] = date
+                if history is not None:
+                    _record_position(history, entry)
+    finally:
+        await response.aclose()
+
+    if state is not None:
+        _advance_cursor(state, newest)
+        if arrivals:
+            _observe_lags(session_key, arrivals, arrived_ms)
+    return latest
+
+
+def _observe_lags(session_key: int, arrivals: Dict[int, str], arrived_ms: int) -> None:
+    """Feed each car's upstream delay (arrival minus sample date) to the playout estimator."""
+    estimator = get_estimator(session_key)
+    for date in arrivals.values():
+        parsed = _parse_openf1_datetime(date)
+        if parsed is not None:
+            estimator.observe(arrived_ms - int(parsed.timestamp() * 1000), arrived_ms)
+
+
+def _get_telemetry_cache() -> Optional[tuple]:
+    """Returns (payload, age_seconds, is_fresh), or None if nothing is cached."""
     if _telemetry_cache is None:
         return None
 
     payload, ts = _telemetry_cache
-    ttl = _LIVE_TELEMETRY_TTL if payload.get("status") == "live" else _IDLE_TELEMETRY_TTL
-    if time.time() - ts < ttl:
-        return payload
-    return None
+    age = time.time() - ts
+    if payload.get("status") != "live":
+        ttl = _IDLE_TELEMETRY_TTL
+    elif _push_stream is not None and _push_stream.connected:
+        ttl = _PUSH_TELEMETRY_TTL
+    else:
+        ttl = _LIVE_TELEMETRY_TTL
+    return payload, age, age < ttl
 
 
 def _set_telemetry_cache(payload: Dict) -> Dict:
@@ -133,63 +659,159 @@ def _set_telemetry_cache(payload: Dict) -> Dict:
     return payload
 
 
-async def get_latest_session_key() -> Optional[int]:
-    """Get the current/latest session key from OpenF1. Results are cached for 30s."""
-    global _session_key_cache
-
-    # Check cache first
-    if _session_key_cache is not None:
-        session_key, ts = _session_key_cache
+async def get_current_session() -> Optional[Dict]:
+    """
+    The latest OpenF1 session's metadata, with an added "in_live_window" flag.
+    Served from memory; refreshed at most every 30s (the background resolver
+    keeps it warm) and concurrent refreshes share a single request. If a
+    refresh fails the previous session is kept.
+    """
+    if _current_session is not None:
+        session, ts = _current_session
         if time.time() - ts < _SESSION_KEY_TTL:
-            return session_key
+            return session
+
+    return await _singleflight(("latest", "sessions"), _refresh_current_session)
+
+
+async def _refresh_current_session() -> Optional[Dict]:
+    global _current_session
 
     try:
         client = await get_http_client()
-        response = await openf1_breaker.call(
-            client.get, f"{OPENF1_API}/sessions", params={"session_key": "latest"}
+        response = await _call_openf1(
+            PRIORITY_SESSION, client.get, f"{OPENF1_API}/sessions", {"session_key": "latest"}
         )
         if response.status_code == 200:
             data = response.json()
+            session = None
             if data:
-                session = data[0]
-                # Only return sessions that are currently in OpenF1's live window.
-                if is_session_in_live_window(session):
-                    session_key = session.get("session_key")
-                    # Cache the result
-                    _session_key_cache = (session_key, time.time())
-                    return session_key
+                session = {**data[0], "in_live_window": is_session_in_live_window(data[0])}
+            _current_session = (session, time.time())
+            return session
     except Exception as e:
         print(f"Error getting session key: {e}")
+    return _current_session[0] if _current_session is not None else None
+
+
+async def get_latest_session_key() -> Optional[int]:
+    """
+    Get the current session key from OpenF1, or None if the latest session is
+    outside OpenF1's live window.
+    """
+    session = await get_current_session()
+    if session and session["in_live_window"]:
+        return session.get("session_key")
     return None
 
 
+async def _run_session_resolver() -> None:
+    while True:
+        await _singleflight(("latest", "sessions"), _refresh_current_session)
+        await asyncio.sleep(_SESSION_REFRESH_INTERVAL)
+
+
+def start_session_resolver() -> None:
+    """Keep the current session warm in the background. Called on startup."""
+    global _session_resolver_task
+    if _session_resolver_task is None or _session_resolver_task.done():
+        _session_resolver_task = asyncio.create_task(_run_session_resolver())
+
+
+async def stop_session_resolver() -> None:
+    """Stop the background session refresh. Called on shutdown."""
+    global _session_resolver_task
+    task, _session_resolver_task = _session_resolver_task, None
+    if task is not None and not task.done():
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+
+def _push_covers(session_key: Optional[int], endpoint: str) -> bool:
+    """True if a feed is being kept current by the broker rather than polled."""
+    if _push_stream is None or not _push_stream.connected or not session_key:
+        return False
+    state = _feed_state.get((session_key, endpoint))
+    return state is not None and state.get("pushed", False)
+
+
+def _ingest_pushed(topic: str, entry: Any) -> None:
+    """
+    Merge one broker message into the same per-feed state a poll would
+    update, so the snapshot is built exactly as before.
+    """
+    endpoint = _PUSH_TOPICS.get(topic)
+    if endpoint is None or not isinstance(entry, dict):
+        return
+    session_key = entry.get("session_key")
+    driver_num = entry.get("driver_number")
+    if not session_key or not driver_num:
+        return
+
+    # Only sessions we are already serving: their backlog has been polled
+    state = _feed_state.get((session_key, endpoint))
+    if state is None:
+        return
+    state["ts"] = time.time()
+    latest = state["latest"]
+    if endpoint == "stints":
+        if driver_num not in latest or (entry.get("stint_number") or 0) >= (latest[driver_num].get("stint_number") or 0):
+            latest[driver_num] = entry
+        state["pushed"] = True
+        return
+
+    date = _merge_sample(latest, entry)
+    if endpoint == "location":
+        _record_position(get_store(session_key), entry)
+    if date:
+        if date > state.get("pushed_newest", ""):
+            state["pushed_newest"] = date
+        parsed = _parse_openf1_datetime(date) if endpoint == "location" else None
+        if parsed is not None:
+            arrived_ms = now_ms()
+            get_estimator(session_key).observe(arrived_ms - int(parsed.timestamp() * 1000), arrived_ms)
+    state["pushed"] = True
+
+
+async def _mqtt_token() -> Optional[str]:
+    """Exchange OPENF1_USERNAME / OPENF1_PASSWORD for a broker access token."""
+    username, password = os.getenv("OPENF1_USERNAME"), os.getenv("OPENF1_PASSWORD")
+    if not username or not password:
+        return None
+    client = await get_http_client()
+    response = await client.post(OPENF1_TOKEN_URL, data={"username": username, "password": password})
+    response.raise_for_status()
+    return response.json().get("access_token")
+
+
+def start_push_ingestion() -> bool:
+    """Connect to the OpenF1 broker if OPENF1_INGEST=mqtt. Called on startup."""
+    global _push_stream
+    if _push_stream is None:
+        _push_stream = stream_from_env(_PUSH_TOPICS, _ingest_pushed, _mqtt_token)
+    if _push_stream is None:
+        return False
+    _push_stream.start()
+    return True
+
+
+async def stop_push_ingestion() -> None:
+    """Close the broker connection. Called on shutdown."""
+    global _push_stream
+    stream, _push_stream = _push_stream, None
+    if stream is not None:
+        await stream.stop()
+
+
 async def fetch_car_positions(session_key: int = None) -> List[Dict]:
-    """Fetch current car positions from OpenF1"""
+    """Fetch current car positions (x, y coordinates) from OpenF1"""
     try:
-        client = await get_http_client()
-        params = {}
-        if session_key:
-            params["session_key"] = session_key
-        else:
-            params["session_key"] = "latest"
-
-        # Get location data (x, y coordinates)
-        response = await openf1_breaker.call(
-            client.get, f"{OPENF1_API}/location", params=params
-        )
-        if response.status_code == 200:
-            data = response.json()
-            if data:
-                # Group by driver_number and get latest position for each
-                latest_positions = {}
-                for entry in data:
-                    driver_num = entry.get("driver_number")
-                    if driver_num:
-                        # Keep the most recent entry for each driver
-                        if driver_num not in latest_positions or entry.get("date", "") > latest_positions[driver_num].get("date", ""):
-                            latest_positions[driver_num] = entry
-
-                return list(latest_positions.values())
+        latest_positions = await _fetch_latest_per_driver("location", session_key)
+        if latest_positions:
+            return list(latest_positions.values())
     except Exception as e:
         print(f"Error fetching car positions: {e}")
     return []
@@ -203,6 +825,13 @@ async def fetch_driver_info(session_key: Optional[int] = None) -> Dict[int, Dict
     if cached is not None:
         return cached
 
+    return await _singleflight(
+        (session_key or "latest", "drivers"),
+        lambda: _fetch_driver_info(session_key, cache_key)
+    )
+
+
+async def _fetch_driver_info(session_key: Optional[int], cache_key: str) -> Dict[int, Dict]:
     try:
         client = await get_http_client()
         params = {}
@@ -211,9 +840,7 @@ async def fetch_driver_info(session_key: Optional[int] = None) -> Dict[int, Dict
         else:
             params["session_key"] = "latest"
 
-        response = await openf1_breaker.call(
-            client.get, f"{OPENF1_API}/drivers", params=params
-        )
+        response = await _call_openf1(PRIORITY_LIVE, client.get, f"{OPENF1_API}/drivers", params)
         if response.status_code == 200:
             data = response.json()
             drivers = {}
@@ -238,6 +865,13 @@ async def fetch_driver_info(session_key: Optional[int] = None) -> Dict[int, Dict
 
 async def fetch_stints(session_key: int = None) -> Dict[int, Dict]:
     """Fetch latest tyre stint for each driver"""
+    if _push_covers(session_key, "stints"):
+        # A copy, so _refresh_feeds can tell it apart from the previous result
+        return dict(_feed_state[(session_key, "stints")]["latest"])
+    return await _singleflight((session_key or "latest", "stints"), lambda: _fetch_stints(session_key))
+
+
+async def _fetch_stints(session_key: Optional[int]) -> Dict[int, Dict]:
     try:
         client = await get_http_client()
         params = {}
@@ -246,10 +880,14 @@ async def fetch_stints(session_key: int = None) -> Dict[int, Dict]:
         else:
             params["session_key"] = "latest"
 
-        response = await openf1_breaker.call(
-            client.get, f"{OPENF1_API}/stints", params=params
-        )
+        response = await _call_openf1(PRIORITY_LIVE, client.get, f"{OPENF1_API}/stints", params)
         if response.status_code == 200:
+            key = (session_key or "latest", "stints")
+            digest = _payload_digest(response.content)
+            unchanged = _unchanged_payload(key, digest)
+            if unchanged is not None:
+                return unchanged
+
             data = response.json()
             stints = {}
             for s in data:
@@ -258,6 +896,10 @@ async def fetch_stints(session_key: int = None) -> Dict[int, Dict]:
                     # Keep latest stint
                     if driver_num not in stints or s.get("stint_number") > stints[driver_num].get("stint_number"):
                         stints[driver_num] = s
+            _remember_payload(key, digest, stints)
+            if _push_stream is not None and session_key:
+                # Base state for stint changes pushed by the broker
+                _get_feed_state(session_key, "stints")["latest"] = dict(stints)
             return stints
     except Exception as e:
         print(f"Error fetching stints: {e}")
@@ -267,25 +909,8 @@ async def fetch_stints(session_key: int = None) -> Dict[int, Dict]:
 async def fetch_intervals(session_key: Optional[int] = None) -> List[Dict]:
     """Fetch gap intervals between drivers for leaderboard"""
     try:
-        client = await get_http_client()
-        params = {}
-        if session_key:
-            params["session_key"] = session_key
-        else:
-            params["session_key"] = "latest"
-
-        response = await openf1_breaker.call(
-            client.get, f"{OPENF1_API}/intervals", params=params
-        )
-        if response.status_code == 200:
-            data = response.json()
-            # Get latest interval for each driver
-            latest = {}
-            for entry in data:
-                driver_num = entry.get("driver_number")
-                if driver_num:
-                    if driver_num not in latest or entry.get("date", "") > latest[driver_num].get("date", ""):
-                        latest[driver_num] = entry
+        latest = await _fetch_latest_per_driver("intervals", session_key)
+        if latest:
             return list(latest.values())
     except Exception as e:
         print(f"Error fetching intervals: {e}")
@@ -295,85 +920,106 @@ async def fetch_intervals(session_key: Optional[int] = None) -> List[Dict]:
 async def fetch_position(session_key: Optional[int] = None) -> List[Dict]:
     """Fetch current race positions for leaderboard"""
     try:
-        client = await get_http_client()
-        params = {}
-        if session_key:
-            params["session_key"] = session_key
-        else:
-            params["session_key"] = "latest"
-
-        response = await openf1_breaker.call(
-            client.get, f"{OPENF1_API}/position", params=params
-        )
-        if response.status_code == 200:
-            data = response.json()
-            # Get latest position for each driver
-            latest = {}
-            for entry in data:
-                driver_num = entry.get("driver_number")
-                if driver_num:
-                    if driver_num not in latest or entry.get("date", "") > latest[driver_num].get("date", ""):
-                        latest[driver_num] = entry
+        latest = await _fetch_latest_per_driver("position", session_key)
+        if latest:
             return sorted(latest.values(), key=lambda x: x.get("position", 999))
     except Exception as e:
         print(f"Error fetching positions: {e}")
     return []
 
 
-async def fetch_live_telemetry(session_key: int = None) -> Dict:
-    """
-    Fetch live telemetry data combining positions, intervals, stints, and driver info.
-    Returns data ready for WebSocket broadcast, SORTED by race position.
-    """
-    should_cache_snapshot = session_key is None
-
-    if should_cache_snapshot:
-        cached_payload = _get_telemetry_cache()
-        if cached_payload is not None:
-            return cached_payload
+def _get_session_feeds(session_key: int) -> Dict:
+    """Get (or create) the feed schedule state for a session."""
+    feeds = _session_feeds.get(session_key)
+    if feeds is None:
+        while len(_session_feeds) >= _SESSION_FEEDS_MAX_SIZE:
+            oldest_key = min(_session_feeds, key=lambda k: _session_feeds[k]["ts"])
+            del _session_feeds[oldest_key]
+        feeds = {"data": {}, "fetched_at": {}, "ok_at": 0, "snapshot": None, "ts": time.time()}
+        _session_feeds[session_key] = feeds
+    feeds["ts"] = time.time()
+    return feeds
+
+
+def _due_feeds(session_key: int, feeds: Dict, now: float) -> List[str]:
+    """Work out which feeds need a refresh on this pass."""
+    fetched_at = feeds["fetched_at"]
+    # Pushed feeds are only a memory read away, so they are due every pass
+    due = [
+        name for name, interval in _FEED_INTERVALS.items()
+        if _push_covers(session_key, name) or now - fetched_at.get(name, 0) >= interval
+    ]
+
+    # Refresh driver info on demand when a car appears that we can't name
+    if "drivers" not in due and now - fetched_at.get("drivers", 0) >= _DRIVERS_ON_DEMAND_MIN_INTERVAL:
+        known = feeds["data"].get("drivers", {})
+        seen = {
+            entry.get("driver_number")
+            for name in ("position", "location")
+            for entry in feeds["data"].get(name, [])
+        }
+        if any(num and num not in known for num in seen):
+            _driver_cache.pop(f"drivers_{session_key}", None)
+            due.append("drivers")
 
-    session_key = session_key or await get_latest_session_key()
+    return due
 
-    def maybe_cache(payload: Dict) -> Dict:
-        return _set_telemetry_cache(payload) if should_cache_snapshot else payload
-    
-    if not session_key:
-        return maybe_cache({
-            "status": "offline",
-            "cars": [],
-            "message": "No active session",
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-        })
-
-    # Fetch all data in parallel using asyncio.gather
-    try:
-        results = await asyncio.gather(
-            fetch_position(session_key),
-            fetch_intervals(session_key),
-            fetch_car_positions(session_key),
-            fetch_driver_info(session_key),
-            fetch_stints(session_key),
-            return_exceptions=True  # Don't crash if one fails
-        )
 
-        # Unpack results, handling potential exceptions
-        race_positions = results[0] if isinstance(results[0], list) else []
-        intervals = results[1] if isinstance(results[1], list) else []
-        locations = results[2] if isinstance(results[2], list) else []
-        drivers = results[3] if isinstance(results[3], dict) else {}
-        stints = results[4] if isinstance(results[4], dict) else {}
+async def _refresh_feeds(session_key: int, feeds: Dict) -> bool:
+    """
+    Fetch every due feed in parallel and store the results.
+    Returns True if any feed's data changed since its last refresh.
+    """
+    now = time.time()
+    due = _due_feeds(session_key, feeds, now)
+    if not due:
+        return False
+
+    fetchers = {
+        "position": fetch_position,
+        "intervals": fetch_intervals,
+        "location": fetch_car_positions,
+        "drivers": fetch_driver_info,
+        "stints": fetch_stints,
+    }
+    results = await asyncio.gather(
+        *(fetchers[name](session_key) for name in due),
+        return_exceptions=True  # Don't crash if one fails
+    )
+
+    changed = False
+    for name, result in zip(due, results):
+        feeds["fetched_at"][name] = now
+        # A failed or empty refresh keeps the previous data for this feed.
+        # Unchanged stints come back as the very same object; the time-series
+        # feeds are compared against the previous latest-per-driver samples.
+        if isinstance(result, Exception) or not result:
+            continue
+        if name != "drivers":
+            # Driver info may come from its own cache, so it doesn't show OpenF1 answered
+            feeds["ok_at"] = now
+        previous = feeds["data"].get(name)
+        if result is not previous and result != previous:
+            feeds["data"][name] = result
+            changed = True
+    return changed
+
+
+def _build_snapshot(session_key: int, data: Dict) -> Dict:
+    """Merge the latest feed results into a payload SORTED by race position."""
+    race_positions = data.get("position", [])
+    intervals = data.get("intervals", [])
+    locations = data.get("location", [])
+    drivers = data.get("drivers", {})
+    stints = data.get("stints", {})
 
-    except Exception as e:
-        print(f"Critical error in parallel fetch: {e}")
-        return maybe_cache({"status": "error", "cars": [], "message": str(e)})
-    
     if not race_positions and not locations:
-        return maybe_cache({
+        return {
             "status": "waiting",
             "cars": [],
             "session_key": session_key,
             "timestamp": datetime.now(timezone.utc).isoformat(),
-        })
+        }
 
     # Build lookup maps with None filtering (single pass, more efficient)
     interval_map = {i["driver_number"]: i for i in intervals if i.get("driver_number")}
@@ -381,7 +1027,6 @@ async def fetch_live_telemetry(session_key: int = None) -> Dict:
 
     # If we have race positions, use that as the primary list
     # If not (e.g. practice session where position might be weird or missing), fall back to location keys
-
     primary_list = race_positions if race_positions else [{"driver_number": k} for k in location_map.keys()]
 
     # Build car data with list comprehension (pre-filter invalid entries)
@@ -422,10 +1067,190 @@ async def fetch_live_telemetry(session_key: int = None) -> Dict:
     # Sort by position (using optimized key function)
     cars.sort(key=lambda x: x["position"] or 999)
     
-    payload = {
+    return {
         "status": "live",
         "session_key": session_key,
         "cars": cars,
         "timestamp": datetime.now(timezone.utc).isoformat(),
     }
-    return maybe_cache(payload)
+
+
+async def _refresh_snapshot(session_key: int) -> Dict:
+    """Refresh the due feeds and rebuild the snapshot if any of them changed."""
+    feeds = _get_session_feeds(session_key)
+    changed = await _refresh_feeds(session_key, feeds)
+    if changed or feeds["snapshot"] is None:
+        feeds["snapshot"] = _build_snapshot(session_key, feeds["data"])
+    return feeds["snapshot"]
+
+
+async def fetch_live_telemetry(session_key: int = None) -> Dict:
+    """
+    Fetch live telemetry data combining positions, intervals, stints, and driver info.
+    Only feeds that are due are refreshed, and the snapshot is only rebuilt
+    when one of them changed: an unchanged snapshot is returned as the same
+    object. Returns data ready for WebSocket broadcast.
+    """
+    if session_key is not None:
+        return await _fetch_session_telemetry(session_key)
+
+    # Stale-while-revalidate for the shared "latest session" snapshot: past its
+    # TTL the last snapshot is served straight away while one background task
+    # refreshes it. Only a cold start waits on OpenF1.
+    cached = _get_telemetry_cache()
+    if cached is None:
+        return await _singleflight(("latest", "telemetry"), _refresh_latest_telemetry)
+
+    payload, age, is_fresh = cached
+    if is_fresh:
+        return payload
+
+    _inflight_task(("latest", "telemetry"), _refresh_latest_telemetry)
+    stale = {**payload, "age": round(age, 1)}
+    if payload.get("status") == "live" and age > _MAX_SNAPSHOT_STALENESS:
+        stale["status"] = "stale"
+    return stale
+
+
+async def _fetch_session_telemetry(session_key: Optional[int]) -> Dict:
+    """Build a telemetry payload for a session (the live one if session_key is None)."""
+    session_key = session_key or await get_latest_session_key()
+
+    if not session_key:
+        return {
+            "status": "offline",
+            "cars": [],
+            "message": "No active session",
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        }
+
+    try:
+        return await _singleflight(
+            (session_key, "snapshot"), lambda: _refresh_snapshot(session_key)
+        )
+    except Exception as e:
+        print(f"Critical error in parallel fetch: {e}")
+        return {"status": "error", "cars": [], "message": str(e)}
+
+
+def _upstream_down() -> bool:
+    """True while the circuit breaker is refusing OpenF1 calls."""
+    return openf1_breaker.current_state == "open"
+
+
+async def _refresh_latest_telemetry() -> Dict:
+    """
+    Refresh the shared snapshot. Errors, anything built while the circuit
+    breaker is open, and a refresh in which no feed got an answer (e.g. every
+    request was a 429 or 5xx) never replace or re-date a good live snapshot.
+    """
+    payload = await _fetch_session_telemetry(None)
+    if _telemetry_cache is not None:
+        previous, saved_at = _telemetry_cache
+        if previous.get("status") == "live" and (
+            payload.get("status") == "error" or _upstream_down()
+            or (payload is previous and not _fetched_since(payload, saved_at))
+        ):
+            # Keep serving it; its age keeps growing until it is marked stale
+            return previous
+    return _set_telemetry_cache(payload)
+
+
+def _fetched_since(payload: Dict, ts: float) -> bool:
+    """True if a feed behind the payload's session returned data at or after ts."""
+    feeds = _session_feeds.get(payload.get("session_key"))
+    return feeds is not None and feeds.get("ok_at", 0) >= ts
+
+
+def _live_state() -> Optional[Dict]:
+    """The last live snapshot plus the session, driver and stint maps behind it."""
+    if _telemetry_cache is None:
+        return None
+    payload, ts = _telemetry_cache
+    if payload.get("status") != "live":
+        return None
+    session_key = payload.get("session_key")
+    data = _session_feeds[session_key]["data"] if session_key in _session_feeds else {}
+    return {
+        "saved_at": ts,
+        "session": _current_session[0] if _current_session is not None else None,
+        "telemetry": payload,
+        "drivers": data.get("drivers") or _cache_get(f"drivers_{session_key}") or {},
+        "stints": data.get("stints") or {},
+    }
+
+
+async def persist_live_state() -> bool:
+    """Write the last-known-good state to disk if it changed since the last write."""
+    global _saved_snapshot
+    path = snapshot_path()
+    state = _live_state()
+    if path is None or state is None or state["telemetry"] is _saved_snapshot:
+        return False
+    try:
+        await asyncio.to_thread(save_state, path, state)
+    except (OSError, TypeError, ValueError) as e:
+        print(f"⚠️ Could not save live snapshot: {e}")
+        return False
+    _saved_snapshot = state["telemetry"]
+    return True
+
+
+def restore_live_state() -> bool:
+    """
+    Load the last-known-good state written before a restart. The snapshot is
+    served straight away (tagged with its age, like any stale snapshot) while
+    the first refresh runs, and the driver and stint maps count as fetched
+    when they were saved, so they aren't all requested again at once.
+    """
+    global _telemetry_cache, _current_session
+    path = snapshot_path()
+    state = load_state(path) if path else None
+    if not state or not state.get("telemetry"):
+        return False
+
+    saved_at = state["saved_at"]
+    payload = state["telemetry"]
+    _telemetry_cache = (payload, saved_at)
+    if state.get("session") and _current_session is None:
+        _current_session = (state["session"], saved_at)
+
+    session_key = payload.get("session_key")
+    if session_key:
+        feeds = _get_session_feeds(session_key)
+        for name in ("drivers", "stints"):
+            if state[name]:
+                feeds["data"][name] = state[name]
+                feeds["fetched_at"][name] = saved_at
+        if state["drivers"]:
+            _driver_cache[f"drivers_{session_key}"] = (state["drivers"], saved_at)
+    print(f"💾 Restored live snapshot for session {session_key} ({time.time() - saved_at:.0f}s old)")
+    return True
+
+
+async def _run_snapshot_writer() -> None:
+    while True:
+        await asyncio.sleep(_SNAPSHOT_SAVE_INTERVAL)
+        await persist_live_state()
+
+
+def start_snapshot_writer() -> None:
+    """Save the last-known-good state periodically. Called on startup."""
+    global _snapshot_writer_task
+    if snapshot_path() is None:
+        return
+    if _snapshot_writer_task is None or _snapshot_writer_task.done():
+        _snapshot_writer_task = asyncio.create_task(_run_snapshot_writer())
+
+
+async def stop_snapshot_writer() -> None:
+    """Stop the periodic save and write the state one last time. Called on shutdown."""
+    global _snapshot_writer_task
+    task, _snapshot_writer_task = _snapshot_writer_task, None
+    if task is not None and not task.done():
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    await persist_live_state()
@@ -0,0 +1,142 @@
+"""
+SilverWall - OpenF1 Request Hedging
+Duplicates slow idempotent GETs so one stalled response can't set the frame time
+
+Opt in with OPENF1_HEDGING=1. When a request to an endpoint is still running
+after that endpoint's rolling p90 latency, a second identical request is sent
+and whichever finishes first is used; the other is cancelled (or closed, if
+it already produced a response). Hedges draw on a credit that every request
+tops up by HEDGE_BUDGET, so they stay under that share of total traffic.
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+# Latencies kept per endpoint, and how many are needed before hedging starts
+LATENCY_WINDOW = 100
+MIN_SAMPLES = 20
+HEDGE_QUANTILE = 0.9
+# Never hedge sooner than this (seconds), however fast the endpoint usually is
+MIN_HEDGE_DELAY = 0.05
+
+# Hedges allowed per request sent (5%), with a little burst headroom
+HEDGE_BUDGET = 0.05
+MAX_HEDGE_CREDIT = 3.0
+
+
+class RequestHedger:
+    """Rolling per-endpoint latency tracking and the hedge credit."""
+
+    def __init__(self, budget: float = HEDGE_BUDGET, min_samples: int = MIN_SAMPLES):
+        self.budget = budget
+        self.min_samples = min_samples
+        self.latencies: Dict[str, Deque[float]] = {}
+        self.credit = 0.0
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def record(self, endpoint: str, seconds: float) -> None:
+        window = self.latencies.get(endpoint)
+        if window is None:
+            window = deque(maxlen=LATENCY_WINDOW)
+            self.latencies[endpoint] = window
+        window.append(seconds)
+
+    def hedge_delay(self, endpoint: str) -> Optional[float]:
+        """The endpoint's p90 latency, or None until enough requests have been timed."""
+        window = self.latencies.get(endpoint)
+        if window is None or len(window) < self.min_samples:
+            return None
+        ordered = sorted(window)
+        return max(ordered[min(int(HEDGE_QUANTILE * len(ordered)), len(ordered) - 1)], MIN_HEDGE_DELAY)
+
+    def _spend_credit(self, admit: Optional[Callable[[], bool]]) -> bool:
+        if self.credit < 1 or (admit is not None and not admit()):
+            return False
+        self.credit -= 1
+        return True
+
+    async def call(self, endpoint: str, attempt: Callable[[], Awaitable[Any]],
+                   discard: Optional[Callable[[Any], Awaitable[None]]] = None,
+                   admit: Optional[Callable[[], bool]] = None) -> Any:
+        """
+        Run attempt(), hedging it with a second attempt() if it is slower than
+        the endpoint's p90. attempt must be safe to run twice (an idempotent
+        GET). discard is called on a losing result that finished anyway, e.g.
+        to close a streamed response. admit, if given, is asked just before
+        a hedge is sent and can veto it (e.g. when no request token is free).
+        """
+        self.requests += 1
+        self.credit = min(MAX_HEDGE_CREDIT, self.credit + self.budget)
+        delay = self.hedge_delay(endpoint)
+
+        started = time.monotonic()
+        primary = asyncio.ensure_future(attempt())
+        if delay is None:
+            result = await primary
+            self.record(endpoint, time.monotonic() - started)
+            return result
+
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done and self._spend_credit(admit):
+                self.hedged += 1
+                tasks.add(asyncio.ensure_future(attempt()))
+
+            while True:
+                done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((task for task in done if task.exception() is None), None)
+                # A failed attempt only decides the outcome if nothing else is still running
+                if winner is not None or not pending:
+                    break
+                tasks = pending
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+        if winner is None:
+            return next(iter(done)).result()  # Raises the failure
+        if winner is not primary:
+            self.hedge_wins += 1
+        self.record(endpoint, time.monotonic() - started)
+
+        for task in tasks | done:
+            if task is not winner:
+                asyncio.ensure_future(_discard_loser(task, discard))
+        return winner.result()
+
+    def stats(self) -> Dict:
+        """Hedge counts and per-endpoint hedge thresholds, for logs and metrics."""
+        return {
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "credit": round(self.credit, 2),
+            "hedge_after": {endpoint: self.hedge_delay(endpoint) for endpoint in self.latencies},
+        }
+
+
+async def _discard_loser(task: asyncio.Future, discard: Optional[Callable[[Any], Awaitable[None]]]) -> None:
+    """Wait for a cancelled or losing attempt to settle and release what it returned."""
+    try:
+        result = await task
+    except BaseException:
+        return
+    if discard is not None:
+        try:
+            await discard(result)
+        except Exception:
+            pass
+
+
+def hedger_from_env() -> Optional[RequestHedger]:
+    """A hedger if OPENF1_HEDGING=1, sharing HEDGE_BUDGET unless OPENF1_HEDGE_BUDGET is set."""
+    if os.getenv("OPENF1_HEDGING", "0") != "1":
+        return None
+    return RequestHedger(budget=float(os.getenv("OPENF1_HEDGE_BUDGET", str(HEDGE_BUDGET))))
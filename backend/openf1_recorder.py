@@ -0,0 +1,177 @@
+"""
+SilverWall - OpenF1 Session Recorder
+Archives raw OpenF1 responses to disk and replays them without network access
+
+Set OPENF1_RECORD_DIR to record every upstream response, or OPENF1_REPLAY_DIR
+to serve a previous recording instead of calling OpenF1.
+
+Layout, one pair of files per session and endpoint:
+    {dir}/{session_key}/{endpoint}.seg   gzip members, one per response, append-only
+    {dir}/{session_key}/{endpoint}.idx   JSON lines: received_at, status, query,
+                                         headers, offset, length
+Each .seg file is also a valid multi-member gzip file on its own.
+"""
+
+import gzip
+import json
+import os
+import re
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+RECORD_DIR_ENV = "OPENF1_RECORD_DIR"
+REPLAY_DIR_ENV = "OPENF1_REPLAY_DIR"
+
+# Response headers needed to replay the body as it was received
+_KEPT_HEADERS = ("content-type", "content-encoding")
+
+
+def _segment_key(request: httpx.Request) -> Tuple[str, str]:
+    """(session, endpoint) directory/file names for a request, made filesystem safe."""
+    session = request.url.params.get("session_key") or "none"
+    endpoint = request.url.path.rstrip("/").rsplit("/", 1)[-1] or "root"
+    return re.sub(r"[^\w.-]", "_", session), re.sub(r"[^\w.-]", "_", endpoint)
+
+
+class SegmentWriter:
+    """Append-only compressed segment plus its timestamp index."""
+
+    def __init__(self, root: str, session: str, endpoint: str):
+        directory = os.path.join(root, session)
+        os.makedirs(directory, exist_ok=True)
+        self.segment_path = os.path.join(directory, f"{endpoint}.seg")
+        self.index_path = os.path.join(directory, f"{endpoint}.idx")
+
+    def append(self, member: bytes, meta: Dict) -> None:
+        with open(self.segment_path, "ab") as segment:
+            offset = segment.seek(0, os.SEEK_END)
+            segment.write(member)
+        with open(self.index_path, "a") as index:
+            index.write(json.dumps({**meta, "offset": offset, "length": len(member)}) + "\n")
+
+
+class _RecordingStream(httpx.AsyncByteStream):
+    """Passes the body through untouched while compressing a copy of it."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, writer: SegmentWriter, meta: Dict):
+        self._stream = stream
+        self._writer = writer
+        self._meta = meta
+        self._compressor = zlib.compressobj(wbits=31)  # gzip container
+        self._parts: List[bytes] = []
+        self._complete = False
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            self._parts.append(self._compressor.compress(chunk))
+            yield chunk
+        self._complete = True
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            # Bodies the caller abandoned half way are not worth replaying
+            if self._complete:
+                self._parts.append(self._compressor.flush())
+                try:
+                    self._writer.append(b"".join(self._parts), self._meta)
+                except OSError as e:
+                    print(f"⚠️ OpenF1 recorder write failed: {e}")
+            self._parts = []
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Wraps the real transport and tees every response body into the archive."""
+
+    def __init__(self, root: str, transport: httpx.AsyncBaseTransport):
+        self.root = root
+        self._transport = transport
+        self._writers: Dict[Tuple[str, str], SegmentWriter] = {}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await self._transport.handle_async_request(request)
+
+        key = _segment_key(request)
+        writer = self._writers.get(key)
+        if writer is None:
+            writer = SegmentWriter(self.root, *key)
+            self._writers[key] = writer
+
+        meta = {
+            "received_at": time.time(),
+            "status": response.status_code,
+            "query": request.url.query.decode("ascii"),
+            "headers": {name: response.headers[name] for name in _KEPT_HEADERS if name in response.headers},
+        }
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_RecordingStream(response.stream, writer, meta),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """
+    Serves recorded responses in the order they were received, per session and
+    endpoint, looping back to the start when a recording runs out. Endpoints
+    that were never recorded answer 404 like OpenF1 does for empty results.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._indexes: Dict[Tuple[str, str], List[Dict]] = {}
+        self._positions: Dict[Tuple[str, str], int] = {}
+
+    def _load_index(self, key: Tuple[str, str]) -> List[Dict]:
+        records = self._indexes.get(key)
+        if records is None:
+            path = os.path.join(self.root, key[0], f"{key[1]}.idx")
+            records = []
+            if os.path.exists(path):
+                with open(path) as index:
+                    records = [json.loads(line) for line in index if line.strip()]
+            self._indexes[key] = records
+        return records
+
+    def read_body(self, key: Tuple[str, str], record: Dict) -> bytes:
+        with open(os.path.join(self.root, key[0], f"{key[1]}.seg"), "rb") as segment:
+            segment.seek(record["offset"])
+            return gzip.decompress(segment.read(record["length"]))
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        key = _segment_key(request)
+        records = self._load_index(key)
+        if not records:
+            return httpx.Response(404, json={"detail": "No results found."}, request=request)
+
+        position = self._positions.get(key, 0)
+        self._positions[key] = (position + 1) % len(records)
+        record = records[position]
+        return httpx.Response(
+            record["status"],
+            headers=record.get("headers", {}),
+            content=self.read_body(key, record),
+            request=request,
+        )
+
+
+def transport_from_env(limits: httpx.Limits, http2: bool = False) -> Optional[httpx.AsyncBaseTransport]:
+    """The transport selected by the environment, or None to use httpx's default."""
+    replay_dir = os.getenv(REPLAY_DIR_ENV)
+    if replay_dir:
+        print(f"📼 Replaying OpenF1 responses from {replay_dir}")
+        return ReplayTransport(replay_dir)
+
+    record_dir = os.getenv(RECORD_DIR_ENV)
+    if record_dir:
+        print(f"📼 Recording OpenF1 responses to {record_dir}")
+        return RecordingTransport(record_dir, httpx.AsyncHTTPTransport(limits=limits, http2=http2))
+    return None
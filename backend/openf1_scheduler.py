@@ -0,0 +1,153 @@
+"""
+SilverWall - OpenF1 Request Scheduler
+Token-bucket budget for outbound OpenF1 calls with priority classes
+
+Every upstream request takes a token first. Higher classes are served
+before lower ones, lower classes leave a reserve of tokens untouched, and a
+request that can't get a token within its class's wait limit is shed, so
+bursts of low-priority traffic can't starve the live telemetry poll.
+"""
+
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from typing import Dict, List
+
+# Priority classes, most important first
+PRIORITY_LIVE = 0        # live telemetry feeds
+PRIORITY_SESSION = 1     # session resolver / status
+PRIORITY_ON_DEMAND = 2   # radio, results
+PRIORITY_BACKGROUND = 3  # track autogen, results backfill
+
+PRIORITY_NAMES = {
+    PRIORITY_LIVE: "live",
+    PRIORITY_SESSION: "session",
+    PRIORITY_ON_DEMAND: "on_demand",
+    PRIORITY_BACKGROUND: "background",
+}
+
+# Share of the burst each class must leave in the bucket for the classes above it
+_RESERVE_FRACTIONS = {
+    PRIORITY_LIVE: 0.0,
+    PRIORITY_SESSION: 0.0,
+    PRIORITY_ON_DEMAND: 0.25,
+    PRIORITY_BACKGROUND: 0.5,
+}
+
+# Longest a request may queue for a token before it is shed (None = never shed)
+_MAX_WAIT_SECONDS = {
+    PRIORITY_LIVE: None,
+    PRIORITY_SESSION: 10.0,
+    PRIORITY_ON_DEMAND: 5.0,
+    PRIORITY_BACKGROUND: 2.0,
+}
+
+
+class RequestShed(Exception):
+    """Raised when a request is dropped because the OpenF1 budget is exhausted."""
+
+
+class RequestScheduler:
+    """
+    Token bucket refilled at `rate` tokens per second up to `burst`, handing
+    tokens to queued callers strictly in priority order (FIFO within a class).
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self._updated = time.monotonic()
+        self._waiters: List[tuple] = []  # heap of (priority, seq, wakeup event)
+        self._seq = itertools.count()
+        self.granted: Dict[int, int] = {priority: 0 for priority in PRIORITY_NAMES}
+        self.shed: Dict[int, int] = {priority: 0 for priority in PRIORITY_NAMES}
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _spare(self, priority: int) -> float:
+        """Tokens this class may spend without eating into a higher class's reserve."""
+        reserve = min(self.burst * _RESERVE_FRACTIONS[priority], self.burst - 1)
+        return self.tokens - reserve
+
+    def _take(self, priority: int) -> None:
+        self.tokens -= 1
+        self.granted[priority] += 1
+
+    def _shed(self, priority: int) -> None:
+        self.shed[priority] += 1
+        raise RequestShed(f"OpenF1 budget exhausted, dropped {PRIORITY_NAMES[priority]} request")
+
+    def try_acquire(self, priority: int = PRIORITY_ON_DEMAND) -> bool:
+        """Take a token only if one is free right now, without queueing for it."""
+        self._refill()
+        if self._spare(priority) >= 1 and not any(waiter[0] <= priority for waiter in self._waiters):
+            self._take(priority)
+            return True
+        return False
+
+    async def acquire(self, priority: int = PRIORITY_ON_DEMAND) -> None:
+        """Wait for a token, or raise RequestShed once the class's wait limit is hit."""
+        if self.try_acquire(priority):
+            return
+
+        max_wait = _MAX_WAIT_SECONDS[priority]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + max_wait if max_wait is not None else None
+
+        entry = (priority, next(self._seq), asyncio.Event())
+        heapq.heappush(self._waiters, entry)
+        try:
+            while True:
+                delay = None  # Not at the head of the queue: wait to be woken
+                if self._waiters[0] is entry:
+                    self._refill()
+                    needed = 1 - self._spare(priority)
+                    if needed <= 0:
+                        self._take(priority)
+                        return
+                    delay = needed / self.rate
+
+                if deadline is not None:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0 or (delay is not None and delay > remaining):
+                        self._shed(priority)
+                    delay = remaining if delay is None else delay
+
+                entry[2].clear()
+                try:
+                    await asyncio.wait_for(entry[2].wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._waiters.remove(entry)
+            heapq.heapify(self._waiters)
+            if self._waiters:
+                self._waiters[0][2].set()
+
+    def stats(self) -> Dict:
+        """Current budget state, for logs and metrics."""
+        self._refill()
+        return {
+            "tokens": round(self.tokens, 2),
+            "rate": self.rate,
+            "burst": self.burst,
+            "waiting": {
+                name: sum(1 for waiter in self._waiters if waiter[0] == priority)
+                for priority, name in PRIORITY_NAMES.items()
+            },
+            "granted": {PRIORITY_NAMES[p]: count for p, count in self.granted.items()},
+            "shed": {PRIORITY_NAMES[p]: count for p, count in self.shed.items()},
+        }
+
+
+def scheduler_from_env() -> RequestScheduler:
+    """Budget sized for OpenF1's free tier unless overridden."""
+    rate = float(os.getenv("OPENF1_REQUESTS_PER_SECOND", "3"))
+    burst = float(os.getenv("OPENF1_REQUEST_BURST", "6"))
+    return RequestScheduler(rate, burst)
@@ -0,0 +1,213 @@
+"""
+SilverWall - OpenF1 Real-Time Broker Connection
+Subscribes to OpenF1's MQTT feed so live samples are pushed instead of polled
+
+Select it with OPENF1_INGEST=mqtt. OpenF1 only serves the broker to
+authenticated users: OPENF1_USERNAME / OPENF1_PASSWORD are exchanged for an
+access token, which is sent as the MQTT password. OPENF1_MQTT_URL overrides
+the broker (mqtts:// for TLS, mqtt:// for plain TCP, e.g. a local stand-in).
+
+Only the small part of MQTT 3.1.1 a QoS 0 subscriber needs is implemented
+(CONNECT, SUBSCRIBE, PUBLISH, PING), so no client library is required.
+"""
+
+import asyncio
+import json
+import os
+import ssl
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+INGEST_ENV = "OPENF1_INGEST"
+MQTT_URL_ENV = "OPENF1_MQTT_URL"
+DEFAULT_MQTT_URL = "mqtts://mqtt.openf1.org:8883"
+
+KEEPALIVE_SECONDS = 30
+# Reconnect backoff: 1s, 2s, 4s ... up to 30s
+RECONNECT_MIN_DELAY = 1.0
+RECONNECT_MAX_DELAY = 30.0
+
+CONNECT, CONNACK, PUBLISH, PUBACK, SUBSCRIBE, SUBACK, PINGREQ, PINGRESP, DISCONNECT = (
+    1, 2, 3, 4, 8, 9, 12, 13, 14
+)
+
+
+class BrokerError(Exception):
+    """The broker refused the connection or broke the protocol."""
+
+
+def push_ingestion_enabled() -> bool:
+    return os.getenv(INGEST_ENV, "poll").lower() == "mqtt"
+
+
+def _encode_length(length: int) -> bytes:
+    encoded = bytearray()
+    while True:
+        byte, length = length % 128, length // 128
+        encoded.append(byte | 0x80 if length else byte)
+        if not length:
+            return bytes(encoded)
+
+
+def _encode_string(value: str) -> bytes:
+    data = value.encode("utf-8")
+    return len(data).to_bytes(2, "big") + data
+
+
+def encode_packet(packet_type: int, flags: int, body: bytes) -> bytes:
+    return bytes([(packet_type << 4) | flags]) + _encode_length(len(body)) + body
+
+
+async def read_packet(reader: asyncio.StreamReader) -> Tuple[int, int, bytes]:
+    """Read one packet as (type, flags, body)."""
+    header = (await reader.readexactly(1))[0]
+    length, multiplier = 0, 1
+    while True:
+        byte = (await reader.readexactly(1))[0]
+        length += (byte & 0x7F) * multiplier
+        if not byte & 0x80:
+            break
+        multiplier *= 128
+    return header >> 4, header & 0x0F, await reader.readexactly(length)
+
+
+def parse_publish(flags: int, body: bytes) -> Tuple[str, Optional[int], bytes]:
+    """(topic, packet id if QoS > 0, payload) of a PUBLISH body."""
+    topic_length = int.from_bytes(body[:2], "big")
+    topic = body[2:2 + topic_length].decode("utf-8")
+    pos = 2 + topic_length
+    packet_id = None
+    if (flags >> 1) & 0x03:
+        packet_id = int.from_bytes(body[pos:pos + 2], "big")
+        pos += 2
+    return topic, packet_id, body[pos:]
+
+
+class BrokerStream:
+    """
+    Keeps one subscription to the broker open, reconnecting with backoff, and
+    hands every decoded JSON message to on_message(topic, data).
+    """
+
+    def __init__(self, url: str, topics: Iterable[str], on_message: Callable[[str, Any], None],
+                 token_provider: Optional[Callable[[], Awaitable[Optional[str]]]] = None,
+                 username: Optional[str] = None, keepalive: int = KEEPALIVE_SECONDS):
+        self.url = urlparse(url)
+        self.topics: List[str] = list(topics)
+        self.on_message = on_message
+        self.token_provider = token_provider
+        self.username = username
+        self.keepalive = keepalive
+        self.connected = False
+        self.messages = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self.connected = False
+
+    async def _run(self) -> None:
+        delay = RECONNECT_MIN_DELAY
+        while True:
+            try:
+                await self._session()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ OpenF1 broker connection lost: {e}")
+            finally:
+                # _session only ever ends by raising; one that got as far as
+                # SUBACK was a working connection, so start backing off afresh
+                if self.connected:
+                    delay = RECONNECT_MIN_DELAY
+                self.connected = False
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+    async def _session(self) -> None:
+        """One connection: connect, subscribe, then read until it drops."""
+        secure = self.url.scheme in ("mqtts", "ssl")
+        reader, writer = await asyncio.open_connection(
+            self.url.hostname, self.url.port or (8883 if secure else 1883),
+            ssl=ssl.create_default_context() if secure else None,
+        )
+        pinger = None
+        try:
+            password = await self.token_provider() if self.token_provider else None
+            writer.write(self._connect_packet(password))
+            packet_type, _, body = await asyncio.wait_for(read_packet(reader), self.keepalive)
+            if packet_type != CONNACK or len(body) < 2 or body[1] != 0:
+                raise BrokerError(f"connection refused (code {body[1] if len(body) > 1 else '?'})")
+
+            writer.write(encode_packet(SUBSCRIBE, 0x02, (1).to_bytes(2, "big") + b"".join(
+                _encode_string(topic) + b"\x00" for topic in self.topics
+            )))
+            await writer.drain()
+            pinger = asyncio.create_task(self._ping(writer))
+
+            while True:
+                # The broker answers our pings, so silence past two keepalives means it's gone
+                packet_type, flags, body = await asyncio.wait_for(read_packet(reader), self.keepalive * 2)
+                if packet_type == SUBACK:
+                    self.connected = True
+                    print(f"📡 Subscribed to OpenF1 broker: {', '.join(self.topics)}")
+                elif packet_type == PUBLISH:
+                    topic, packet_id, payload = parse_publish(flags, body)
+                    if packet_id is not None:
+                        writer.write(encode_packet(PUBACK, 0, packet_id.to_bytes(2, "big")))
+                    self._dispatch(topic, payload)
+        finally:
+            if pinger is not None:
+                pinger.cancel()
+            writer.close()
+
+    def _connect_packet(self, password: Optional[str]) -> bytes:
+        flags = 0x02  # Clean session
+        payload = _encode_string(f"silverwall-{uuid.uuid4().hex[:12]}")
+        if password is not None:
+            flags |= 0x80 | 0x40
+            payload += _encode_string(self.username or "silverwall") + _encode_string(password)
+        body = _encode_string("MQTT") + bytes([4, flags]) + self.keepalive.to_bytes(2, "big") + payload
+        return encode_packet(CONNECT, 0, body)
+
+    async def _ping(self, writer: asyncio.StreamWriter) -> None:
+        while True:
+            await asyncio.sleep(self.keepalive / 2)
+            writer.write(encode_packet(PINGREQ, 0, b""))
+            await writer.drain()
+
+    def _dispatch(self, topic: str, payload: bytes) -> None:
+        try:
+            data = json.loads(payload)
+        except ValueError:
+            return
+        self.messages += 1
+        try:
+            self.on_message(topic, data)
+        except Exception as e:
+            print(f"⚠️ Error handling OpenF1 {topic} message: {e}")
+
+    def stats(self) -> Dict:
+        return {"connected": self.connected, "messages": self.messages, "topics": self.topics}
+
+
+def stream_from_env(topics: Iterable[str], on_message: Callable[[str, Any], None],
+                    token_provider: Optional[Callable[[], Awaitable[Optional[str]]]] = None) -> Optional[BrokerStream]:
+    """A broker stream if OPENF1_INGEST=mqtt, else None (REST polling only)."""
+    if not push_ingestion_enabled():
+        return None
+    return BrokerStream(
+        os.getenv(MQTT_URL_ENV, DEFAULT_MQTT_URL), topics, on_message,
+        token_provider=token_provider, username=os.getenv("OPENF1_USERNAME"),
+    )
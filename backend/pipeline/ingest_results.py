@@ -5,33 +5,38 @@ and updating standings in Supabase.
 """
 
 import asyncio
-import httpx
 from database import finalize_race_status
+from openf1_fetcher import openf1_get, openf1_get_columns, close_http_client
+from openf1_scheduler import PRIORITY_BACKGROUND
 from spacetimedb import call_reducer, execute_sql
-
-OPENF1_API = "https://api.openf1.org/v1"
+import spacetimedb
 
 async def fetch_session_order(session_key: int):
     """Fetch final position order from OpenF1"""
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(f"{OPENF1_API}/session_result", params={"session_key": session_key})
-            if response.status_code == 200:
-                data = response.json()
-                if data:
-                    return sorted(data, key=lambda x: x.get("position", 999))
+        data = await openf1_get("session_result", {"session_key": session_key}, priority=PRIORITY_BACKGROUND)
+        if data:
+            return sorted(data, key=lambda x: x.get("position", 999))
 
-            # Older sessions can lag behind official publication, so keep the
-            # previous position-derived path as a compatibility fallback.
-            response = await client.get(f"{OPENF1_API}/position", params={"session_key": session_key})
-            if response.status_code == 200:
-                data = response.json()
-                latest = {}
-                for entry in data:
-                    d_num = entry.get("driver_number")
-                    if d_num and (d_num not in latest or entry.get("date", "") > latest[d_num].get("date", "")):
-                        latest[d_num] = entry
-                return sorted(latest.values(), key=lambda x: x.get("position", 999))
+        # Older sessions can lag behind official publication, so keep the
+        # previous position-derived path as a compatibility fallback.
+        # The whole session's position history is a bulk pull: decode just the
+        # three columns we need from OpenF1's CSV output
+        data = await openf1_get_columns(
+            "position", {"session_key": session_key},
+            {"date": "q", "driver_number": "H", "position": "H"},
+            priority=PRIORITY_BACKGROUND
+        )
+        if data is not None:
+            latest = {}  # driver -> (date, position)
+            for date, d_num, position in zip(data["date"], data["driver_number"], data["position"]):
+                if d_num and (d_num not in latest or date > latest[d_num][0]):
+                    latest[d_num] = (date, position)
+            order = [
+                {"driver_number": d_num, "position": position or None}
+                for d_num, (_, position) in latest.items()
+            ]
+            return sorted(order, key=lambda x: x["position"] or 999)
     except Exception as e:
         print(f"Error fetching session order: {e}")
     return []
@@ -39,10 +44,9 @@ async def fetch_session_order(session_key: int):
 async def fetch_driver_metadata(session_key: int):
     """Fetch driver details from OpenF1"""
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(f"{OPENF1_API}/drivers", params={"session_key": session_key})
-            if response.status_code == 200:
-                return {d["driver_number"]: d for d in response.json()}
+        data = await openf1_get("drivers", {"session_key": session_key}, priority=PRIORITY_BACKGROUND)
+        if data is not None:
+            return {d["driver_number"]: d for d in data}
     except:
         pass
     return {}
@@ -97,10 +101,17 @@ async def ingest_race_results(race_uuid: str, session_key: int):
         # In a real production scenario, we'd trigger a standings recalculation here
         print("🚀 Standings update triggered.")
 
+async def _run_once(race_uuid: str, session_key: int):
+    try:
+        await ingest_race_results(race_uuid, session_key)
+    finally:
+        await close_http_client()
+        await spacetimedb.close_http_client()
+
 if __name__ == "__main__":
     # Example usage (would be called by a trigger or command)
     import sys
     if len(sys.argv) > 2:
-        asyncio.run(ingest_race_results(sys.argv[1], int(sys.argv[2])))
+        asyncio.run(_run_once(sys.argv[1], int(sys.argv[2])))
     else:
         print("Usage: python ingest_results.py <race_uuid> <session_key>")
@@ -0,0 +1,99 @@
+"""
+SilverWall - Live Playout Delay
+Measures how far OpenF1 samples arrive behind real time and picks the delay
+live frames are played out at, so cars from every feed are shown at one
+common, steadily advancing instant
+"""
+
+from collections import deque
+from typing import Deque, Dict, Optional
+
+# Used until the first sample of a session has been measured
+DEFAULT_DELAY_MS = 4000
+MIN_DELAY_MS = 1000
+MAX_DELAY_MS = 20000
+
+# Larger lags aren't live data (e.g. an explicit historical session_key) and are ignored
+MAX_LAG_MS = 60000
+
+# The delay covers this quantile of the recent lags, plus headroom for the
+# location feed's 2s poll, so there is normally a sample either side of the
+# playout clock
+LAG_WINDOW = 240
+LAG_QUANTILE = 0.95
+PLAYOUT_MARGIN_MS = 2500
+
+# How fast the delay may move (ms per second of wall time). Both are below
+# 1000, so the playout clock never runs backwards: it slows down a little while
+# the delay grows and speeds up slightly while it shrinks.
+DELAY_RISE_RATE = 500
+DELAY_FALL_RATE = 100
+
+# Format: { session_key: DelayEstimator }
+_estimators: Dict[int, "DelayEstimator"] = {}
+_ESTIMATORS_MAX_SIZE = 2
+
+
+class DelayEstimator:
+    """
+    Rolling window of upstream lags (arrival time minus the sample's OpenF1
+    `date`) for one session, and the playout delay derived from them.
+    """
+
+    def __init__(self, window: int = LAG_WINDOW):
+        self.lags: Deque[int] = deque(maxlen=window)
+        self.delay: Optional[float] = None
+        self.updated_ms = 0
+
+    def observe(self, lag_ms: int, at_ms: int) -> None:
+        """Record one sample's lag, measured at wall-clock time at_ms."""
+        if lag_ms > MAX_LAG_MS:
+            return
+        self.lags.append(max(lag_ms, 0))  # Clock skew can make fresh samples look early
+
+        target = min(max(self.quantile(LAG_QUANTILE) + PLAYOUT_MARGIN_MS, MIN_DELAY_MS), MAX_DELAY_MS)
+        if self.delay is None:
+            self.delay = target
+        else:
+            elapsed = max(at_ms - self.updated_ms, 0) / 1000
+            if target > self.delay:
+                self.delay = min(target, self.delay + DELAY_RISE_RATE * elapsed)
+            else:
+                self.delay = max(target, self.delay - DELAY_FALL_RATE * elapsed)
+        self.updated_ms = at_ms
+
+    def quantile(self, q: float) -> int:
+        if not self.lags:
+            return 0
+        ordered = sorted(self.lags)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+    def delay_ms(self) -> int:
+        return int(self.delay) if self.delay is not None else DEFAULT_DELAY_MS
+
+    def stats(self) -> Dict:
+        """Freshness summary: median and p95 upstream lag and the current delay."""
+        return {
+            "samples": len(self.lags),
+            "lag_p50_ms": self.quantile(0.5),
+            "lag_p95_ms": self.quantile(0.95),
+            "delay_ms": self.delay_ms(),
+        }
+
+
+def get_estimator(session_key: int) -> DelayEstimator:
+    """Get (or create) the delay estimator for a session, keeping only the most recently used few."""
+    estimator = _estimators.pop(session_key, None)
+    if estimator is None:
+        while len(_estimators) >= _ESTIMATORS_MAX_SIZE:
+            del _estimators[next(iter(_estimators))]
+        estimator = DelayEstimator()
+    # Reinserted on every use, so the first key is always the least recently used
+    _estimators[session_key] = estimator
+    return estimator
+
+
+def playout_delay_ms(session_key: Optional[int]) -> int:
+    """The current playout delay for a session (DEFAULT_DELAY_MS if nothing was measured)."""
+    estimator = _estimators.get(session_key)
+    return estimator.delay_ms() if estimator is not None else DEFAULT_DELAY_MS
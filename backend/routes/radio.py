@@ -6,13 +6,11 @@ Fetches team radio messages from OpenF1 API
 from fastapi import APIRouter, Request
 from datetime import datetime, timezone
 from typing import List, Optional
-import httpx
 from limiter import limiter
+from openf1_fetcher import openf1_get
 
 router = APIRouter()
 
-OPENF1_API = "https://api.openf1.org/v1"
-
 # Driver code to name mapping
 DRIVER_NAMES = {
     "HAM": "Lewis Hamilton",
@@ -41,15 +39,10 @@ DRIVER_NAMES = {
 async def fetch_radio_from_openf1(session_key: str = "latest", limit: int = 10):
     """Fetch team radio from OpenF1 API"""
     try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            response = await client.get(
-                f"{OPENF1_API}/team_radio",
-                params={"session_key": session_key}
-            )
-            if response.status_code == 200:
-                data = response.json()
-                # Return latest messages
-                return data[-limit:] if len(data) > limit else data
+        data = await openf1_get("team_radio", {"session_key": session_key})
+        if data is not None:
+            # Return latest messages
+            return data[-limit:] if len(data) > limit else data
     except Exception as e:
         print(f"Error fetching radio: {e}")
     return []
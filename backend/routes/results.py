@@ -6,14 +6,12 @@ Fetches race results from OpenF1 for podium display
 from fastapi import APIRouter, Request
 from datetime import datetime, timezone
 from typing import List, Optional
-import httpx
 from database import get_last_race, get_current_season_year
 from limiter import limiter
+from openf1_fetcher import openf1_get, get_current_session
 
 router = APIRouter()
 
-OPENF1_API = "https://api.openf1.org/v1"
-
 # Driver info mapping
 DRIVERS = {
     1: {"code": "VER", "name": "Max Verstappen", "team": "Red Bull Racing", "color": "#3671C6"},
@@ -44,52 +42,40 @@ DRIVERS = {
 async def fetch_race_results_from_openf1(session_key: str = "latest"):
     """Fetch race results from OpenF1 API - ONLY for actual race sessions"""
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            # First check if the latest session is actually a RACE (not qualifying, FP, etc.)
-            session_resp = await client.get(
-                f"{OPENF1_API}/sessions",
-                params={"session_key": session_key}
-            )
-            if session_resp.status_code == 200:
-                sessions = session_resp.json()
-                if sessions:
-                    session = sessions[0]
-                    session_type = session.get("session_type", "").lower()
-                    session_name = session.get("session_name", "").lower()
-                    
-                    # Only show results for actual race sessions
-                    if "race" not in session_type and "race" not in session_name:
-                        print(f"⚠️ Latest session is {session.get('session_name')}, not Race - skipping results")
-                        return []
-                    
-                    # Check if race has ended (has date_end)
-                    if session.get("date_end") is None:
-                        print(f"🏎️ Race session is LIVE - no final results yet")
-                        return []
+        # First check if the latest session is actually a RACE (not qualifying, FP, etc.)
+        if session_key == "latest":
+            session = await get_current_session()
+        else:
+            sessions = await openf1_get("sessions", {"session_key": session_key})
+            session = sessions[0] if sessions else None
+        if session:
+            session_type = session.get("session_type", "").lower()
+            session_name = session.get("session_name", "").lower()
+            
+            # Only show results for actual race sessions
+            if "race" not in session_type and "race" not in session_name:
+                print(f"⚠️ Latest session is {session.get('session_name')}, not Race - skipping results")
+                return []
             
-            # Get final positions for race
-            response = await client.get(
-                f"{OPENF1_API}/session_result",
-                params={"session_key": session_key}
-            )
-            if response.status_code == 200:
-                data = response.json()
-                if data:
-                    return sorted(data, key=lambda x: x.get("position", 999))
+            # Check if race has ended (has date_end)
+            if session.get("date_end") is None:
+                print(f"🏎️ Race session is LIVE - no final results yet")
+                return []
+        
+        # Get final positions for race
+        data = await openf1_get("session_result", {"session_key": session_key})
+        if data:
+            return sorted(data, key=lambda x: x.get("position", 999))
 
-            # Fallback for older sessions where session_result is not populated yet.
-            response = await client.get(
-                f"{OPENF1_API}/position",
-                params={"session_key": session_key}
-            )
-            if response.status_code == 200:
-                data = response.json()
-                latest = {}
-                for entry in data:
-                    driver_num = entry.get("driver_number")
-                    if driver_num and (driver_num not in latest or entry.get("date", "") > latest[driver_num].get("date", "")):
-                        latest[driver_num] = entry
-                return sorted(latest.values(), key=lambda x: x.get("position", 999))
+        # Fallback for older sessions where session_result is not populated yet.
+        data = await openf1_get("position", {"session_key": session_key})
+        if data is not None:
+            latest = {}
+            for entry in data:
+                driver_num = entry.get("driver_number")
+                if driver_num and (driver_num not in latest or entry.get("date", "") > latest[driver_num].get("date", "")):
+                    latest[driver_num] = entry
+            return sorted(latest.values(), key=lambda x: x.get("position", 999))
     except Exception as e:
         print(f"Error fetching results: {e}")
     return []
@@ -5,28 +5,20 @@ Provides race countdown, status, and leaderboard endpoints driven by SpacetimeDB
 
 from fastapi import APIRouter
 from datetime import datetime, timezone, timedelta
-import httpx
 from database import get_next_race, get_current_season, execute_sql, get_last_race
 from logger import logger
 from limiter import limiter
 from fastapi import Request
-from openf1_fetcher import is_session_in_live_window
+from openf1_fetcher import get_current_session, fetch_live_telemetry
 
 router = APIRouter()
 
-OPENF1_API = "https://api.openf1.org/v1"
-
 async def fetch_live_session():
     """Check if there's an active session on OpenF1"""
     try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            response = await client.get(f"{OPENF1_API}/sessions", params={"session_key": "latest"})
-            if response.status_code == 200:
-                data = response.json()
-                if data:
-                    session = data[0]
-                    if is_session_in_live_window(session):
-                        return session
+        session = await get_current_session()
+        if session and session["in_live_window"]:
+            return session
     except Exception as e:
         logger.error(f"Live session fetch failed: {e}")
     return None
@@ -120,25 +112,19 @@ async def get_leaderboard(request: Request):
     """
     Returns current leaderboard from live session or DB final results
     """
-    # 1. Try Live
+    # 1. Try Live - read the shared telemetry snapshot so concurrent callers
+    # (and the /ws/live hub) all reuse one set of OpenF1 requests
     try:
-        async with httpx.AsyncClient(timeout=3.0) as client:
-            response = await client.get(f"{OPENF1_API}/position", params={"session_key": "latest"})
-            if response.status_code == 200:
-                data = response.json()
-                if data:
-                    latest = {}
-                    for item in data:
-                        driver = item.get("driver_number")
-                        if driver not in latest:
-                            latest[driver] = item
-                    
-                    sorted_drivers = sorted(latest.values(), key=lambda x: x.get("position", 99))
-                    return {
-                        "source": "live",
-                        "drivers": [{"position": d.get("position"), "driver_number": d.get("driver_number")} for d in sorted_drivers[:20]]
-                    }
-    except:
+        snapshot = await fetch_live_telemetry()
+        if snapshot.get("status") == "live" and snapshot.get("cars"):
+            return {
+                "source": "live",
+                "drivers": [
+                    {"position": car.get("position"), "driver_number": car.get("driver_number")}
+                    for car in snapshot["cars"][:20]
+                ]
+            }
+    except Exception:
         pass
     
     # 2. Fallback to Last Race Results from DB
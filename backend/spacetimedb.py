@@ -3,10 +3,39 @@ import json
 import os
 from typing import Any, Dict, List, Optional
 from logger import logger
+from upstream import http2_enabled, prewarm
 
 SPACETIME_DB_NAME = "spacetimedb-uorks"
 SPACETIME_BASE_URL = f"https://maincloud.spacetimedb.com/api/v1/database/{SPACETIME_DB_NAME}"
 
+# Module-level HTTP client so queries reuse one warm connection
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+async def get_http_client() -> httpx.AsyncClient:
+    """Get or create the shared SpacetimeDB client."""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            timeout=15.0,
+            http2=http2_enabled(),
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)
+        )
+    return _http_client
+
+
+async def close_http_client():
+    """Close the shared SpacetimeDB client. Called on shutdown."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+async def prewarm_http_client() -> bool:
+    """Open the SpacetimeDB connection at startup so the first query skips the handshake."""
+    return await prewarm(await get_http_client(), SPACETIME_BASE_URL)
+
 # We can optionally use a SPACETIME_TOKEN if it's set in the environment
 def _get_headers():
     token = os.getenv("SPACETIME_TOKEN")
@@ -23,27 +52,27 @@ async def execute_sql(sql: str) -> List[Dict[str, Any]]:
     payload = {"sql": sql}
 
     try:
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            response = await client.post(url, json=payload, headers=_get_headers())
+        client = await get_http_client()
+        response = await client.post(url, json=payload, headers=_get_headers())
 
-            # The sentinel script says: Maincloud returns 403 without valid auth,
-            # but this confirms the server is up and responsive.
-            # If we don't have auth, we might just get 403. Let's handle 200 properly.
-            if response.status_code == 200:
-                data = response.json()
-                # If it's a list, return it
-                if isinstance(data, list):
-                    return data
-                # Sometimes it might be {"results": [...] } or similar.
-                if isinstance(data, dict):
-                    if "rows" in data and isinstance(data["rows"], list):
-                        return data["rows"]
-                    elif "results" in data and isinstance(data["results"], list):
-                        return data["results"]
-                    return []
-            else:
-                logger.error(f"SpacetimeDB SQL error HTTP {response.status_code}: {response.text}")
-            return []
+        # The sentinel script says: Maincloud returns 403 without valid auth,
+        # but this confirms the server is up and responsive.
+        # If we don't have auth, we might just get 403. Let's handle 200 properly.
+        if response.status_code == 200:
+            data = response.json()
+            # If it's a list, return it
+            if isinstance(data, list):
+                return data
+            # Sometimes it might be {"results": [...] } or similar.
+            if isinstance(data, dict):
+                if "rows" in data and isinstance(data["rows"], list):
+                    return data["rows"]
+                elif "results" in data and isinstance(data["results"], list):
+                    return data["results"]
+                return []
+        else:
+            logger.error(f"SpacetimeDB SQL error HTTP {response.status_code}: {response.text}")
+        return []
     except Exception as e:
         logger.error(f"SpacetimeDB SQL error ({sql}): {e}")
         return []
@@ -59,13 +88,13 @@ async def call_reducer(reducer_name: str, args: List[Any] = None) -> bool:
     payload = {"args": args}
 
     try:
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            response = await client.post(url, json=payload, headers=_get_headers())
-            if response.status_code == 200:
-                return True
-            else:
-                logger.error(f"SpacetimeDB Reducer error HTTP {response.status_code}: {response.text}")
-                return False
+        client = await get_http_client()
+        response = await client.post(url, json=payload, headers=_get_headers())
+        if response.status_code == 200:
+            return True
+        else:
+            logger.error(f"SpacetimeDB Reducer error HTTP {response.status_code}: {response.text}")
+            return False
     except Exception as e:
         logger.error(f"SpacetimeDB Reducer error ({reducer_name}): {e}")
         return False
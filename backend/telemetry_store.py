@@ -0,0 +1,183 @@
+"""
+SilverWall - In-Process Telemetry History
+Fixed-capacity, array-backed ring buffers of car positions per driver
+"""
+
+import time
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+# ~2h of OpenF1 location samples (~3.7 Hz) per car. At 20 bytes per sample
+# (int64 epoch ms + float32 x/y/z) a full 20-car race is about 12 MB.
+DEFAULT_CAPACITY = 30000
+
+# Format: { session_key: TelemetryStore }
+_stores: Dict[int, "TelemetryStore"] = {}
+_STORES_MAX_SIZE = 2
+
+
+class DriverRing:
+    """
+    Columnar ring buffer for one car: parallel typed arrays of timestamps and
+    coordinates. Appends are O(1); once full, the oldest sample is overwritten.
+    """
+
+    __slots__ = ("capacity", "t", "x", "y", "z", "start", "size")
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.t = array("q", bytes(8 * capacity))  # epoch ms
+        self.x = array("f", bytes(4 * capacity))
+        self.y = array("f", bytes(4 * capacity))
+        self.z = array("f", bytes(4 * capacity))
+        self.start = 0
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _physical(self, i: int) -> int:
+        return (self.start + i) % self.capacity
+
+    def last_time(self) -> Optional[int]:
+        return self.t[self._physical(self.size - 1)] if self.size else None
+
+    def append(self, t_ms: int, x: float, y: float, z: float) -> bool:
+        """
+        Add a sample. Samples not newer than the last one are ignored, so the
+        overlapping re-reads of an incremental poll never create duplicates.
+        """
+        if self.size and t_ms <= self.t[self._physical(self.size - 1)]:
+            return False
+        if self.size < self.capacity:
+            i = self._physical(self.size)
+            self.size += 1
+        else:
+            i = self.start
+            self.start = (self.start + 1) % self.capacity
+        self.t[i] = t_ms
+        self.x[i] = x
+        self.y[i] = y
+        self.z[i] = z
+        return True
+
+    def _bisect(self, t_ms: int) -> int:
+        """Logical index of the first sample at or after t_ms."""
+        lo, hi = 0, self.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.t[self._physical(mid)] < t_ms:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _slice(self, column: array, lo: int, hi: int) -> array:
+        """Copy logical range [lo, hi) out of a column, handling wrap-around."""
+        begin, end = self._physical(lo), self._physical(hi)
+        if hi - lo <= 0:
+            return column[0:0]
+        if begin < end:
+            return column[begin:end]
+        return column[begin:] + column[:end]
+
+    def bracket(self, t_ms: int) -> Tuple[int, int]:
+        """
+        Physical indices of the samples either side of t_ms. Outside the
+        buffered range both indices point at the nearest end sample.
+        """
+        i = self._bisect(t_ms)
+        if i == 0:
+            first = self._physical(0)
+            return first, first
+        if i == self.size:
+            last = self._physical(self.size - 1)
+            return last, last
+        return self._physical(i - 1), self._physical(i)
+
+    def window(self, start_ms: int, end_ms: int) -> Tuple[array, array, array, array]:
+        """Samples with start_ms <= t < end_ms as (t, x, y, z) typed arrays."""
+        lo, hi = self._bisect(start_ms), self._bisect(end_ms)
+        return tuple(self._slice(column, lo, hi) for column in (self.t, self.x, self.y, self.z))
+
+    def tail(self, n: int) -> Tuple[array, array, array, array]:
+        """The last n samples (fewer if the buffer holds less)."""
+        lo = max(0, self.size - n)
+        return tuple(self._slice(column, lo, self.size) for column in (self.t, self.x, self.y, self.z))
+
+
+class TelemetryStore:
+    """Per-session position history keyed by driver number."""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.drivers: Dict[int, DriverRing] = {}
+
+    def append(self, driver_number: int, t_ms: int, x: float, y: float, z: float) -> bool:
+        ring = self.drivers.get(driver_number)
+        if ring is None:
+            ring = DriverRing(self.capacity)
+            self.drivers[driver_number] = ring
+        return ring.append(t_ms, x, y, z)
+
+    def window(self, driver_number: int, start_ms: int, end_ms: int) -> Optional[Tuple[array, array, array, array]]:
+        ring = self.drivers.get(driver_number)
+        return ring.window(start_ms, end_ms) if ring is not None else None
+
+    def interpolate(self, t_ms: int) -> Tuple[List[int], array, array, array]:
+        """
+        Every car's position at t_ms, linearly interpolated between the two
+        samples around it (held at the first/last sample outside the buffer).
+        Each car costs one bisect of its ring. Returns (drivers, xs, ys, zs).
+        """
+        drivers, xs, ys, zs = [], array("f"), array("f"), array("f")
+        for driver, ring in self.drivers.items():
+            if not ring.size:
+                continue
+            a, b = ring.bracket(t_ms)
+            start, end = ring.t[a], ring.t[b]
+            w = (t_ms - start) / (end - start) if end > start else 1.0
+            drivers.append(driver)
+            xs.append(ring.x[a] + (ring.x[b] - ring.x[a]) * w)
+            ys.append(ring.y[a] + (ring.y[b] - ring.y[a]) * w)
+            zs.append(ring.z[a] + (ring.z[b] - ring.z[a]) * w)
+        return drivers, xs, ys, zs
+
+    def nbytes(self) -> int:
+        """Memory held by the column arrays."""
+        return sum(
+            column.itemsize * len(column)
+            for ring in self.drivers.values()
+            for column in (ring.t, ring.x, ring.y, ring.z)
+        )
+
+
+def get_store(session_key: int) -> TelemetryStore:
+    """Get (or create) the history store for a session, keeping only the most recently used few."""
+    store = _stores.pop(session_key, None)
+    if store is None:
+        while len(_stores) >= _STORES_MAX_SIZE:
+            del _stores[next(iter(_stores))]
+        store = TelemetryStore()
+    # Reinserted on every use, so the first key is always the least recently used
+    _stores[session_key] = store
+    return store
+
+
+def find_store(session_key: Optional[int]) -> Optional[TelemetryStore]:
+    """The history store for a session if one has been recorded, without creating it."""
+    return _stores.get(session_key)
+
+
+def now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def recent_positions(session_key: int, seconds: float) -> Dict[int, Tuple[array, array, array, array]]:
+    """Every driver's samples from the last `seconds` seconds, e.g. for trails."""
+    store = _stores.get(session_key)
+    if store is None:
+        return {}
+    end = now_ms() + 1
+    start = end - int(seconds * 1000)
+    return {driver: ring.window(start, end) for driver, ring in store.drivers.items()}
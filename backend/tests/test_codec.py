@@ -0,0 +1,122 @@
+"""
+SilverWall Backend - Unit Tests for the Binary Telemetry Codec
+Tests the struct layouts and dictionary frames used by binary WebSocket clients.
+"""
+import unittest
+import json
+import struct
+import sys
+import os
+
+# Add backend to path to import the websocket package
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from websocket.codec import (
+    LiveBinaryEncoder, ReplayBinaryEncoder, pack_positions, pack_heartbeat, HEARTBEAT, FRAME_HEARTBEAT,
+    FRAME_DICTIONARY, FRAME_LIVE, LIVE_HEADER, LIVE_CAR, REPLAY_HEADER, REPLAY_CAR,
+    FRAME_POSITIONS, POSITIONS_HEADER, POSITIONS_CAR,
+    TYRE_COMPOUNDS, COORD_SCALE, GAP_UNKNOWN,
+)
+
+
+PAYLOAD = {
+    "status": "live",
+    "session_key": 9158,
+    "timestamp": "2024-01-01T12:00:01+00:00",
+    "cars": [
+        {"position": 1, "driver_number": 1, "code": "VER", "team": "Red Bull", "color": "3671C6",
+         "x": -1234, "y": 5678, "z": 12, "gap": "LEADER", "interval": None, "tyre": "HARD", "tyre_age": 5},
+        {"position": 2, "driver_number": 44, "code": "HAM", "team": "Ferrari", "color": "E8002D",
+         "x": 4001, "y": -20, "z": 0, "gap": "+5.5s", "interval": 5.5, "tyre": "MEDIUM", "tyre_age": 8},
+        {"position": 3, "driver_number": 2, "code": "SAR", "team": "Williams", "color": "64C4FF",
+         "x": 0, "y": 0, "z": 0, "gap": "++1 LAPs", "interval": "+1 LAP", "tyre": "C6", "tyre_age": 0},
+    ],
+}
+
+
+class TestLiveBinaryEncoder(unittest.TestCase):
+    """Test the /ws/live binary frame layout"""
+
+    def test_frame_round_trip(self):
+        """Test that a packed frame decodes back to the quantized car values"""
+        encoder = LiveBinaryEncoder()
+        encoder.update_dictionary(PAYLOAD)
+        frame = encoder.encode_frame(7, PAYLOAD)
+
+        layout = struct.Struct(LIVE_HEADER + LIVE_CAR * 3)
+        self.assertEqual(len(frame), layout.size)
+        values = layout.unpack(frame)
+
+        frame_type, seq, timestamp_ms, status, count = values[:5]
+        self.assertEqual((frame_type, seq, count), (FRAME_LIVE, 7, 3))
+        self.assertEqual(timestamp_ms, 1704110401000)
+
+        ver, ham, sar = (values[5 + i * 10:15 + i * 10] for i in range(3))
+        self.assertEqual(ver[0], 1)
+        self.assertEqual(ver[3], TYRE_COMPOUNDS.index("HARD"))
+        self.assertEqual(ver[5:7], (-1234 // COORD_SCALE, 5678 // COORD_SCALE))
+        self.assertEqual(ver[8:], (0, GAP_UNKNOWN))
+        self.assertEqual(ham[8:], (5500, 5500))
+        self.assertEqual(sar[3], 0)  # Unknown compound
+        self.assertEqual(sar[8:], (-2, -2))  # One lap down
+
+    def test_dictionary_only_when_changed(self):
+        """Test that the dictionary is rebuilt only for new drivers or sessions"""
+        encoder = LiveBinaryEncoder()
+        self.assertTrue(encoder.update_dictionary(PAYLOAD))
+        self.assertFalse(encoder.update_dictionary(PAYLOAD))
+
+        dictionary = encoder.dictionary()
+        self.assertEqual(dictionary[0], FRAME_DICTIONARY)
+        body = json.loads(dictionary[1:])
+        self.assertEqual(body["drivers"]["44"]["code"], "HAM")
+        self.assertEqual(body["teams"], ["Red Bull", "Ferrari", "Williams"])
+
+        self.assertTrue(encoder.update_dictionary({**PAYLOAD, "session_key": 9159}))
+
+    def test_binary_is_smaller_than_json(self):
+        """Test that the struct frame is several times smaller than the JSON payload"""
+        encoder = LiveBinaryEncoder()
+        frame = encoder.encode_frame(1, PAYLOAD)
+        self.assertLess(len(frame) * 4, len(json.dumps(PAYLOAD)))
+
+
+class TestReplayBinaryEncoder(unittest.TestCase):
+    """Test the /ws/monza binary frame layout"""
+
+    def test_replay_frame(self):
+        """Test that normalized replay coordinates are packed as uint16"""
+        frame = {"t": 1.5, "cars": [
+            {"num": 44, "code": "HAM", "team": "Mercedes", "x": 0.5, "y": 1.0,
+             "speed": 310, "gear": 8, "drs": True, "throttle": 98, "brake": 0},
+        ]}
+        encoder = ReplayBinaryEncoder()
+        self.assertIn(b'"HAM"', encoder.dictionary(frame))
+
+        values = struct.unpack(REPLAY_HEADER + REPLAY_CAR, encoder.encode_frame(3, frame))
+        self.assertEqual(values[1:4], (3, 1500, 1))
+        self.assertEqual(values[4:], (44, 0, 32768, 65535, 310, 8, 1, 98, 0))
+
+
+class TestPositionsFrame(unittest.TestCase):
+    """Test the interpolated positions layout"""
+
+    def test_positions_frame(self):
+        """Test that an interpolation tick packs 7 bytes per car"""
+        frame = pack_positions(12, 1700000000000, [1, 44], [100.0, -4000.0], [200.0, 10.0], [0.0, 4.0])
+
+        self.assertEqual(len(frame), 14 + 2 * 7)
+        values = struct.unpack(POSITIONS_HEADER + POSITIONS_CAR * 2, frame)
+        self.assertEqual(values[:4], (FRAME_POSITIONS, 12, 1700000000000, 2))
+        self.assertEqual(values[4:8], (1, 100 // COORD_SCALE, 200 // COORD_SCALE, 0))
+        self.assertEqual(values[8:], (44, -4000 // COORD_SCALE, 10 // COORD_SCALE, 4 // COORD_SCALE))
+
+    def test_heartbeat_frame(self):
+        """Test that a heartbeat is just the header"""
+        frame = pack_heartbeat(7, 1700000000000)
+        self.assertEqual(len(frame), 13)
+        self.assertEqual(HEARTBEAT.unpack(frame), (FRAME_HEARTBEAT, 7, 1700000000000))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,180 @@
+"""
+SilverWall Backend - Unit Tests for OpenF1 Request Hedging
+Tests hedged GETs against a local stand-in server that injects slow responses.
+"""
+import unittest
+import asyncio
+import json
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from openf1_hedging import RequestHedger
+
+
+class SlowServer:
+    """Local stand-in for OpenF1: answers GETs with JSON after a scripted delay"""
+
+    def __init__(self, delays):
+        self.delays = list(delays)
+        self.requests = 0
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle(self, reader, writer):
+        await reader.readuntil(b"\r\n\r\n")
+        index = self.requests
+        self.requests += 1
+        try:
+            await asyncio.sleep(self.delays[index] if index < len(self.delays) else 0)
+            body = json.dumps([{"request": index}]).encode()
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                b"Content-Length: " + str(len(body)).encode() + b"\r\nConnection: close\r\n\r\n" + body
+            )
+            await writer.drain()
+        except (asyncio.CancelledError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def get(self):
+        """Minimal HTTP/1.1 GET against the stand-in; returns the decoded body"""
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        try:
+            writer.write(b"GET /v1/location HTTP/1.1\r\nHost: localhost\r\n\r\n")
+            await writer.drain()
+            response = await reader.read()
+            return json.loads(response.split(b"\r\n\r\n", 1)[1])
+        finally:
+            writer.close()
+
+
+class TestRequestHedger(unittest.IsolatedAsyncioTestCase):
+    """Test hedging decisions and the hedge budget"""
+
+    def warmed_hedger(self, latency=0.01, samples=20, budget=1.0):
+        hedger = RequestHedger(budget=budget, min_samples=samples)
+        for _ in range(samples):
+            hedger.record("location", latency)
+        return hedger
+
+    async def test_no_hedge_until_latency_known(self):
+        """Test that requests aren't duplicated before the endpoint's p90 is known"""
+        server = SlowServer([0.2])
+        await server.start()
+        hedger = RequestHedger(budget=1.0)
+
+        result = await hedger.call("location", server.get)
+        await server.stop()
+
+        self.assertEqual(result, [{"request": 0}])
+        self.assertEqual(server.requests, 1)
+        self.assertEqual(hedger.hedged, 0)
+
+    async def test_slow_request_is_hedged(self):
+        """Test that a request stuck past the p90 is raced against a duplicate"""
+        server = SlowServer([1.0, 0.0])
+        await server.start()
+        hedger = self.warmed_hedger()
+
+        start = asyncio.get_running_loop().time()
+        result = await hedger.call("location", server.get)
+        elapsed = asyncio.get_running_loop().time() - start
+        await server.stop()
+
+        self.assertEqual(result, [{"request": 1}])
+        self.assertLess(elapsed, 0.5)
+        self.assertEqual((hedger.hedged, hedger.hedge_wins), (1, 1))
+
+    async def test_fast_request_not_hedged(self):
+        """Test that requests finishing inside the p90 are sent once"""
+        server = SlowServer([0.0])
+        await server.start()
+        hedger = self.warmed_hedger(latency=0.3)
+
+        await hedger.call("location", server.get)
+        await server.stop()
+
+        self.assertEqual(server.requests, 1)
+        self.assertEqual(hedger.hedged, 0)
+
+    async def test_budget_caps_hedges(self):
+        """Test that hedges stay within the configured share of requests"""
+        server = SlowServer([0.1] * 40)
+        await server.start()
+        hedger = self.warmed_hedger(budget=0.1)
+
+        for _ in range(20):
+            await hedger.call("location", server.get)
+        await server.stop()
+
+        self.assertLessEqual(hedger.hedged, 2)
+        # A hedge cancelled before it connected never reaches the server
+        self.assertLessEqual(server.requests, 20 + hedger.hedged)
+
+    async def test_admit_can_veto_hedge(self):
+        """Test that a hedge is skipped, and keeps its credit, when admit says no"""
+        server = SlowServer([0.1])
+        await server.start()
+        hedger = self.warmed_hedger()
+
+        result = await hedger.call("location", server.get, admit=lambda: False)
+        await server.stop()
+
+        self.assertEqual(result, [{"request": 0}])
+        self.assertEqual((server.requests, hedger.hedged), (1, 0))
+        self.assertGreaterEqual(hedger.credit, 1)
+
+    async def test_failed_attempt_falls_back_to_other(self):
+        """Test that a failure doesn't win while the other attempt can still succeed"""
+        hedger = self.warmed_hedger()
+        calls = []
+
+        async def attempt():
+            calls.append(1)
+            if len(calls) == 1:
+                await asyncio.sleep(0.15)  # Hedged at 0.05s, then fails first
+                raise ConnectionError("reset")
+            await asyncio.sleep(0.2)
+            return "ok"
+
+        self.assertEqual(await hedger.call("location", attempt), "ok")
+        self.assertEqual(len(calls), 2)
+
+    async def test_losing_response_is_discarded(self):
+        """Test that a loser that still produced a response gets released"""
+        hedger = self.warmed_hedger()
+        released = []
+        release = asyncio.Event()
+        started = []
+
+        async def attempt():
+            started.append(len(started) + 1)
+            number = started[-1]
+            await release.wait()
+            return number
+
+        async def discard(result):
+            released.append(result)
+
+        call = asyncio.ensure_future(hedger.call("location", attempt, discard))
+        await asyncio.sleep(0.08)  # Past the hedge delay, so both attempts are running
+        release.set()
+        result = await call
+        await asyncio.sleep(0.01)
+
+        self.assertEqual(len(started), 2)
+        self.assertEqual(released, [3 - result])
+
+
+if __name__ == '__main__':
+    unittest.main()
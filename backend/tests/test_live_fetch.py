@@ -4,12 +4,15 @@ Tests connection pooling, circuit breaker integration, caching, and telemetry ag
 """
 import unittest
 import asyncio
+import json
+import tempfile
 import time
 from unittest.mock import MagicMock, patch, AsyncMock
 import sys
 import os
 
 # Mock httpx before importing openf1_fetcher
+_real_httpx = sys.modules.get("httpx")
 sys.modules["httpx"] = MagicMock()
 
 # Add backend to path to import openf1_fetcher
@@ -19,19 +22,51 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from openf1_fetcher import (
     fetch_live_telemetry, fetch_driver_info, fetch_car_positions,
     fetch_position, fetch_intervals, fetch_stints,
-    _driver_cache, _cache_get, _cache_set, _session_key_cache,
+    _driver_cache, _cache_get, _cache_set, _feed_state,
+    _session_feeds, _FEED_INTERVALS, openf1_get, _response_cache, _payload_digests,
     get_http_client, close_http_client
 )
+from telemetry_store import _stores
+from playout import _estimators
+from openf1_scheduler import PRIORITY_LIVE, RequestScheduler
+from pybreaker import CircuitBreakerError
+import openf1_fetcher
+from openf1_fetcher import AsyncCircuitBreaker
+from openf1_hedging import RequestHedger
+
+# Only openf1_fetcher should see the mock; later test modules get the real httpx
+if _real_httpx is not None:
+    sys.modules["httpx"] = _real_httpx
+else:
+    del sys.modules["httpx"]
+
+# These tests fire requests back to back; keep the OpenF1 request budget out of the way
+openf1_fetcher.openf1_budget = RequestScheduler(rate=1e6, burst=1e6)
 
 
 def create_response(data, status_code=200):
-    """Helper to create mock HTTP responses"""
+    """Helper to create mock HTTP responses (buffered or streamed)"""
     resp = MagicMock()
     resp.status_code = status_code
     resp.json.return_value = data
+
+    body = json.dumps(data)
+    resp.content = body.encode("utf-8")
+
+    async def aiter_text():
+        # Small chunks so elements get split across chunk boundaries
+        for i in range(0, len(body), 7):
+            yield body[i:i + 7]
+
+    resp.aiter_text = aiter_text
+    resp.aclose = AsyncMock()
     return resp
 
 
+async def collect(iterator):
+    return [item async for item in iterator]
+
+
 class TestCacheUtilities(unittest.TestCase):
     """Test the TTL cache utility functions"""
 
@@ -93,6 +128,30 @@ class TestConnectionPooling(unittest.IsolatedAsyncioTestCase):
         await close_http_client()
         self.assertIsNone(openf1_fetcher._http_client)
 
+    async def test_http2_client_mode(self):
+        """Test that the client multiplexes over HTTP/2 when it's available"""
+        import openf1_fetcher
+        openf1_fetcher._http_client = None
+
+        with patch('openf1_fetcher.http2_enabled', return_value=True), \
+                patch('openf1_fetcher.httpx.AsyncClient') as mock_client_cls:
+            await get_http_client()
+        self.assertTrue(mock_client_cls.call_args.kwargs["http2"])
+        openf1_fetcher._http_client = None
+
+    async def test_prewarm_opens_connection(self):
+        """Test that pre-warming issues a request and survives network errors"""
+        from openf1_fetcher import prewarm_http_client
+
+        mock_client = MagicMock()
+        mock_client.head = AsyncMock()
+        with patch('openf1_fetcher.get_http_client', new_callable=AsyncMock, return_value=mock_client):
+            self.assertTrue(await prewarm_http_client())
+            mock_client.head.assert_awaited_once()
+
+            mock_client.head = AsyncMock(side_effect=Exception("DNS failure"))
+            self.assertFalse(await prewarm_http_client())
+
 
 class TestDriverInfoCaching(unittest.IsolatedAsyncioTestCase):
     """Test driver info fetch with caching"""
@@ -144,12 +203,168 @@ class TestDriverInfoCaching(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(result, {})
 
 
+class TestIncrementalFeeds(unittest.IsolatedAsyncioTestCase):
+    """Test cursor-based incremental polling of the time-series feeds"""
+
+    async def asyncSetUp(self):
+        _feed_state.clear()
+
+    @patch('openf1_fetcher.openf1_breaker')
+    @patch('openf1_fetcher.get_http_client')
+    async def test_cursor_fetches_only_new_samples(self, mock_get_client, mock_breaker):
+        """Test that later polls send a date> cursor and merge into retained state"""
+        mock_get_client.return_value = AsyncMock()
+
+        mock_breaker.call = AsyncMock(side_effect=[
+            create_response([
+                {"driver_number": 1, "x": 100, "y": 200, "date": "2024-01-01T12:00:01+00:00"},
+                {"driver_number": 11, "x": 150, "y": 250, "date": "2024-01-01T12:00:02+00:00"},
+            ]),
+            create_response([
+                {"driver_number": 1, "x": 110, "y": 210, "date": "2024-01-01T12:00:05+00:00"},
+            ]),
+        ])
+
+        first = await fetch_car_positions(session_key=123)
+        self.assertEqual(len(first), 2)
+        first_params = mock_breaker.call.call_args_list[0].kwargs["params"]
+        self.assertNotIn("date>", first_params)
+
+        second = await fetch_car_positions(session_key=123)
+        second_params = mock_breaker.call.call_args_list[1].kwargs["params"]
+        # Cursor trails the newest sample by the overlap window
+        self.assertEqual(second_params["date>"], "2024-01-01T12:00:00+00:00")
+
+        by_driver = {entry["driver_number"]: entry for entry in second}
+        self.assertEqual(by_driver[1]["x"], 110)
+        self.assertEqual(by_driver[11]["x"], 150)  # Retained from the first poll
+
+    @patch('openf1_fetcher.openf1_breaker')
+    @patch('openf1_fetcher.get_http_client')
+    async def test_late_sample_does_not_overwrite_newer(self, mock_get_client, mock_breaker):
+        """Test that overlap re-reads never regress a driver to an older sample"""
+        mock_get_client.return_value = AsyncMock()
+
+        mock_breaker.call = AsyncMock(side_effect=[
+            create_response([
+                {"driver_number": 1, "position": 1, "date": "2024-01-01T12:00:05+00:00"},
+            ]),
+            create_response([
+                {"driver_number": 1, "position": 2, "date": "2024-01-01T12:00:04+00:00"},
+                {"driver_number": 44, "position": 3, "date": "2024-01-01T12:00:04+00:00"},
+            ]),
+        ])
+
+        await fetch_position(session_key=321)
+        result = await fetch_position(session_key=321)
+
+        self.assertEqual([entry["driver_number"] for entry in result], [1, 44])
+        self.assertEqual(result[0]["position"], 1)
+
+    @patch('openf1_fetcher.openf1_breaker')
+    @patch('openf1_fetcher.get_http_client')
+    async def test_location_samples_feed_history(self, mock_get_client, mock_breaker):
+        """Test that every location sample lands in the ring buffers exactly once"""
+        mock_get_client.return_value = AsyncMock()
+        _stores.clear()
+
+        mock_breaker.call = AsyncMock(side_effect=[
+            create_response([
+                {"driver_number": 1, "x": 100, "y": 200, "z": 5, "date": "2024-01-01T12:00:01+00:00"},
+                {"driver_number": 1, "x": 105, "y": 205, "z": 5, "date": "2024-01-01T12:00:02+00:00"},
+            ]),
+            create_response([
+                # Overlap re-read of an already stored sample
+                {"driver_number": 1, "x": 105, "y": 205, "z": 5, "date": "2024-01-01T12:00:02+00:00"},
+                {"driver_number": 1, "x": 110, "y": 210, "z": 5, "date": "2024-01-01T12:00:03+00:00"},
+            ]),
+        ])
+
+        await fetch_car_positions(session_key=123)
+        await fetch_car_positions(session_key=123)
+
+        t, x, y, z = _stores[123].drivers[1].tail(10)
+        self.assertEqual(list(x), [100, 105, 110])
+        self.assertEqual(t[1] - t[0], 1000)
+
+    @patch('openf1_fetcher.now_ms', return_value=1704110406000)  # 2024-01-01T12:00:06Z
+    @patch('openf1_fetcher.openf1_breaker')
+    @patch('openf1_fetcher.get_http_client')
+    async def test_arrival_lag_measured_per_car(self, mock_get_client, mock_breaker, mock_now):
+        """Test that each car's newest location sample feeds the playout delay estimate"""
+        mock_get_client.return_value = AsyncMock()
+        _estimators.clear()
+        _stores.clear()
+
+        mock_breaker.call = AsyncMock(return_value=create_response([
+            {"driver_number": 1, "x": 1, "y": 1, "z": 0, "date": "2024-01-01T12:00:01+00:00"},
+            {"driver_number": 1, "x": 2, "y": 1, "z": 0, "date": "2024-01-01T12:00:03+00:00"},
+            {"driver_number": 44, "x": 3, "y": 1, "z": 0, "date": "2024-01-01T12:00:02+00:00"},
+        ]))
+        await fetch_car_positions(session_key=555)
+        self.assertEqual(sorted(_estimators[555].lags), [3000, 4000])
+
+        # Slow feeds' lag is mostly their own poll interval; it must not count
+        mock_breaker.call = AsyncMock(return_value=create_response([
+            {"driver_number": 1, "position": 1, "date": "2024-01-01T11:59:56+00:00"},
+        ]))
+        await fetch_position(session_key=555)
+        self.assertEqual(sorted(_estimators[555].lags), [3000, 4000])
+
+
+class TestStreamingDecode(unittest.IsolatedAsyncioTestCase):
+    """Test incremental decoding of large OpenF1 array responses"""
+
+    async def chunks(self, body, size):
+        for i in range(0, len(body), size):
+            yield body[i:i + size]
+
+    async def test_elements_split_across_chunks(self):
+        """Test that every element is decoded whatever the chunk size"""
+        from openf1_fetcher import _iter_json_array
+
+        rows = [{"driver_number": n, "x": n * 10, "note": "a ] , [ b"} for n in range(25)]
+        body = json.dumps(rows)
+        for size in (1, 3, 64, len(body)):
+            items = await collect(_iter_json_array(self.chunks(body, size)))
+            self.assertEqual(items, rows)
+
+    async def test_bare_numbers_not_cut_off(self):
+        """Test that numbers split at a chunk boundary are not truncated"""
+        from openf1_fetcher import _iter_json_array
+
+        items = await collect(_iter_json_array(self.chunks("[123, 4567]", 2)))
+        self.assertEqual(items, [123, 4567])
+
+    async def test_rejects_non_array(self):
+        """Test that error objects are not silently treated as empty data"""
+        from openf1_fetcher import _iter_json_array
+
+        with self.assertRaises(ValueError):
+            await collect(_iter_json_array(self.chunks('{"detail": "error"}', 4)))
+
+    @patch('openf1_fetcher.openf1_breaker')
+    @patch('openf1_fetcher.get_http_client')
+    async def test_stream_is_closed(self, mock_get_client, mock_breaker):
+        """Test that the streamed response is always released"""
+        mock_get_client.return_value = AsyncMock()
+        response = create_response([{"driver_number": 1, "x": 1, "date": "2024-01-01T12:00:01+00:00"}])
+        mock_breaker.call = AsyncMock(return_value=response)
+
+        positions = await fetch_car_positions(session_key=555)
+
+        self.assertEqual(positions[0]["x"], 1)
+        response.aclose.assert_awaited_once()
+
+
 class TestLiveTelemetry(unittest.IsolatedAsyncioTestCase):
     """Test the full live telemetry aggregation pipeline"""
 
     async def asyncSetUp(self):
         """Clear caches before each test"""
         _driver_cache.clear()
+        _feed_state.clear()
+        _session_feeds.clear()
 
     @patch('openf1_fetcher.openf1_breaker')
     @patch('openf1_fetcher.get_http_client')
@@ -221,7 +436,7 @@ class TestLiveTelemetry(unittest.IsolatedAsyncioTestCase):
     async def test_fetch_live_telemetry_no_session(self):
         """Test that fetch_live_telemetry returns offline when no session"""
         import openf1_fetcher
-        openf1_fetcher._session_key_cache = None
+        openf1_fetcher._current_session = None
 
         with patch('openf1_fetcher.get_latest_session_key', new_callable=AsyncMock, return_value=None):
             result = await fetch_live_telemetry()
@@ -243,12 +458,508 @@ class TestLiveTelemetry(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(result["cars"], [])
 
 
+class TestFeedScheduler(unittest.IsolatedAsyncioTestCase):
+    """Test per-feed refresh cadence and change detection"""
+
+    async def asyncSetUp(self):
+        _driver_cache.clear()
+        _feed_state.clear()
+        _session_feeds.clear()
+
+    def breaker_for(self, calls):
+        """Build a breaker side effect that records the endpoint of every call"""
+        async def side_effect(func, url, params=None):
+            endpoint = url.rsplit("/", 1)[-1]
+            calls.append(endpoint)
+            if endpoint == "drivers":
+                return create_response([
+                    {"driver_number": 1, "name_acronym": "VER", "full_name": "Max Verstappen",
+                     "team_name": "Red Bull", "team_colour": "#0000FF"}
+                ])
+            if endpoint == "stints":
+                return create_response([{"driver_number": 1, "stint_number": 1, "compound": "SOFT"}])
+            return create_response([
+                {"driver_number": 1, "position": 1, "x": 100, "y": 200,
+                 "date": f"2024-01-01T12:00:0{len(calls) % 10}+00:00"}
+            ])
+        return side_effect
+
+    def age_feeds(self, session_key, seconds):
+        """Pretend every feed was last fetched `seconds` earlier"""
+        fetched_at = _session_feeds[session_key]["fetched_at"]
+        for name in fetched_at:
+            fetched_at[name] -= seconds
+
+    @patch('openf1_fetcher.openf1_breaker')
+    @patch('openf1_fetcher.get_http_client')
+    async def test_only_due_feeds_are_refreshed(self, mock_get_client, mock_breaker):
+        """Test that each feed is refetched on its own interval"""
+        mock_get_client.return_value = AsyncMock()
+        calls = []
+        mock_breaker.call = AsyncMock(side_effect=self.breaker_for(calls))
+
+        await fetch_live_telemetry(session_key=123)
+        self.assertEqual(sorted(calls), ["drivers", "intervals", "location", "position", "stints"])
+
+        # Nothing is due yet
+        calls.clear()
+        await fetch_live_telemetry(session_key=123)
+        self.assertEqual(calls, [])
+
+        # Only the fast location feed is due
+        calls.clear()
+        self.age_feeds(123, _FEED_INTERVALS["location"])
+        await fetch_live_telemetry(session_key=123)
+        self.assertEqual(calls, ["location"])
+
+    @patch('openf1_fetcher.openf1_breaker')
+    @patch('openf1_fetcher.get_http_client')
+    async def test_unchanged_feeds_reuse_snapshot(self, mock_get_client, mock_breaker):
+        """Test that the snapshot is only rebuilt when a feed changed"""
+        mock_get_client.return_value = AsyncMock()
+        mock_breaker.call = AsyncMock(return_value=create_response([
+            {"driver_number": 1, "position": 1, "x": 100, "y": 200, "date": "2024-01-01T12:00:01+00:00"}
+        ]))
+
+        first = await fetch_live_telemetry(session_key=123)
+        self.age_feeds(123, max(_FEED_INTERVALS.values()))
+        second = await fetch_live_telemetry(session_key=123)
+
+        self.assertIs(first, second)
+
+    @patch('openf1_fetcher.openf1_breaker')
+    @patch('openf1_fetcher.get_http_client')
+    async def test_identical_stints_body_skips_decoding(self, mock_get_client, mock_breaker):
+        """Test that a repeated stints body is recognised by its hash and not parsed again"""
+        mock_get_client.return_value = AsyncMock()
+        _payload_digests.clear()
+        first_response = create_response([{"driver_number": 1, "stint_number": 1, "compound": "SOFT"}])
+        repeat_response = create_response([{"driver_number": 1, "stint_number": 1, "compound": "SOFT"}])
+        changed_response = create_response([{"driver_number": 1, "stint_number": 2, "compound": "HARD"}])
+        mock_breaker.call = AsyncMock(side_effect=[first_response, repeat_response, changed_response])
+
+        first = await fetch_stints(session_key=123)
+        second = await fetch_stints(session_key=123)
+        third = await fetch_stints(session_key=123)
+
+        self.assertIs(first, second)
+        repeat_response.json.assert_not_called()
+        self.assertEqual(third[1]["compound"], "HARD")
+
+
+class TestOpenF1Gateway(unittest.IsolatedAsyncioTestCase):
+    """Test the shared openf1_get gateway used by the route modules"""
+
+    async def asyncSetUp(self):
+        _response_cache.clear()
+
+    @patch('openf1_fetcher.openf1_breaker')
+    @patch('openf1_fetcher.get_http_client')
+    async def test_cached_endpoint_reuses_response(self, mock_get_client, mock_breaker):
+        """Test that a cached endpoint only hits OpenF1 once within its TTL"""
+        mock_get_client.return_value = AsyncMock()
+        mock_breaker.call = AsyncMock(return_value=create_response([{"session_key": 9999}]))
+
+        first = await openf1_get("sessions", {"session_key": "latest"})
+        second = await openf1_get("sessions", {"session_key": "latest"})
+
+        self.assertEqual(first, second)
+        self.assertEqual(mock_breaker.call.call_count, 1)
+
+        # Different params are a different cache entry
+        await openf1_get("sessions", {"session_key": 1234})
+        self.assertEqual(mock_breaker.call.call_count, 2)
+
+    @patch('openf1_fetcher.openf1_breaker')
+    @patch('openf1_fetcher.get_http_client')
+    async def test_uncached_endpoint_and_timeouts(self, mock_get_client, mock_breaker):
+        """Test per-endpoint timeouts and that bulk endpoints are not cached"""
+        mock_get_client.return_value = AsyncMock()
+        mock_breaker.call = AsyncMock(return_value=create_response([{"x": 1, "y": 2}]))
+
+        await openf1_get("location", {"session_key": 9999, "driver_number": 1})
+        await openf1_get("location", {"session_key": 9999, "driver_number": 1})
+
+        self.assertEqual(mock_breaker.call.call_count, 2)
+        func = mock_breaker.call.call_args.args[0]
+        self.assertEqual(func.keywords["timeout"], 30.0)
+        self.assertTrue(mock_breaker.call.call_args.args[1].endswith("/location"))
+
+    @patch('openf1_fetcher.openf1_breaker')
+    @patch('openf1_fetcher.get_http_client')
+    async def test_error_status_returns_none(self, mock_get_client, mock_breaker):
+        """Test that non-200 responses return None and are not cached"""
+        mock_get_client.return_value = AsyncMock()
+        mock_breaker.call = AsyncMock(return_value=create_response({"detail": "No results"}, 404))
+
+        self.assertIsNone(await openf1_get("team_radio", {"session_key": 9999}))
+        self.assertEqual(len(_response_cache), 0)
+
+    @patch('openf1_fetcher.openf1_breaker')
+    @patch('openf1_fetcher.get_http_client')
+    async def test_csv_columns_decoded_to_arrays(self, mock_get_client, mock_breaker):
+        """Test that bulk pulls ask for CSV and decode only the requested columns"""
+        mock_get_client.return_value = AsyncMock()
+        body = (
+            "date,driver_number,meeting_key,session_key,x,y,z\r\n"
+            "2024-01-01T12:00:00+00:00,1,1219,9158,-1234,5678,12\r\n"
+            "2024-01-01T12:00:00.270000+00:00,1,1219,9158,-1240.5,,12\r\n"
+        )
+        resp = create_response([])
+
+        async def aiter_text():
+            for i in range(0, len(body), 11):
+                yield body[i:i + 11]
+
+        resp.aiter_text = aiter_text
+        mock_breaker.call = AsyncMock(return_value=resp)
+
+        data = await openf1_fetcher.openf1_get_columns(
+            "location", {"session_key": 9158}, {"date": "q", "driver_number": "H", "x": "f", "y": "f"}
+        )
+
+        self.assertEqual(mock_breaker.call.call_args.kwargs["params"]["csv"], "true")
+        self.assertEqual(list(data["date"]), [1704110400000, 1704110400270])
+        self.assertEqual(list(data["driver_number"]), [1, 1])
+        self.assertEqual(list(data["x"]), [-1234.0, -1240.5])
+        self.assertEqual(list(data["y"]), [5678.0, 0.0])
+        self.assertEqual(set(data), {"date", "driver_number", "x", "y"})
+        resp.aclose.assert_awaited()
+
+    async def test_budget_wait_not_timed_as_latency(self):
+        """Test that queueing for a budget token neither triggers a hedge nor counts toward the p90"""
+        hedger = RequestHedger(budget=1.0, min_samples=1)
+        hedger.record("location", 0.05)
+        budget = RequestScheduler(rate=5, burst=1)
+        await budget.acquire(PRIORITY_LIVE)  # Empty the bucket: the next token is ~0.2s away
+        calls = []
+
+        async def fetch(url, params=None):
+            calls.append(url)
+            return "ok"
+
+        with patch('openf1_fetcher.openf1_breaker', AsyncCircuitBreaker()), \
+                patch('openf1_fetcher.openf1_budget', budget), \
+                patch('openf1_fetcher.openf1_hedger', hedger):
+            result = await openf1_fetcher._call_openf1(PRIORITY_LIVE, fetch, "https://api.openf1.org/v1/location", {})
+
+        self.assertEqual(result, "ok")
+        self.assertEqual((len(calls), hedger.hedged), (1, 0))
+        self.assertLess(hedger.latencies["location"][-1], 0.05)
+
+
+class TestSingleflight(unittest.IsolatedAsyncioTestCase):
+    """Test that concurrent cache misses share one upstream request"""
+
+    async def asyncSetUp(self):
+        import openf1_fetcher
+        openf1_fetcher._current_session = None
+        _driver_cache.clear()
+        _feed_state.clear()
+        _session_feeds.clear()
+
+    def slow_breaker(self, data):
+        """Breaker side effect that yields so concurrent callers overlap"""
+        async def side_effect(func, url, params=None):
+            await asyncio.sleep(0.01)
+            return create_response(data)
+        return side_effect
+
+    @patch('openf1_fetcher.openf1_breaker')
+    @patch('openf1_fetcher.get_http_client')
+    async def test_concurrent_driver_info_misses(self, mock_get_client, mock_breaker):
+        """Test that simultaneous fetch_driver_info misses make one request"""
+        mock_get_client.return_value = AsyncMock()
+        mock_breaker.call = AsyncMock(side_effect=self.slow_breaker([
+            {"driver_number": 1, "name_acronym": "VER"}
+        ]))
+
+        results = await asyncio.gather(*(fetch_driver_info(session_key=999) for _ in range(10)))
+
+        self.assertEqual(mock_breaker.call.call_count, 1)
+        self.assertTrue(all(result[1]["code"] == "VER" for result in results))
+
+    @patch('openf1_fetcher.openf1_breaker')
+    @patch('openf1_fetcher.get_http_client')
+    async def test_concurrent_session_key_misses(self, mock_get_client, mock_breaker):
+        """Test that simultaneous get_latest_session_key misses make one request"""
+        from openf1_fetcher import get_latest_session_key
+
+        mock_get_client.return_value = AsyncMock()
+        mock_breaker.call = AsyncMock(side_effect=self.slow_breaker([
+            {"session_key": 9999, "date_end": None}
+        ]))
+
+        keys = await asyncio.gather(*(get_latest_session_key() for _ in range(10)))
+
+        self.assertEqual(keys, [9999] * 10)
+        self.assertEqual(mock_breaker.call.call_count, 1)
+
+    @patch('openf1_fetcher.openf1_breaker')
+    @patch('openf1_fetcher.get_http_client')
+    async def test_concurrent_snapshot_refreshes(self, mock_get_client, mock_breaker):
+        """Test that simultaneous telemetry refreshes fetch each feed once"""
+        mock_get_client.return_value = AsyncMock()
+        mock_breaker.call = AsyncMock(side_effect=self.slow_breaker([
+            {"driver_number": 1, "position": 1, "date": "2024-01-01T12:00:01+00:00"}
+        ]))
+
+        results = await asyncio.gather(*(fetch_live_telemetry(session_key=123) for _ in range(10)))
+
+        self.assertEqual(mock_breaker.call.call_count, len(_FEED_INTERVALS))
+        self.assertTrue(all(result is results[0] for result in results))
+
+    async def test_cancelled_caller_does_not_cancel_fetch(self):
+        """Test that the shared fetch survives one of its callers being cancelled"""
+        from openf1_fetcher import _singleflight
+
+        started = asyncio.Event()
+
+        async def fetch():
+            started.set()
+            await asyncio.sleep(0.01)
+            return "done"
+
+        first = asyncio.create_task(_singleflight(("test", "resource"), fetch))
+        await started.wait()
+        second = asyncio.create_task(_singleflight(("test", "resource"), fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        self.assertEqual(await second, "done")
+
+
+class TestStaleWhileRevalidate(unittest.IsolatedAsyncioTestCase):
+    """Test that an expired snapshot is served immediately while it refreshes"""
+
+    LIVE = {"status": "live", "session_key": 123, "cars": [{"driver_number": 1}], "timestamp": "t0"}
+
+    async def asyncSetUp(self):
+        import openf1_fetcher
+        self.fetcher = openf1_fetcher
+        self.original_cache = openf1_fetcher._telemetry_cache
+
+    async def asyncTearDown(self):
+        self.fetcher._telemetry_cache = self.original_cache
+
+    async def test_fresh_snapshot_served_from_cache(self):
+        """Test that a snapshot inside its TTL is returned as-is"""
+        self.fetcher._telemetry_cache = (self.LIVE, time.time())
+        with patch('openf1_fetcher._fetch_session_telemetry', new_callable=AsyncMock) as mock_fetch:
+            result = await fetch_live_telemetry()
+        self.assertIs(result, self.LIVE)
+        mock_fetch.assert_not_called()
+
+    async def test_expired_snapshot_served_with_age(self):
+        """Test that an expired snapshot is returned at once and refreshed in the background"""
+        self.fetcher._telemetry_cache = (self.LIVE, time.time() - 10)
+        refreshed = {**self.LIVE, "timestamp": "t1"}
+        gate = asyncio.Event()
+
+        async def slow_refresh(session_key):
+            await gate.wait()
+            return refreshed
+
+        with patch('openf1_fetcher._fetch_session_telemetry', side_effect=slow_refresh):
+            result = await fetch_live_telemetry()
+            self.assertEqual(result["status"], "live")
+            self.assertEqual(result["timestamp"], "t0")
+            self.assertAlmostEqual(result["age"], 10, delta=1)
+
+            gate.set()
+            await asyncio.sleep(0)
+            await asyncio.sleep(0)
+
+        self.assertIs(self.fetcher._telemetry_cache[0], refreshed)
+
+    async def test_snapshot_marked_stale_past_max_age(self):
+        """Test that live data past the staleness bound is flagged as stale"""
+        self.fetcher._telemetry_cache = (self.LIVE, time.time() - 120)
+        error = {"status": "error", "cars": [], "message": "OpenF1 down"}
+
+        with patch('openf1_fetcher._fetch_session_telemetry', new_callable=AsyncMock, return_value=error):
+            result = await fetch_live_telemetry()
+            await asyncio.sleep(0)
+
+        self.assertEqual(result["status"], "stale")
+        self.assertEqual(result["cars"], self.LIVE["cars"])
+        # The failed refresh must not replace the last good snapshot
+        self.assertIs(self.fetcher._telemetry_cache[0], self.LIVE)
+
+
+class TestPushIngestion(unittest.IsolatedAsyncioTestCase):
+    """Test feeds kept current by the OpenF1 broker instead of polls"""
+
+    async def asyncSetUp(self):
+        _feed_state.clear()
+        _session_feeds.clear()
+        _driver_cache.clear()
+        _stores.clear()
+        self.stream = MagicMock(connected=True)
+        openf1_fetcher._push_stream = self.stream
+
+    async def asyncTearDown(self):
+        openf1_fetcher._push_stream = None
+
+    @patch('openf1_fetcher.openf1_breaker')
+    @patch('openf1_fetcher.get_http_client')
+    async def test_pushed_samples_replace_polling(self, mock_get_client, mock_breaker):
+        """Test that after the backlog poll, pushed samples feed the snapshot with no more requests"""
+        mock_get_client.return_value = AsyncMock()
+        mock_breaker.call = AsyncMock(return_value=create_response([
+            {"driver_number": 1, "session_key": 123, "position": 1, "x": 100, "y": 200,
+             "date": "2024-01-01T12:00:01+00:00"}
+        ]))
+
+        first = await fetch_live_telemetry(session_key=123)
+        self.assertEqual(first["cars"][0]["x"], 100)
+        polls = mock_breaker.call.call_count
+
+        openf1_fetcher._ingest_pushed("v1/location", {
+            "driver_number": 1, "session_key": 123, "x": 140, "y": 210, "date": "2024-01-01T12:00:02+00:00"
+        })
+        openf1_fetcher._ingest_pushed("v1/stints", {"driver_number": 1, "session_key": 123, "stint_number": 2, "compound": "HARD"})
+
+        second = await fetch_live_telemetry(session_key=123)
+        self.assertEqual(second["cars"][0]["x"], 140)
+        self.assertEqual(second["cars"][0]["tyre"], "HARD")
+        self.assertEqual(mock_breaker.call.call_count, polls)
+        self.assertEqual(len(_stores[123].drivers[1]), 2)
+
+        # Losing the broker hands the feed back to polling, resuming after the last pushed sample
+        self.stream.connected = False
+        self.age_all(123)
+        await fetch_live_telemetry(session_key=123)
+        location_params = [
+            call.kwargs["params"] for call in mock_breaker.call.call_args_list[polls:]
+            if call.args[1].endswith("/location")
+        ]
+        self.assertEqual(location_params[0]["date>"], "2024-01-01T12:00:00+00:00")
+
+    def age_all(self, session_key):
+        fetched_at = _session_feeds[session_key]["fetched_at"]
+        for name in fetched_at:
+            fetched_at[name] -= 1000
+
+    def test_unknown_sessions_and_topics_ignored(self):
+        """Test that messages for sessions we aren't serving are dropped"""
+        openf1_fetcher._ingest_pushed("v1/location", {"driver_number": 1, "session_key": 5, "x": 1})
+        openf1_fetcher._ingest_pushed("v1/weather", {"session_key": 5})
+        self.assertEqual(_feed_state, {})
+
+
+class TestLastKnownGood(unittest.IsolatedAsyncioTestCase):
+    """Test persisting the last good live state across restarts and breaker trips"""
+
+    LIVE = {"status": "live", "session_key": 77, "cars": [{"driver_number": 1}], "timestamp": "t0"}
+
+    async def asyncSetUp(self):
+        self.fetcher = openf1_fetcher
+        self.original = (openf1_fetcher._telemetry_cache, openf1_fetcher._current_session)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "state", "live.json")
+        self.env = patch.dict(os.environ, {"LIVE_SNAPSHOT_PATH": self.path})
+        self.env.start()
+        openf1_fetcher._saved_snapshot = None
+        _session_feeds.clear()
+        _driver_cache.clear()
+
+    async def asyncTearDown(self):
+        self.env.stop()
+        self.tmp.cleanup()
+        self.fetcher._telemetry_cache, self.fetcher._current_session = self.original
+        _session_feeds.clear()
+        _driver_cache.clear()
+
+    async def test_state_survives_restart(self):
+        """Test that a saved snapshot and its lookups are served again after a restart"""
+        saved_at = time.time() - 40
+        self.fetcher._telemetry_cache = (self.LIVE, saved_at)
+        self.fetcher._current_session = ({"session_key": 77, "in_live_window": True}, saved_at)
+        feeds = openf1_fetcher._get_session_feeds(77)
+        feeds["data"]["drivers"] = {1: {"code": "VER"}}
+        feeds["data"]["stints"] = {1: {"compound": "SOFT"}}
+
+        self.assertTrue(await openf1_fetcher.persist_live_state())
+        # Nothing changed, so nothing is rewritten
+        self.assertFalse(await openf1_fetcher.persist_live_state())
+
+        # Simulate a restart
+        self.fetcher._telemetry_cache = None
+        self.fetcher._current_session = None
+        _session_feeds.clear()
+        _driver_cache.clear()
+
+        self.assertTrue(openf1_fetcher.restore_live_state())
+        self.assertEqual(_session_feeds[77]["data"]["drivers"], {1: {"code": "VER"}})
+        self.assertEqual(_session_feeds[77]["data"]["stints"][1]["compound"], "SOFT")
+        self.assertEqual(_driver_cache["drivers_77"][0][1]["code"], "VER")
+
+        with patch('openf1_fetcher._fetch_session_telemetry', new_callable=AsyncMock, return_value=self.LIVE):
+            result = await fetch_live_telemetry()
+        self.assertEqual(result["status"], "stale")
+        self.assertEqual(result["cars"], self.LIVE["cars"])
+        self.assertAlmostEqual(result["age"], 40, delta=2)
+
+    async def test_breaker_open_keeps_last_good_snapshot(self):
+        """Test that a snapshot built while OpenF1 is unreachable doesn't replace the live one"""
+        self.fetcher._telemetry_cache = (self.LIVE, time.time() - 120)
+        waiting = {"status": "waiting", "cars": [], "session_key": 77}
+
+        with patch('openf1_fetcher._fetch_session_telemetry', new_callable=AsyncMock, return_value=waiting), \
+                patch('openf1_fetcher._upstream_down', return_value=True):
+            result = await fetch_live_telemetry()
+            await asyncio.sleep(0)
+
+        self.assertEqual(result["status"], "stale")
+        self.assertIs(self.fetcher._telemetry_cache[0], self.LIVE)
+
+    @patch('openf1_fetcher.openf1_breaker')
+    @patch('openf1_fetcher.get_http_client')
+    async def test_error_responses_dont_redate_snapshot(self, mock_get_client, mock_breaker):
+        """Test that a refresh where every feed answers 503 leaves the snapshot ageing into stale"""
+        mock_get_client.return_value = AsyncMock()
+        mock_breaker.call = AsyncMock(side_effect=lambda *args, **kwargs: create_response([], 503))
+        mock_breaker.current_state = "closed"
+        self.fetcher._current_session = ({"session_key": 77, "in_live_window": True}, time.time())
+        feeds = openf1_fetcher._get_session_feeds(77)
+        feeds["data"]["position"] = [{"driver_number": 1, "position": 1}]
+        feeds["snapshot"] = self.LIVE
+        saved_at = time.time() - 40
+        self.fetcher._telemetry_cache = (self.LIVE, saved_at)
+        _feed_state.clear()
+
+        await openf1_fetcher._refresh_latest_telemetry()
+
+        self.assertGreater(mock_breaker.call.call_count, 0)
+        self.assertEqual(self.fetcher._telemetry_cache, (self.LIVE, saved_at))
+        with patch('openf1_fetcher._inflight_task'):
+            result = await fetch_live_telemetry()
+        self.assertEqual(result["status"], "stale")
+        self.assertAlmostEqual(result["age"], 40, delta=2)
+
+    async def test_old_or_missing_state_not_restored(self):
+        """Test that a missing or long-finished session's state is ignored"""
+        self.assertFalse(openf1_fetcher.restore_live_state())
+
+        from last_known_good import save_state, MAX_RESTORE_AGE
+        save_state(self.path, {"saved_at": time.time() - MAX_RESTORE_AGE - 1, "telemetry": self.LIVE})
+        self.assertFalse(openf1_fetcher.restore_live_state())
+
+    async def test_persistence_can_be_disabled(self):
+        """Test that an empty LIVE_SNAPSHOT_PATH turns persistence off"""
+        self.fetcher._telemetry_cache = (self.LIVE, time.time())
+        with patch.dict(os.environ, {"LIVE_SNAPSHOT_PATH": ""}):
+            self.assertFalse(await openf1_fetcher.persist_live_state())
+        self.assertFalse(os.path.exists(self.path))
+
+
 class TestSessionKeyCache(unittest.IsolatedAsyncioTestCase):
     """Test session key caching"""
 
     async def asyncSetUp(self):
         import openf1_fetcher
-        openf1_fetcher._session_key_cache = None
+        openf1_fetcher._current_session = None
 
     @patch('openf1_fetcher.openf1_breaker')
     @patch('openf1_fetcher.get_http_client')
@@ -274,12 +985,65 @@ class TestSessionKeyCache(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(key2, 9999)
         self.assertEqual(mock_breaker.call.call_count, 1)  # No new API call
 
+    @patch('openf1_fetcher.openf1_breaker')
+    @patch('openf1_fetcher.get_http_client')
+    async def test_session_outside_live_window(self, mock_get_client, mock_breaker):
+        """Test that a finished session is resolved but yields no live key"""
+        from openf1_fetcher import get_current_session, get_latest_session_key
+
+        mock_get_client.return_value = AsyncMock()
+        mock_breaker.call = AsyncMock(return_value=create_response([{
+            "session_key": 9158, "circuit_short_name": "Monza",
+            "date_start": "2023-09-03T13:00:00+00:00", "date_end": "2023-09-03T15:00:00+00:00",
+        }]))
+
+        session = await get_current_session()
+        self.assertEqual(session["circuit_short_name"], "Monza")
+        self.assertFalse(session["in_live_window"])
+        self.assertIsNone(await get_latest_session_key())
+        self.assertEqual(mock_breaker.call.call_count, 1)
+
+    @patch('openf1_fetcher.openf1_breaker')
+    @patch('openf1_fetcher.get_http_client')
+    async def test_failed_refresh_keeps_previous_session(self, mock_get_client, mock_breaker):
+        """Test that an OpenF1 error doesn't drop the known session"""
+        import openf1_fetcher
+        from openf1_fetcher import get_current_session
+
+        mock_get_client.return_value = AsyncMock()
+        openf1_fetcher._current_session = ({"session_key": 9999, "in_live_window": True}, time.time() - 60)
+        mock_breaker.call = AsyncMock(side_effect=Exception("Connection failed"))
+
+        session = await get_current_session()
+        self.assertEqual(session["session_key"], 9999)
+
+    @patch('openf1_fetcher.openf1_breaker')
+    @patch('openf1_fetcher.get_http_client')
+    async def test_background_resolver(self, mock_get_client, mock_breaker):
+        """Test that the resolver refreshes the session without a caller asking"""
+        import openf1_fetcher
+        from openf1_fetcher import start_session_resolver, stop_session_resolver
+
+        mock_get_client.return_value = AsyncMock()
+        mock_breaker.call = AsyncMock(
+            return_value=create_response([{"session_key": 9999, "date_end": None}])
+        )
+
+        start_session_resolver()
+        await asyncio.sleep(0.01)
+        await stop_session_resolver()
+
+        self.assertEqual(openf1_fetcher._current_session[0]["session_key"], 9999)
+        self.assertIsNone(openf1_fetcher._session_resolver_task)
+
 
 class TestCircuitBreakerIntegration(unittest.IsolatedAsyncioTestCase):
     """Test circuit breaker behavior"""
 
     async def asyncSetUp(self):
         _driver_cache.clear()
+        _feed_state.clear()
+        _session_feeds.clear()
 
     @patch('openf1_fetcher.openf1_breaker')
     @patch('openf1_fetcher.get_http_client')
@@ -311,6 +1075,61 @@ class TestCircuitBreakerIntegration(unittest.IsolatedAsyncioTestCase):
         positions = await fetch_car_positions(session_key=123)
         self.assertEqual(positions, [])
 
+    async def test_failed_requests_open_the_breaker(self):
+        """Test that awaited request failures are counted until the circuit opens"""
+        # A fresh breaker with the module's settings (httpx is mocked in this module)
+        breaker = AsyncCircuitBreaker(fail_max=openf1_fetcher.openf1_breaker.fail_max, reset_timeout=60)
+        calls = []
+
+        async def refused(url, params=None):
+            calls.append(url)
+            await asyncio.sleep(0)
+            raise ConnectionError("connection refused")
+
+        with patch('openf1_fetcher.openf1_breaker', breaker):
+            for _ in range(breaker.fail_max + 2):
+                with self.assertRaises((ConnectionError, CircuitBreakerError)):
+                    await openf1_fetcher._call_openf1(PRIORITY_LIVE, refused, "https://api.openf1.org/v1/location", {})
+            self.assertTrue(openf1_fetcher._upstream_down())
+
+        self.assertEqual(breaker.current_state, "open")
+        # Once open, requests aren't even attempted
+        self.assertEqual(len(calls), breaker.fail_max)
+
+    async def test_success_and_cancellation_not_counted_as_failures(self):
+        """Test that a success resets the count and a cancelled request counts as neither"""
+        breaker = AsyncCircuitBreaker(fail_max=3, reset_timeout=60)
+
+        async def refused():
+            raise ConnectionError("connection refused")
+
+        async def ok():
+            return "ok"
+
+        async def cancel_one():
+            hung = asyncio.ensure_future(breaker.call(asyncio.sleep, 10))
+            await asyncio.sleep(0)
+            hung.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await hung
+
+        with self.assertRaises(ConnectionError):
+            await breaker.call(refused)
+        self.assertEqual(await breaker.call(ok), "ok")
+        self.assertEqual(breaker.fail_counter, 0)
+
+        # A losing hedge cancelled between failures doesn't reset the count
+        for _ in range(2):
+            with self.assertRaises(ConnectionError):
+                await breaker.call(refused)
+        await cancel_one()
+        self.assertEqual((breaker.current_state, breaker.fail_counter), ("closed", 2))
+
+        # ...nor close a half-open circuit
+        breaker.half_open()
+        await cancel_one()
+        self.assertEqual(breaker.current_state, "half-open")
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,682 @@
+"""
+SilverWall Backend - Unit Tests for the Live Telemetry Hub
+Tests the shared poller lifecycle and frame fan-out for /ws/live.
+"""
+import unittest
+import asyncio
+import json
+from collections import deque
+from unittest.mock import AsyncMock, patch
+import sys
+import os
+
+# Add backend to path to import the websocket package
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from websocket import hub as hub_module
+from websocket.hub import SSE_MODE, LiveTelemetryHub, get_hub, release_hub
+from websocket.frames import STREAM_ID, DeltaEncoder, diff_cars, parse_since
+from websocket.projection import parse_projection
+from websocket.sse import EventStreamClient
+from telemetry_store import TelemetryStore, _stores
+from playout import DEFAULT_DELAY_MS, _estimators, get_estimator
+
+
+class FakeWebSocket:
+    """Minimal stand-in for a FastAPI WebSocket that records sent text"""
+
+    def __init__(self, fail=False):
+        self.sent = []
+        self.fail = fail
+
+    async def send_text(self, message):
+        if self.fail:
+            raise RuntimeError("socket closed")
+        self.sent.append(message)
+
+    async def send_bytes(self, message):
+        await self.send_text(message)
+
+
+LIVE_PAYLOAD = {"status": "live", "session_key": 1, "cars": [{"driver_number": 1, "x": 1, "y": 2}]}
+
+
+class TestLiveTelemetryHub(unittest.IsolatedAsyncioTestCase):
+    """Test the broadcast hub"""
+
+    async def asyncSetUp(self):
+        hub_module._hubs.clear()
+        _stores.clear()
+        _estimators.clear()
+
+    @patch('websocket.hub.fetch_live_telemetry', new_callable=AsyncMock, return_value=LIVE_PAYLOAD)
+    async def test_single_poller_fans_out(self, mock_fetch):
+        """Test that one fetch per tick is shared by every subscriber"""
+        hub = LiveTelemetryHub()
+        ws1, ws2 = FakeWebSocket(), FakeWebSocket()
+
+        await hub.subscribe(ws1)
+        await hub.subscribe(ws2)
+        await asyncio.sleep(0.01)
+        await hub.drain()
+
+        self.assertEqual(mock_fetch.call_count, 1)
+        self.assertEqual(ws1.sent, ws2.sent)
+        # Live frames report the playout delay (the default until lag is measured)
+        self.assertEqual(json.loads(ws1.sent[0]), {**LIVE_PAYLOAD, "delay": DEFAULT_DELAY_MS / 1000, "seq": 1, "stream": STREAM_ID})
+
+        await hub.stop()
+
+    @patch('websocket.hub.fetch_live_telemetry', new_callable=AsyncMock, return_value=LIVE_PAYLOAD)
+    async def test_late_subscriber_gets_latest_frame(self, mock_fetch):
+        """Test that a new subscriber is sent the cached frame without another fetch"""
+        hub = LiveTelemetryHub()
+        await hub.subscribe(FakeWebSocket())
+        await asyncio.sleep(0.01)
+
+        late = FakeWebSocket()
+        await hub.subscribe(late)
+        await hub.drain()
+        self.assertEqual(len(late.sent), 1)
+        self.assertEqual(mock_fetch.call_count, 1)
+
+        await hub.stop()
+
+    @patch('websocket.hub.fetch_live_telemetry', new_callable=AsyncMock, return_value=LIVE_PAYLOAD)
+    async def test_poller_stops_with_last_subscriber(self, mock_fetch):
+        """Test that the producer task starts and stops with its subscribers"""
+        hub = get_hub()
+        ws = FakeWebSocket()
+
+        await hub.subscribe(ws)
+        self.assertTrue(hub.running)
+
+        await release_hub(hub, ws)
+        self.assertFalse(hub.running)
+        self.assertNotIn(None, hub_module._hubs)
+
+    async def test_broadcast_drops_dead_sockets(self):
+        """Test that a failing socket is removed without affecting the others"""
+        hub = LiveTelemetryHub()
+        good, bad = FakeWebSocket(), FakeWebSocket(fail=True)
+        hub.subscribers.update({good: "json", bad: "json"})
+
+        await hub.broadcast({"json": ["frame"]})
+        await hub.drain()
+
+        self.assertEqual(good.sent, ["frame"])
+        self.assertNotIn(bad, hub.subscribers)
+
+
+    @patch('websocket.hub.fetch_live_telemetry', new_callable=AsyncMock, return_value=LIVE_PAYLOAD)
+    async def test_modes_encoded_once_per_frame(self, mock_fetch):
+        """Test that json and delta subscribers each get their own encoding"""
+        hub = LiveTelemetryHub()
+        plain, delta = FakeWebSocket(), FakeWebSocket()
+        hub.subscribers.update({plain: "json", delta: "delta"})
+
+        await hub.publish(LIVE_PAYLOAD)
+        await hub.publish(LIVE_PAYLOAD)
+        await hub.drain()
+
+        self.assertEqual(json.loads(plain.sent[1]), {**LIVE_PAYLOAD, "seq": 2, "stream": STREAM_ID})
+        self.assertEqual(json.loads(delta.sent[0])["type"], "keyframe")
+        second = json.loads(delta.sent[1])
+        self.assertEqual(second["type"], "delta")
+        self.assertEqual(second["seq"], 2)
+        self.assertEqual(second["cars"], [])
+
+
+    async def test_binary_subscriber_gets_dictionary_once(self):
+        """Test that binary clients get the dictionary only when it changes"""
+        hub = LiveTelemetryHub()
+        binary = FakeWebSocket()
+        hub.subscribers[binary] = "binary"
+
+        await hub.publish(LIVE_PAYLOAD)
+        await hub.publish(LIVE_PAYLOAD)
+        await hub.drain()
+
+        self.assertEqual([message[0] for message in binary.sent], [0x01, 0x02, 0x02])
+
+
+class StalledWebSocket(FakeWebSocket):
+    """A client whose sends never complete"""
+
+    def __init__(self):
+        super().__init__()
+        self.closed_with = None
+
+    async def send_text(self, message):
+        await asyncio.Event().wait()
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+class GatedWebSocket(FakeWebSocket):
+    """A client whose sends wait until released"""
+
+    def __init__(self):
+        super().__init__()
+        self.release = asyncio.Event()
+
+    async def send_text(self, message):
+        await self.release.wait()
+        self.sent.append(message)
+
+
+class TestSlowClients(unittest.IsolatedAsyncioTestCase):
+    """Test that one slow client can't hold up the others"""
+
+    async def asyncSetUp(self):
+        hub_module._hubs.clear()
+        _stores.clear()
+        _estimators.clear()
+
+    def frame(self, x):
+        return {"status": "live", "session_key": 1, "cars": [{"driver_number": 1, "x": x, "y": 2}]}
+
+    async def test_fast_client_not_held_up(self):
+        """Test that frames reach a fast client while another is stuck"""
+        hub = LiveTelemetryHub()
+        fast, stuck = FakeWebSocket(), StalledWebSocket()
+        hub.subscribers.update({fast: "json", stuck: "json"})
+
+        for x in range(20):
+            await asyncio.wait_for(hub.publish(self.frame(x)), 0.1)
+        await hub.queues[fast].drain()
+
+        self.assertEqual(len(fast.sent), 20)
+        # The stuck client only holds on to the newest frames
+        self.assertLessEqual(hub.queues[stuck].stats()["queued"], 8)
+        self.assertGreater(hub.queues[stuck].dropped, 0)
+        await hub.stop()
+
+    async def test_dropped_deltas_followed_by_keyframe(self):
+        """Test that a delta client that skipped frames is resynced with a keyframe"""
+        hub = LiveTelemetryHub()
+        ws = FakeWebSocket()
+        hub.subscribers[ws] = "delta"
+        queue = hub._queue(ws)
+        queue.needs_keyframe = True
+
+        await hub.publish(self.frame(1))
+        await hub.publish(self.frame(2))
+        await hub.publish(self.frame(3))
+        queue.needs_keyframe = True
+        await hub.publish(self.frame(4))
+        await hub.drain()
+
+        types = [json.loads(m)["type"] for m in ws.sent]
+        self.assertEqual(types, ["keyframe", "delta", "delta", "keyframe"])
+        self.assertEqual(json.loads(ws.sent[-1])["seq"], 4)
+        await hub.stop()
+
+    async def test_status_change_after_dropped_deltas_is_keyframe(self):
+        """Test that a kept status-change frame never lands on a delta base the client lost"""
+        hub = LiveTelemetryHub()
+        ws = GatedWebSocket()
+        hub.subscribers[ws] = "delta"
+
+        await hub.publish(self.frame(0))
+        await asyncio.sleep(0)  # The writer is now stuck on the first keyframe
+        for x in range(1, 6):
+            await hub.publish(self.frame(x))
+        await hub.publish({**self.frame(6), "status": "stale"})
+        for x in range(7, 15):
+            await hub.publish({**self.frame(x), "status": "stale"})
+        ws.release.set()
+        await hub.drain()
+
+        frames = [json.loads(m) for m in ws.sent]
+        self.assertIn({"type": "keyframe", "seq": 7, "stream": STREAM_ID, **self.frame(6), "status": "stale"}, frames)
+        # Every delta the client did get follows the frame before it
+        for before, after in zip(frames, frames[1:]):
+            if after["type"] == "delta":
+                self.assertEqual(after["seq"], before["seq"] + 1)
+        await hub.stop()
+
+    async def test_lagging_client_disconnected(self):
+        """Test that a client too far behind is closed with 1013 and forgotten"""
+        hub = LiveTelemetryHub()
+        stuck = StalledWebSocket()
+        hub.subscribers[stuck] = "json"
+
+        with patch('websocket.hub.MAX_CLIENT_LAG', 0.02):
+            await hub.publish(self.frame(1))
+            await asyncio.sleep(0.03)
+            await hub.publish(self.frame(2))
+        await asyncio.sleep(0.01)
+
+        self.assertNotIn(stuck, hub.subscribers)
+        self.assertNotIn(stuck, hub.queues)
+        self.assertEqual(stuck.closed_with, 1013)
+        self.assertEqual(hub.evicted, 1)
+
+    async def test_metrics_report_client_lag(self):
+        """Test the per-client numbers behind /api/live/metrics"""
+        hub = hub_module.get_hub(5)
+        ws = FakeWebSocket()
+        hub.subscribers[ws] = "delta"
+        await hub.publish(self.frame(1))
+        await hub.drain()
+
+        metrics = hub_module.live_metrics()
+        self.assertEqual(metrics["hubs"][0]["session_key"], 5)
+        client = metrics["hubs"][0]["clients"][0]
+        self.assertEqual((client["mode"], client["sent"], client["queued"]), ("delta", 1, 0))
+        await hub.stop()
+
+
+class TestResume(unittest.IsolatedAsyncioTestCase):
+    """Test ?since= resumes from the replay ring"""
+
+    async def asyncSetUp(self):
+        hub_module._hubs.clear()
+        hub_module._last_seq.clear()
+        self.hub = LiveTelemetryHub()
+        cars = [{"driver_number": n, "x": 0, "y": 0, "speed": 200} for n in range(1, 21)]
+        for x in range(1, 6):
+            cars = [dict(cars[0], x=x)] + cars[1:]
+            await self.hub.publish({"status": "live", "session_key": 1, "cars": cars})
+
+    async def asyncTearDown(self):
+        await self.hub.stop()
+
+    async def resume(self, mode, since):
+        ws = FakeWebSocket()
+        with patch('websocket.hub.fetch_live_telemetry', new_callable=AsyncMock, return_value={"status": "live"}), \
+                patch.object(self.hub, '_run', AsyncMock()):
+            await self.hub.subscribe(ws, mode, since=since)
+        await self.hub.drain()
+        return [json.loads(m) for m in ws.sent]
+
+    async def test_missed_deltas_replayed(self):
+        """Test that a delta client gets just the frames after the one it last saw"""
+        frames = await self.resume("delta", 2)
+        self.assertEqual([(f["type"], f["seq"]) for f in frames], [("delta", 3), ("delta", 4), ("delta", 5)])
+        self.assertEqual(frames[-1]["cars"], [{"driver_number": 1, "x": 5}])
+
+    async def test_up_to_date_client_sent_nothing(self):
+        """Test that a client that missed no frames isn't resent the current one"""
+        self.assertEqual(await self.resume("delta", 5), [])
+        self.assertEqual(await self.resume("json", 5), [])
+
+    async def test_large_gap_gets_keyframe(self):
+        """Test that a gap outside the ring, or costlier than a keyframe, gets one keyframe"""
+        self.hub.replay = deque(list(self.hub.replay)[-2:], maxlen=2)
+        frames = await self.resume("delta", 1)
+        self.assertEqual([(f["type"], f["seq"]) for f in frames], [("keyframe", 5)])
+        # A since from the future (e.g. before a restart) can't be replayed either
+        self.assertEqual(await self.resume("delta", 99), frames)
+
+    async def test_json_client_gets_latest_frame(self):
+        """Test that a json resume is sent the current full frame with its seq"""
+        frames = await self.resume("json", 3)
+        self.assertEqual(len(frames), 1)
+        self.assertEqual(frames[0]["seq"], 5)
+
+    async def test_token_from_before_restart_gets_current_frame(self):
+        """Test that a resume token from another stream is ignored, even if its seq matches"""
+        self.assertEqual(parse_since(f"{STREAM_ID}.5"), 5)
+        for token in ("5", "0000dead.5", f"{STREAM_ID}.x", ""):
+            self.assertIsNone(parse_since(token))
+
+        frames = await self.resume("delta", parse_since("0000dead.5"))
+        self.assertEqual([(f["type"], f["seq"], f["stream"]) for f in frames], [("keyframe", 5, STREAM_ID)])
+        frames = await self.resume("json", parse_since("0000dead.5"))
+        self.assertEqual([(f["seq"], f["stream"]) for f in frames], [(5, STREAM_ID)])
+
+    async def test_binary_resume(self):
+        """Test that a binary client resumes with the stream from its dictionary"""
+        ws, resumed = FakeWebSocket(), FakeWebSocket()
+        with patch.object(self.hub, '_run', AsyncMock()):
+            await self.hub.subscribe(ws, "binary")
+            await self.hub.drain()
+            stream = json.loads(ws.sent[0][1:])["stream"]
+            self.assertEqual(stream, STREAM_ID)
+
+            await self.hub.subscribe(resumed, "binary", since=parse_since(f"{stream}.{self.hub.delta.seq}"))
+            await self.hub.drain()
+            self.assertEqual(resumed.sent, [self.hub.binary.dictionary()])
+
+            restarted = FakeWebSocket()
+            await self.hub.subscribe(restarted, "binary", since=parse_since(f"0000dead.{self.hub.delta.seq}"))
+            await self.hub.drain()
+        self.assertEqual(restarted.sent, [self.hub.binary.dictionary(), self.hub.binary_frame()])
+
+    async def test_recreated_hub_keeps_counting(self):
+        """Test that seq keeps increasing after a session's hub is released and recreated"""
+        hub = get_hub(7)
+        ws = FakeWebSocket()
+        with patch('websocket.hub.fetch_live_telemetry', new_callable=AsyncMock, return_value=LIVE_PAYLOAD):
+            await hub.subscribe(ws)
+            await asyncio.sleep(0.01)
+            await release_hub(hub, ws)
+        seq = hub.delta.seq
+
+        recreated = get_hub(7)
+        await recreated.publish(LIVE_PAYLOAD)
+        self.assertEqual(recreated.delta.seq, seq + 1)
+        self.assertEqual(recreated.replay_since(seq), [recreated.delta.keyframe()])
+
+
+class TestProjections(unittest.IsolatedAsyncioTestCase):
+    """Test field and driver filtered subscriptions"""
+
+    CARS = [
+        {"driver_number": 1, "position": 1, "gap": "LEADER", "x": 10, "tyre": "SOFT"},
+        {"driver_number": 44, "position": 2, "gap": "+1.2s", "x": 20, "tyre": "HARD"},
+        {"driver_number": 16, "position": 3, "gap": "+3.4s", "x": 30, "tyre": "SOFT"},
+    ]
+
+    async def asyncSetUp(self):
+        hub_module._hubs.clear()
+        self.hub = LiveTelemetryHub()
+        await self.hub.publish({"status": "live", "session_key": 1, "cars": self.CARS})
+
+    async def asyncTearDown(self):
+        await self.hub.stop()
+
+    def subscriber(self, mode, command):
+        ws = FakeWebSocket()
+        self.hub.subscribers[ws] = mode
+        self.assertTrue(self.hub.set_projection(ws, parse_projection(command)))
+        return ws
+
+    async def test_projected_frames(self):
+        """Test that a filtered client gets only its drivers and fields"""
+        ws = self.subscriber("json", {"type": "subscribe", "fields": ["position", "gap"], "drivers": [44, 1]})
+        await self.hub.drain()
+
+        frame = json.loads(ws.sent[0])
+        self.assertEqual(frame["seq"], 1)
+        self.assertEqual(frame["cars"], [
+            {"driver_number": 1, "gap": "LEADER", "position": 1},
+            {"driver_number": 44, "gap": "+1.2s", "position": 2},
+        ])
+
+    async def test_identical_projections_share_one_encoding(self):
+        """Test that equal subscriptions are encoded once per frame"""
+        first = self.subscriber("delta", {"fields": ["gap", "position"], "drivers": [1]})
+        second = self.subscriber("delta", {"fields": ["position", "gap"], "drivers": [1, 1]})
+        self.subscriber("delta", {"drivers": [16]})
+        self.assertEqual(len(self.hub.views), 2)
+
+        moved = [dict(self.CARS[0], x=11), dict(self.CARS[1], gap="+0.9s"), self.CARS[2]]
+        await self.hub.publish({"status": "live", "session_key": 1, "cars": moved})
+        await self.hub.drain()
+
+        self.assertIs(first.sent[-1], second.sent[-1])
+        delta = json.loads(first.sent[-1])
+        # Car 1's x isn't projected and car 44 isn't followed, so nothing changed
+        self.assertEqual((delta["type"], delta["seq"], delta["cars"]), ("delta", 2, []))
+
+    async def test_projection_released_with_last_subscriber(self):
+        """Test that views go away with the subscribers that asked for them"""
+        ws = self.subscriber("json", {"drivers": [1]})
+        self.assertTrue(self.hub.set_projection(ws, None))
+        self.assertEqual(self.hub.views, {})
+        await self.hub.drain()
+        self.assertEqual(len(json.loads(ws.sent[-1])["cars"]), 3)
+
+        self.subscriber("json", {"drivers": [1]})
+        await self.hub.unsubscribe(next(iter(self.hub.projections)))
+        self.assertEqual(self.hub.views, {})
+
+    async def test_binary_subscriptions_unchanged(self):
+        """Test that binary clients can't be projected"""
+        ws = FakeWebSocket()
+        self.hub.subscribers[ws] = "binary"
+        self.assertFalse(self.hub.set_projection(ws, parse_projection({"drivers": [1]})))
+
+    def test_parse_projection(self):
+        """Test subscription validation"""
+        self.assertIsNone(parse_projection({"type": "subscribe"}))
+        self.assertEqual(parse_projection({"fields": ["gap"]}), (("driver_number", "gap"), None))
+        for bad in ({"fields": "gap"}, {"drivers": ["1"]}, {"drivers": [True]}, {"fields": ["x"] * 40}):
+            with self.assertRaises(ValueError):
+                parse_projection(bad)
+
+
+class TestEventStream(unittest.IsolatedAsyncioTestCase):
+    """Test Server-Sent Events subscribers of the hub"""
+
+    async def asyncSetUp(self):
+        hub_module._hubs.clear()
+        self.hub = LiveTelemetryHub()
+        self.hub._run = AsyncMock()
+        await self.hub.publish(LIVE_PAYLOAD)
+
+    async def asyncTearDown(self):
+        await self.hub.stop()
+
+    async def events(self, client, count):
+        return [await asyncio.wait_for(client.next_event(), 0.5) for _ in range(count)]
+
+    async def test_frames_encoded_once_for_all_clients(self):
+        """Test that every SSE client is sent the same event, tagged with its seq"""
+        first, second = EventStreamClient(), EventStreamClient()
+        await self.hub.subscribe(first, SSE_MODE)
+        await self.hub.subscribe(second, SSE_MODE)
+        await self.hub.publish({**LIVE_PAYLOAD, "status": "stale"})
+
+        events = await self.events(first, 2)
+        self.assertEqual(events, await self.events(second, 2))
+        self.assertIs(events[1], self.hub.sse_frame())
+        self.assertTrue(events[1].startswith(f"id: {STREAM_ID}.2\ndata: "))
+        self.assertTrue(events[1].endswith("\n\n"))
+        self.assertEqual(json.loads(events[1].split("data: ", 1)[1]), {**LIVE_PAYLOAD, "status": "stale", "seq": 2, "stream": STREAM_ID})
+
+    async def test_heartbeat_event(self):
+        """Test that unchanged frames go out as heartbeat events"""
+        client = EventStreamClient()
+        await self.hub.subscribe(client, SSE_MODE)
+        await self.hub.heartbeat()
+
+        heartbeat = (await self.events(client, 2))[1]
+        self.assertTrue(heartbeat.startswith("event: heartbeat\ndata: "))
+        self.assertEqual(json.loads(heartbeat.split("data: ", 1)[1])["seq"], 1)
+
+    async def test_last_event_id_resume(self):
+        """Test that a client reconnecting with the current id isn't resent the frame"""
+        client = EventStreamClient()
+        await self.hub.subscribe(client, SSE_MODE, since=1)
+        await self.hub.publish({**LIVE_PAYLOAD, "cars": []})
+        self.assertTrue((await self.events(client, 1))[0].startswith(f"id: {STREAM_ID}.2\n"))
+
+    async def test_closed_stream_ends(self):
+        """Test that closing the client (e.g. for lagging) ends the event stream"""
+        client = EventStreamClient()
+        await client.send_text("id: 1\ndata: {}\n\n")
+        await client.close(1013)
+        self.assertIsNone(await client.next_event())
+
+
+class TestUnchangedFrames(unittest.IsolatedAsyncioTestCase):
+    """Test that unchanged snapshots go out as heartbeats"""
+
+    async def asyncSetUp(self):
+        hub_module._hubs.clear()
+        _stores.clear()
+        _estimators.clear()
+
+    async def test_same_snapshot_sends_heartbeat(self):
+        """Test that a repeated snapshot object is not re-encoded or re-sent"""
+        snapshot = {"status": "live", "session_key": 2, "cars": [{"driver_number": 1, "x": 1, "y": 2}]}
+        hub = LiveTelemetryHub()
+        plain, delta, binary = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        hub.subscribers.update({plain: "json", delta: "delta", binary: "binary"})
+
+        with patch('websocket.hub.fetch_live_telemetry', new_callable=AsyncMock, return_value=snapshot), \
+                patch('websocket.hub.LIVE_POLL_INTERVAL', 0.01):
+            hub._task = asyncio.create_task(hub._run())
+            await asyncio.sleep(0.035)
+            await hub.drain()
+            await hub.stop()
+
+        self.assertEqual(hub.delta.seq, 1)
+        heartbeats = [json.loads(m) for m in plain.sent[1:]]
+        self.assertGreaterEqual(len(heartbeats), 2)
+        self.assertTrue(all(h["type"] == "heartbeat" and h["seq"] == 1 for h in heartbeats))
+        self.assertEqual(json.loads(delta.sent[1])["type"], "heartbeat")
+        self.assertEqual(binary.sent[2][0], 0x05)
+
+    def test_new_snapshot_is_published(self):
+        """Test that a frame counts as unchanged only if it shows nothing new"""
+        hub = LiveTelemetryHub()
+        first = {"status": "live", "cars": [{"driver_number": 1, "x": 1}], "timestamp": "12:00:00"}
+        hub.delta.push(first)
+
+        self.assertTrue(hub.unchanged(first))
+        self.assertTrue(hub.unchanged({**first, "timestamp": "12:00:01"}))
+        self.assertFalse(hub.unchanged({**first, "cars": [{"driver_number": 1, "x": 2}]}))
+        self.assertFalse(hub.unchanged({**first, "status": "stale"}))
+        self.assertFalse(hub.unchanged({**first, "message": "Red flag"}))
+
+    async def test_repeated_stale_responses_send_heartbeats(self):
+        """Test that stale copies, a new dict with a growing age each time, become heartbeats"""
+        ages = iter(range(1, 100))
+
+        async def fetch(session_key):
+            return {"status": "stale", "session_key": 2, "cars": [{"driver_number": 1, "x": 1}], "age": next(ages)}
+
+        hub = LiveTelemetryHub()
+        plain = FakeWebSocket()
+        hub.subscribers[plain] = "json"
+        with patch('websocket.hub.fetch_live_telemetry', fetch), \
+                patch('websocket.hub.IDLE_POLL_INTERVAL', 0.01):
+            hub._task = asyncio.create_task(hub._run())
+            await asyncio.sleep(0.035)
+            await hub.drain()
+            await hub.stop()
+
+        self.assertEqual(hub.delta.seq, 1)
+        self.assertGreaterEqual(len(plain.sent), 3)
+        self.assertTrue(all(json.loads(m)["type"] == "heartbeat" for m in plain.sent[1:]))
+
+
+class TestInterpolatedStream(unittest.IsolatedAsyncioTestCase):
+    """Test the ?interp= positions stream"""
+
+    async def asyncSetUp(self):
+        hub_module._hubs.clear()
+        _stores.clear()
+        _estimators.clear()
+        store = TelemetryStore(capacity=8)
+        store.append(1, 1000, 0.0, 0.0, 0.0)
+        store.append(1, 2000, 100.0, 200.0, 0.0)
+        _stores[1] = store
+
+    @patch('websocket.hub.now_ms', return_value=1500 + DEFAULT_DELAY_MS)
+    @patch('websocket.hub.fetch_live_telemetry', new_callable=AsyncMock, return_value=LIVE_PAYLOAD)
+    async def test_positions_frames_without_extra_fetches(self, mock_fetch, mock_now):
+        """Test that interp subscribers get interpolated ticks from the recorded history"""
+        hub = LiveTelemetryHub()
+        plain, smooth = FakeWebSocket(), FakeWebSocket()
+
+        await hub.subscribe(plain)
+        await hub.subscribe(smooth, interp_rate=30)
+        await asyncio.sleep(0.12)
+        await hub.drain()
+        await hub.stop()
+
+        positions = [json.loads(m) for m in smooth.sent if json.loads(m).get("type") == "positions"]
+        self.assertGreaterEqual(len(positions), 3)
+        self.assertEqual(positions[0]["cars"], [{"driver_number": 1, "x": 50.0, "y": 100.0, "z": 0.0}])
+        self.assertEqual([p["seq"] for p in positions], list(range(1, len(positions) + 1)))
+
+        # Plain subscribers are unaffected and OpenF1 was polled once
+        self.assertFalse(any("positions" in m for m in plain.sent))
+        self.assertEqual(mock_fetch.call_count, 1)
+
+    @patch('websocket.hub.now_ms', return_value=11500)
+    def test_playout_places_cars_at_measured_delay(self, mock_now):
+        """Test that live frames carry the estimated delay and positions at the playout clock"""
+        get_estimator(1).observe(7500, 11500)  # delay = 7.5s lag + 2.5s margin
+        hub = LiveTelemetryHub()
+
+        frame = hub.playout(LIVE_PAYLOAD)
+
+        self.assertEqual(frame["delay"], 10.0)
+        self.assertEqual(frame["cars"][0]["x"], 50.0)
+        self.assertEqual(frame["cars"][0]["y"], 100.0)
+        # The cached snapshot itself is left alone
+        self.assertEqual(LIVE_PAYLOAD["cars"][0]["x"], 1)
+        self.assertIs(hub.playout({"status": "offline", "cars": []})["status"], "offline")
+
+    async def test_frames_keep_steady_cadence(self):
+        """Test that a slow fetch doesn't push every later frame back"""
+        delays = iter([0.03, 0.0, 0.0, 0.0, 0.0, 0.0])
+
+        async def fetch(session_key):
+            await asyncio.sleep(next(delays, 0.0))
+            return {"status": "live", "session_key": 9, "cars": []}
+
+        hub = LiveTelemetryHub()
+        ws = FakeWebSocket()
+        loop = asyncio.get_running_loop()
+        stamps = []
+
+        async def publish(data):
+            stamps.append(loop.time())
+
+        with patch('websocket.hub.fetch_live_telemetry', fetch), \
+                patch('websocket.hub.LIVE_POLL_INTERVAL', 0.05), \
+                patch.object(hub, 'publish', publish):
+            await hub.subscribe(ws)
+            await asyncio.sleep(0.24)
+            await hub.stop()
+
+        gaps = [b - a for a, b in zip(stamps[1:], stamps[2:])]
+        self.assertGreaterEqual(len(gaps), 2)
+        for gap in gaps:
+            self.assertAlmostEqual(gap, 0.05, delta=0.015)
+
+    async def test_unsubscribe_stops_ticks(self):
+        """Test that the interpolation task goes away with its subscribers"""
+        hub = LiveTelemetryHub()
+        ws = FakeWebSocket()
+        with patch('websocket.hub.fetch_live_telemetry', new_callable=AsyncMock, return_value=LIVE_PAYLOAD):
+            await hub.subscribe(ws, interp_rate=10)
+            await hub.unsubscribe(ws)
+        self.assertEqual(hub.interp, {})
+        self.assertIsNone(hub._interp_task)
+
+
+class TestDeltaFrames(unittest.TestCase):
+    """Test snapshot-plus-delta frame encoding"""
+
+    def test_diff_cars_sends_changed_fields_only(self):
+        """Test that unchanged fields and cars are left out of a delta"""
+        previous = [
+            {"driver_number": 1, "x": 1, "y": 2, "tyre": "SOFT"},
+            {"driver_number": 11, "x": 5, "y": 6, "tyre": "HARD"},
+            {"driver_number": 44, "x": 9, "y": 9, "tyre": "HARD"},
+        ]
+        current = [
+            {"driver_number": 1, "x": 3, "y": 2, "tyre": "SOFT"},
+            {"driver_number": 11, "x": 5, "y": 6, "tyre": "HARD"},
+            {"driver_number": 4, "x": 7, "y": 7, "tyre": "MEDIUM"},
+        ]
+
+        changed, removed = diff_cars(previous, current)
+
+        self.assertEqual(changed, [{"driver_number": 1, "x": 3}, current[2]])
+        self.assertEqual(removed, [44])
+
+    def test_periodic_keyframes(self):
+        """Test that keyframes are sent first and then every interval"""
+        encoder = DeltaEncoder(keyframe_interval=3)
+        types = []
+        for _ in range(7):
+            encoder.push({"status": "live", "cars": []})
+            types.append(json.loads(encoder.encode())["type"])
+
+        self.assertEqual(types, ["keyframe", "delta", "delta", "keyframe", "delta", "delta", "keyframe"])
+        self.assertEqual(json.loads(encoder.keyframe())["seq"], 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+"""
+SilverWall Backend - Unit Tests for Per-Client Send Queues
+Tests the bounded outbound queue behind every /ws/live subscriber.
+"""
+import unittest
+import asyncio
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from websocket.outbound import ClientQueue
+
+
+class BlockedWebSocket:
+    """WebSocket stand-in whose sends wait until released"""
+
+    def __init__(self):
+        self.sent = []
+        self.release = asyncio.Event()
+
+    async def send_text(self, message):
+        await self.release.wait()
+        self.sent.append(message)
+
+    async def send_bytes(self, message):
+        await self.send_text(message)
+
+
+async def ignore_error(websocket):
+    pass
+
+
+class TestClientQueue(unittest.IsolatedAsyncioTestCase):
+    """Test what a backed-up client keeps and what it skips"""
+
+    async def asyncSetUp(self):
+        self.ws = BlockedWebSocket()
+        self.queue = ClientQueue(self.ws, ignore_error, max_size=3)
+        # The writer picks up the first message and blocks on it
+        self.queue.put(["first"])
+        await asyncio.sleep(0)
+
+    async def asyncTearDown(self):
+        await self.queue.close()
+
+    async def flush(self):
+        self.ws.release.set()
+        await self.queue.drain()
+        return self.ws.sent
+
+    async def test_stale_frames_dropped_for_latest(self):
+        """Test that a full queue drops its oldest droppable frames"""
+        for frame in range(6):
+            self.queue.put([f"frame {frame}"], droppable=True)
+
+        self.assertEqual(await self.flush(), ["first", "frame 3", "frame 4", "frame 5"])
+        self.assertEqual(self.queue.dropped, 3)
+
+    async def test_kept_messages_never_dropped(self):
+        """Test that keyframes and status changes survive a full queue"""
+        self.queue.put(["keyframe"])
+        for frame in range(5):
+            self.queue.put([f"frame {frame}"], droppable=True)
+        self.queue.put(["finished"])
+
+        self.assertEqual(await self.flush(), ["first", "keyframe", "frame 4", "finished"])
+
+    async def test_dropped_delta_drops_the_chain(self):
+        """Test that losing one delta discards the rest and asks for a keyframe"""
+        self.queue.put(["keyframe"])
+        for frame in range(3):
+            self.queue.put([f"delta {frame}"], droppable=True, delta=True)
+
+        self.assertTrue(self.queue.needs_keyframe)
+        self.assertEqual(await self.flush(), ["first", "keyframe"])
+
+    async def test_lag_counts_the_stuck_send(self):
+        """Test that lag covers a message the socket hasn't accepted yet"""
+        await asyncio.sleep(0.05)
+        self.assertGreaterEqual(self.queue.lag(), 0.05)
+        await self.flush()
+        self.assertEqual(self.queue.lag(), 0.0)
+        self.assertEqual(self.queue.stats()["sent"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
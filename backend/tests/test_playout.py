@@ -0,0 +1,92 @@
+"""
+SilverWall Backend - Unit Tests for the Live Playout Delay
+Tests lag measurement and how the playout delay adapts to it.
+"""
+import unittest
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from playout import (
+    DelayEstimator, get_estimator, playout_delay_ms, _estimators, _ESTIMATORS_MAX_SIZE,
+    DEFAULT_DELAY_MS, MIN_DELAY_MS, PLAYOUT_MARGIN_MS, DELAY_FALL_RATE, DELAY_RISE_RATE
+)
+
+
+class TestDelayEstimator(unittest.TestCase):
+    """Test the adaptive playout delay"""
+
+    def test_default_until_measured(self):
+        """Test that the default delay is used before any lag is seen"""
+        self.assertEqual(DelayEstimator().delay_ms(), DEFAULT_DELAY_MS)
+
+    def test_first_lag_sets_delay(self):
+        """Test that the delay covers the lag plus the playout margin"""
+        estimator = DelayEstimator()
+        estimator.observe(3000, 0)
+        self.assertEqual(estimator.delay_ms(), 3000 + PLAYOUT_MARGIN_MS)
+
+    def test_delay_has_a_floor(self):
+        """Test that tiny lags still leave a minimum buffer"""
+        estimator = DelayEstimator()
+        estimator.observe(-200, 0)  # Clock skew
+        self.assertEqual(estimator.delay_ms(), max(PLAYOUT_MARGIN_MS, MIN_DELAY_MS))
+
+    def test_delay_moves_slower_than_real_time(self):
+        """Test that the delay rises and falls gradually so the playout clock never rewinds"""
+        estimator = DelayEstimator(window=1)
+        estimator.observe(1000, 0)
+        start = estimator.delay_ms()
+
+        estimator.observe(9000, 1000)
+        self.assertEqual(estimator.delay_ms(), start + DELAY_RISE_RATE)
+
+        estimator.observe(1000, 2000)
+        self.assertEqual(estimator.delay_ms(), start + DELAY_RISE_RATE - DELAY_FALL_RATE)
+
+    def test_outliers_beyond_quantile(self):
+        """Test that the delay follows the p95 lag, not a single late sample"""
+        estimator = DelayEstimator()
+        for i in range(99):
+            estimator.observe(2000, 0)
+        estimator.observe(15000, 0)
+        self.assertEqual(estimator.quantile(0.95), 2000)
+        self.assertEqual(estimator.stats()["lag_p50_ms"], 2000)
+
+    def test_historical_lags_ignored(self):
+        """Test that lags from non-live data are not measured"""
+        estimator = DelayEstimator()
+        estimator.observe(3600 * 1000, 0)
+        self.assertEqual(len(estimator.lags), 0)
+        self.assertEqual(estimator.delay_ms(), DEFAULT_DELAY_MS)
+
+
+class TestEstimatorRegistry(unittest.TestCase):
+    """Test the per-session estimators"""
+
+    def setUp(self):
+        _estimators.clear()
+
+    def test_keeps_newest_sessions(self):
+        """Test that only the newest few sessions are kept"""
+        for session_key in range(_ESTIMATORS_MAX_SIZE + 1):
+            get_estimator(session_key)
+        self.assertNotIn(0, _estimators)
+        self.assertIs(get_estimator(_ESTIMATORS_MAX_SIZE), _estimators[_ESTIMATORS_MAX_SIZE])
+
+    def test_estimator_in_use_not_evicted(self):
+        """Test that eviction drops the least recently used session, not the oldest"""
+        live = get_estimator(1)
+        for session_key in range(2, _ESTIMATORS_MAX_SIZE + 3):
+            get_estimator(1)
+            get_estimator(session_key)
+        self.assertIs(_estimators.get(1), live)
+
+    def test_unknown_session_uses_default(self):
+        """Test the delay for a session nothing has been measured for"""
+        self.assertEqual(playout_delay_ms(None), DEFAULT_DELAY_MS)
+
+
+if __name__ == '__main__':
+    unittest.main()
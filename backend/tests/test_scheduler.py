@@ -0,0 +1,86 @@
+"""
+SilverWall Backend - Unit Tests for the OpenF1 Request Scheduler
+Tests token budgeting, priority ordering and load shedding.
+"""
+import unittest
+import asyncio
+import sys
+import os
+from unittest.mock import patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from openf1_scheduler import (
+    RequestScheduler, RequestShed,
+    PRIORITY_LIVE, PRIORITY_SESSION, PRIORITY_ON_DEMAND, PRIORITY_BACKGROUND
+)
+
+
+class TestRequestScheduler(unittest.IsolatedAsyncioTestCase):
+    """Test the priority token bucket"""
+
+    async def test_burst_then_rate_limited(self):
+        """Test that the burst is spent immediately and then refilled at the rate"""
+        scheduler = RequestScheduler(rate=50, burst=3)
+        for _ in range(3):
+            await scheduler.acquire(PRIORITY_LIVE)
+        self.assertLess(scheduler.tokens, 1)
+
+        start = asyncio.get_running_loop().time()
+        await scheduler.acquire(PRIORITY_LIVE)
+        self.assertGreaterEqual(asyncio.get_running_loop().time() - start, 0.01)
+        self.assertEqual(scheduler.granted[PRIORITY_LIVE], 4)
+
+    async def test_try_acquire_never_queues(self):
+        """Test that try_acquire takes a free token but won't wait or jump the queue"""
+        scheduler = RequestScheduler(rate=50, burst=1)
+        self.assertTrue(scheduler.try_acquire(PRIORITY_LIVE))
+        self.assertFalse(scheduler.try_acquire(PRIORITY_LIVE))
+        self.assertEqual(scheduler.granted[PRIORITY_LIVE], 1)
+
+    async def test_higher_priority_served_first(self):
+        """Test that queued live requests go ahead of queued on-demand ones"""
+        scheduler = RequestScheduler(rate=100, burst=1)
+        await scheduler.acquire(PRIORITY_LIVE)  # Empty the bucket
+
+        order = []
+
+        async def request(priority, name):
+            await scheduler.acquire(priority)
+            order.append(name)
+
+        low = asyncio.create_task(request(PRIORITY_ON_DEMAND, "radio"))
+        await asyncio.sleep(0)
+        high = asyncio.create_task(request(PRIORITY_LIVE, "live"))
+        await asyncio.gather(low, high)
+
+        self.assertEqual(order, ["live", "radio"])
+
+    async def test_background_sheds_when_budget_tight(self):
+        """Test that background work can't take the reserve and is shed"""
+        scheduler = RequestScheduler(rate=0.1, burst=4)
+        await scheduler.acquire(PRIORITY_LIVE)
+        await scheduler.acquire(PRIORITY_LIVE)
+        await scheduler.acquire(PRIORITY_LIVE)  # 1 token left, reserve is 2
+
+        with self.assertRaises(RequestShed):
+            await scheduler.acquire(PRIORITY_BACKGROUND)
+        self.assertEqual(scheduler.shed[PRIORITY_BACKGROUND], 1)
+
+        # Live traffic still gets the remaining token
+        await scheduler.acquire(PRIORITY_LIVE)
+        self.assertEqual(scheduler.stats()["waiting"]["background"], 0)
+
+    async def test_wait_limit_sheds(self):
+        """Test that a queued request is shed once its wait limit passes"""
+        scheduler = RequestScheduler(rate=0.01, burst=1)
+        await scheduler.acquire(PRIORITY_LIVE)
+
+        with patch.dict('openf1_scheduler._MAX_WAIT_SECONDS', {PRIORITY_SESSION: 0.05}):
+            with self.assertRaises(RequestShed):
+                await scheduler.acquire(PRIORITY_SESSION)
+        self.assertEqual(scheduler.stats()["shed"]["session"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
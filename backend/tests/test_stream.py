@@ -0,0 +1,162 @@
+"""
+SilverWall Backend - Unit Tests for the OpenF1 Broker Connection
+Tests the MQTT subscriber against a local broker stand-in.
+"""
+import unittest
+import asyncio
+import json
+import sys
+import os
+from unittest.mock import patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from openf1_stream import (
+    BrokerStream, encode_packet, read_packet, parse_publish, _encode_string,
+    CONNECT, CONNACK, PUBLISH, SUBSCRIBE, SUBACK, PINGREQ, PINGRESP,
+)
+
+
+class StandInBroker:
+    """Local MQTT 3.1.1 broker stand-in: accepts one subscriber and publishes scripted messages"""
+
+    def __init__(self, refuse=False):
+        self.refuse = refuse
+        self.connects = []
+        self.subscriptions = []
+        self.pings = 0
+        self.subscribed = asyncio.Event()
+        self.writer = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        self.url = f"mqtt://127.0.0.1:{self.server.sockets[0].getsockname()[1]}"
+
+    async def stop(self):
+        self.server.close()
+        if self.writer is not None:
+            self.writer.close()
+        await self.server.wait_closed()
+
+    async def handle(self, reader, writer):
+        self.writer = writer
+        try:
+            while True:
+                packet_type, flags, body = await read_packet(reader)
+                if packet_type == CONNECT:
+                    self.connects.append(body)
+                    writer.write(encode_packet(CONNACK, 0, bytes([0, 5 if self.refuse else 0])))
+                elif packet_type == SUBSCRIBE:
+                    pos, topics = 2, []
+                    while pos < len(body):
+                        length = int.from_bytes(body[pos:pos + 2], "big")
+                        topics.append(body[pos + 2:pos + 2 + length].decode())
+                        pos += 2 + length + 1
+                    self.subscriptions.append(topics)
+                    writer.write(encode_packet(SUBACK, 0, body[:2] + bytes(len(topics))))
+                    self.subscribed.set()
+                elif packet_type == PINGREQ:
+                    self.pings += 1
+                    writer.write(encode_packet(PINGRESP, 0, b""))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def publish(self, topic, data):
+        self.writer.write(encode_packet(PUBLISH, 0, _encode_string(topic) + json.dumps(data).encode()))
+        await self.writer.drain()
+
+
+class TestBrokerStream(unittest.IsolatedAsyncioTestCase):
+    """Test subscribing to the broker and decoding pushed messages"""
+
+    async def asyncSetUp(self):
+        self.broker = StandInBroker()
+        await self.broker.start()
+        self.received = []
+
+    async def asyncTearDown(self):
+        await self.broker.stop()
+
+    async def test_subscribes_and_delivers_messages(self):
+        """Test that every topic is subscribed and published samples reach the callback"""
+        async def token():
+            return "secret-token"
+
+        stream = BrokerStream(self.broker.url, ["v1/location", "v1/position"],
+                              lambda topic, data: self.received.append((topic, data)),
+                              token_provider=token, username="fan@example.com")
+        stream.start()
+        await asyncio.wait_for(self.broker.subscribed.wait(), 2)
+        await asyncio.sleep(0.01)
+        self.assertTrue(stream.connected)
+
+        sample = {"session_key": 9, "driver_number": 1, "x": 10, "date": "2024-01-01T12:00:00+00:00"}
+        await self.broker.publish("v1/location", sample)
+        await asyncio.sleep(0.05)
+        await stream.stop()
+
+        self.assertEqual(self.broker.subscriptions, [["v1/location", "v1/position"]])
+        self.assertEqual(self.received, [("v1/location", sample)])
+        # The access token goes in the MQTT password field
+        self.assertTrue(self.broker.connects[0].endswith(_encode_string("fan@example.com") + _encode_string("secret-token")))
+        self.assertFalse(stream.connected)
+
+    async def test_keepalive_pings(self):
+        """Test that the client pings the broker so the connection stays up while idle"""
+        stream = BrokerStream(self.broker.url, ["v1/location"], lambda topic, data: None, keepalive=1)
+        stream.start()
+        await asyncio.sleep(0.7)
+        await stream.stop()
+        self.assertGreaterEqual(self.broker.pings, 1)
+
+    async def test_refused_connection_is_not_connected(self):
+        """Test that a refused CONNACK leaves the stream disconnected and retrying"""
+        refusing = StandInBroker(refuse=True)
+        await refusing.start()
+        stream = BrokerStream(refusing.url, ["v1/location"], lambda topic, data: None)
+        stream.start()
+        await asyncio.sleep(0.05)
+        self.assertFalse(stream.connected)
+        self.assertEqual(refusing.subscriptions, [])
+        await stream.stop()
+        await refusing.stop()
+
+    async def test_backoff_resets_after_working_connection(self):
+        """Test that a dropped connection that had subscribed reconnects quickly despite earlier failures"""
+        self.broker.refuse = True
+        with patch('openf1_stream.RECONNECT_MIN_DELAY', 0.01):
+            stream = BrokerStream(self.broker.url, ["v1/location"], lambda topic, data: None)
+            stream.start()
+            while len(self.broker.connects) < 6:
+                await asyncio.sleep(0.01)
+            # Backed off to 0.32s by now; the next attempt gets through
+            self.broker.refuse = False
+            await asyncio.wait_for(self.broker.subscribed.wait(), 1)
+            await asyncio.sleep(0.01)
+
+            self.broker.subscribed.clear()
+            self.broker.writer.close()
+            await asyncio.wait_for(self.broker.subscribed.wait(), 0.2)
+            await asyncio.sleep(0.01)
+            await stream.stop()
+
+
+class TestPacketCodec(unittest.TestCase):
+    """Test the MQTT packet helpers"""
+
+    def test_publish_with_packet_id(self):
+        """Test that QoS 1 publishes expose their packet id"""
+        body = _encode_string("v1/position") + (7).to_bytes(2, "big") + b"{}"
+        self.assertEqual(parse_publish(0x02, body), ("v1/position", 7, b"{}"))
+
+    def test_long_remaining_length(self):
+        """Test the variable-length size encoding past one byte"""
+        packet = encode_packet(PUBLISH, 0, b"x" * 300)
+        self.assertEqual(packet[1:3], bytes([0xAC, 0x02]))
+
+
+if __name__ == '__main__':
+    unittest.main()
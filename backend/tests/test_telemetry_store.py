@@ -0,0 +1,114 @@
+"""
+SilverWall Backend - Unit Tests for the Telemetry Ring Buffers
+Tests append, wrap-around, deduplication and time-window slicing.
+"""
+import unittest
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from telemetry_store import DriverRing, TelemetryStore, get_store, _stores, _STORES_MAX_SIZE
+
+
+class TestDriverRing(unittest.TestCase):
+    """Test the per-driver ring buffer"""
+
+    def test_append_and_window(self):
+        """Test that a window returns samples in [start, end)"""
+        ring = DriverRing(capacity=10)
+        for i in range(5):
+            ring.append(1000 * i, float(i), float(-i), 0.0)
+
+        t, x, y, z = ring.window(1000, 3000)
+        self.assertEqual(list(t), [1000, 2000])
+        self.assertEqual(list(x), [1.0, 2.0])
+        self.assertEqual(list(y), [-1.0, -2.0])
+
+    def test_wrap_around_keeps_newest(self):
+        """Test that a full buffer overwrites the oldest samples"""
+        ring = DriverRing(capacity=4)
+        for i in range(7):
+            ring.append(i, float(i), 0.0, 0.0)
+
+        self.assertEqual(len(ring), 4)
+        t, x, _, _ = ring.window(0, 100)
+        self.assertEqual(list(t), [3, 4, 5, 6])
+        # Window spanning the physical end of the arrays
+        t, _, _, _ = ring.window(4, 6)
+        self.assertEqual(list(t), [4, 5])
+        self.assertEqual(list(ring.tail(2)[0]), [5, 6])
+
+    def test_duplicates_and_older_samples_ignored(self):
+        """Test that overlap re-reads don't add samples twice"""
+        ring = DriverRing(capacity=4)
+        self.assertTrue(ring.append(10, 1.0, 1.0, 1.0))
+        self.assertFalse(ring.append(10, 1.0, 1.0, 1.0))
+        self.assertFalse(ring.append(5, 2.0, 2.0, 2.0))
+        self.assertEqual(len(ring), 1)
+        self.assertEqual(ring.last_time(), 10)
+
+    def test_empty_window(self):
+        """Test windows with no samples"""
+        ring = DriverRing(capacity=4)
+        self.assertEqual(len(ring.window(0, 10)[0]), 0)
+        ring.append(50, 0.0, 0.0, 0.0)
+        self.assertEqual(len(ring.window(0, 10)[0]), 0)
+
+
+class TestTelemetryStore(unittest.TestCase):
+    """Test the per-session store"""
+
+    def setUp(self):
+        _stores.clear()
+
+    def test_interpolate_between_samples(self):
+        """Test that every car is blended between the samples around the render time"""
+        store = TelemetryStore(capacity=8)
+        store.append(1, 1000, 0.0, 0.0, 0.0)
+        store.append(1, 2000, 100.0, -50.0, 10.0)
+        store.append(44, 1000, 500.0, 500.0, 0.0)
+        store.append(44, 1400, 600.0, 500.0, 0.0)
+
+        drivers, xs, ys, zs = store.interpolate(1250)
+
+        self.assertEqual(drivers, [1, 44])
+        self.assertEqual(list(xs), [25.0, 562.5])
+        self.assertEqual(list(ys), [-12.5, 500.0])
+        self.assertEqual(list(zs), [2.5, 0.0])
+
+    def test_interpolate_outside_history_holds(self):
+        """Test that render times past either end hold the nearest sample"""
+        store = TelemetryStore(capacity=8)
+        store.append(1, 1000, 10.0, 20.0, 0.0)
+        store.append(1, 2000, 30.0, 40.0, 0.0)
+
+        self.assertEqual(list(store.interpolate(500)[1]), [10.0])
+        self.assertEqual(list(store.interpolate(5000)[1]), [30.0])
+
+    def test_full_race_footprint(self):
+        """Test that a 20-car race fits in a few MB"""
+        store = TelemetryStore()
+        for driver in range(1, 21):
+            store.append(driver, 0, 0.0, 0.0, 0.0)
+        self.assertLess(store.nbytes(), 16 * 1024 * 1024)
+
+    def test_sessions_are_bounded(self):
+        """Test that only the newest sessions keep a store"""
+        for session_key in range(_STORES_MAX_SIZE + 2):
+            get_store(session_key)
+        self.assertEqual(len(_stores), _STORES_MAX_SIZE)
+        self.assertNotIn(0, _stores)
+        self.assertIs(get_store(_STORES_MAX_SIZE + 1), get_store(_STORES_MAX_SIZE + 1))
+
+    def test_store_in_use_not_evicted(self):
+        """Test that a session still being recorded outlives newer sessions that aren't"""
+        live = get_store(1)
+        for session_key in range(2, _STORES_MAX_SIZE + 3):
+            get_store(1)
+            get_store(session_key)
+        self.assertIs(_stores.get(1), live)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+"""
+SilverWall - Upstream HTTP Settings
+Options shared by the pooled clients that talk to OpenF1 and SpacetimeDB
+"""
+
+import os
+
+try:
+    import h2  # noqa: F401 - httpx only needs it importable to speak HTTP/2
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+    print("⚠️ h2 not installed, upstream clients will use HTTP/1.1. Run: pip install 'httpx[http2]'")
+
+
+def http2_enabled() -> bool:
+    """
+    HTTP/2 lets every parallel request to a host share one multiplexed
+    connection. On whenever h2 is installed, unless UPSTREAM_HTTP2=0.
+    """
+    return HTTP2_AVAILABLE and os.getenv("UPSTREAM_HTTP2", "1") != "0"
+
+
+async def prewarm(client, url: str) -> bool:
+    """
+    Open a pooled connection (DNS, TCP and TLS) ahead of the first real
+    request. Any HTTP response counts; only network errors are a failure.
+    """
+    try:
+        await client.head(url, timeout=5.0)
+        return True
+    except Exception as e:
+        print(f"⚠️ Connection pre-warm failed for {url}: {e}")
+        return False
@@ -0,0 +1,237 @@
+"""
+SilverWall WebSocket - Binary Telemetry Codec
+Compact fixed-layout frames for /ws/live and /ws/monza, negotiated per client
+
+Every message starts with a one-byte frame type:
+- DICTIONARY (0x01): UTF-8 JSON mapping driver numbers to code/team/colour
+  plus the enum tables used by the car records, and the frame stream id
+  for ?since= resumes. Sent on connect and again whenever a new driver or
+  team shows up.
+- LIVE (0x02): header + one fixed-size record per car (little-endian).
+- REPLAY (0x03): header + one fixed-size record per car for the Monza replay.
+- POSITIONS (0x04): interpolated x/y/z per car for the ?interp= stream.
+- HEARTBEAT (0x05): header only, sent when the snapshot hasn't changed.
+"""
+
+import json
+import struct
+from typing import Dict, List, Optional
+from openf1_fetcher import _parse_openf1_datetime
+from websocket.frames import STREAM_ID
+
+# Clients opt in with this WebSocket subprotocol or a ?mode=binary query flag
+BINARY_SUBPROTOCOL = "silverwall.bin.v1"
+
+FRAME_DICTIONARY = 0x01
+FRAME_LIVE = 0x02
+FRAME_REPLAY = 0x03
+FRAME_POSITIONS = 0x04
+FRAME_HEARTBEAT = 0x05
+
+TYRE_COMPOUNDS = ["UNKNOWN", "SOFT", "MEDIUM", "HARD", "INTERMEDIATE", "WET", "TEST_UNKNOWN"]
+STATUSES = ["offline", "waiting", "live", "error", "stale"]
+
+# OpenF1 x/y/z are roughly +/-15000; halving them keeps every circuit inside int16
+COORD_SCALE = 2
+# gap/interval are sent in ms; -1 = unknown, -2 and below = laps down (-1 - laps)
+GAP_UNKNOWN = -1
+
+# type, seq, timestamp (epoch ms), status, car count
+LIVE_HEADER = "<BIqBB"
+# driver_number, position, team, tyre, tyre_age, x, y, z, gap_ms, interval_ms
+LIVE_CAR = "BBBBBhhhii"
+
+# type, seq of the unchanged frame, timestamp (epoch ms)
+HEARTBEAT = struct.Struct("<BIq")
+
+# type, seq, render time (epoch ms), car count
+POSITIONS_HEADER = "<BIqB"
+# driver_number, x, y, z
+POSITIONS_CAR = "Bhhh"
+
+# type, seq, session time (ms), car count
+REPLAY_HEADER = "<BIIB"
+# num, team, x, y (0-1 as uint16), speed, gear, drs, throttle, brake
+REPLAY_CAR = "BBHHHBBBB"
+
+_struct_cache: Dict[tuple, struct.Struct] = {}
+
+
+def _frame_struct(header: str, car: str, count: int) -> struct.Struct:
+    """One Struct per (layout, car count) so a whole frame packs in one call."""
+    key = (header, car, count)
+    packer = _struct_cache.get(key)
+    if packer is None:
+        packer = struct.Struct(header + car * count)
+        _struct_cache[key] = packer
+    return packer
+
+
+def _clamp(value: int, low: int, high: int) -> int:
+    return low if value < low else high if value > high else value
+
+
+def _quantize_coord(value) -> int:
+    return _clamp(int(round((value or 0) / COORD_SCALE)), -32768, 32767)
+
+
+def _quantize_gap(value) -> int:
+    """Seconds (or OpenF1's "+N LAP(S)" strings) to the signed ms encoding."""
+    if value is None:
+        return GAP_UNKNOWN
+    if isinstance(value, str):
+        laps = value.strip("+ ").split(" ")[0]
+        return -1 - int(laps) if laps.isdigit() else GAP_UNKNOWN
+    return _clamp(int(round(value * 1000)), 0, 2**31 - 1)
+
+
+def _parse_timestamp_ms(value: Optional[str]) -> int:
+    parsed = _parse_openf1_datetime(value)
+    return int(parsed.timestamp() * 1000) if parsed else 0
+
+
+def _encode_dictionary(body: Dict) -> bytes:
+    return bytes([FRAME_DICTIONARY]) + json.dumps(body).encode("utf-8")
+
+
+class LiveBinaryEncoder:
+    """
+    Encodes fetch_live_telemetry payloads for one session.
+    Keeps the team enum and driver dictionary so they only go out when they change.
+    """
+
+    def __init__(self):
+        self.teams: List[str] = []
+        self.drivers: Dict[int, Dict] = {}
+        self.session_key: Optional[int] = None
+        self._dictionary: Optional[bytes] = None
+
+    def _team_index(self, team: str) -> int:
+        if team not in self.teams:
+            self.teams.append(team)
+            self._dictionary = None
+        return self.teams.index(team)
+
+    def update_dictionary(self, payload: Dict) -> bool:
+        """Record new drivers/teams. Returns True if the dictionary changed."""
+        if payload.get("session_key") != self.session_key:
+            # New session: start the enums from scratch
+            self.session_key = payload.get("session_key")
+            self.teams, self.drivers = [], {}
+            self._dictionary = None
+        for car in payload.get("cars", []):
+            entry = {"code": car.get("code"), "team": self._team_index(car.get("team")), "color": car.get("color")}
+            if self.drivers.get(car["driver_number"]) != entry:
+                self.drivers[car["driver_number"]] = entry
+                self._dictionary = None
+
+        changed = self._dictionary is None
+        if changed:
+            self._dictionary = _encode_dictionary({
+                "session_key": self.session_key,
+                "stream": STREAM_ID,
+                "coord_scale": COORD_SCALE,
+                "drivers": self.drivers,
+                "teams": self.teams,
+                "tyres": TYRE_COMPOUNDS,
+                "statuses": STATUSES,
+            })
+        return changed
+
+    def dictionary(self) -> bytes:
+        if self._dictionary is None:
+            self.update_dictionary({"session_key": self.session_key, "cars": []})
+        return self._dictionary
+
+    def encode_frame(self, seq: int, payload: Dict) -> bytes:
+        """Pack the header and every car record with a single struct call."""
+        cars = payload.get("cars", [])
+        status = payload.get("status")
+        values = [
+            FRAME_LIVE,
+            seq & 0xFFFFFFFF,
+            _parse_timestamp_ms(payload.get("timestamp")),
+            STATUSES.index(status) if status in STATUSES else STATUSES.index("error"),
+            len(cars),
+        ]
+        for car in cars:
+            tyre = car.get("tyre")
+            values.extend((
+                car["driver_number"] & 0xFF,
+                _clamp(car.get("position") or 0, 0, 255),
+                self._team_index(car.get("team")),
+                TYRE_COMPOUNDS.index(tyre) if tyre in TYRE_COMPOUNDS else 0,
+                _clamp(car.get("tyre_age") or 0, 0, 255),
+                _quantize_coord(car.get("x")),
+                _quantize_coord(car.get("y")),
+                _quantize_coord(car.get("z")),
+                0 if car.get("gap") == "LEADER" else _quantize_gap(_gap_seconds(car.get("gap"))),
+                _quantize_gap(car.get("interval")),
+            ))
+        return _frame_struct(LIVE_HEADER, LIVE_CAR, len(cars)).pack(*values)
+
+
+def pack_positions(seq: int, t_ms: int, drivers: List[int], xs, ys, zs) -> bytes:
+    """Pack one interpolated positions tick (columns as from TelemetryStore.interpolate)."""
+    values = [FRAME_POSITIONS, seq & 0xFFFFFFFF, t_ms, len(drivers)]
+    for driver_num, x, y, z in zip(drivers, xs, ys, zs):
+        values.extend((driver_num & 0xFF, _quantize_coord(x), _quantize_coord(y), _quantize_coord(z)))
+    return _frame_struct(POSITIONS_HEADER, POSITIONS_CAR, len(drivers)).pack(*values)
+
+
+def pack_heartbeat(seq: int, t_ms: int) -> bytes:
+    return HEARTBEAT.pack(FRAME_HEARTBEAT, seq & 0xFFFFFFFF, t_ms)
+
+
+def _gap_seconds(gap: Optional[str]):
+    """Undo build_car_data's "+5.5s" formatting; lap gaps stay as strings."""
+    if not gap or gap == "--":
+        return None
+    try:
+        return float(gap.lstrip("+").rstrip("s"))
+    except ValueError:
+        return gap
+
+
+class ReplayBinaryEncoder:
+    """Encodes /ws/monza FramePackets; the dictionary is built from the first frame."""
+
+    def __init__(self):
+        self.teams: List[str] = []
+        self._dictionary: Optional[bytes] = None
+
+    def dictionary(self, frame: Dict) -> bytes:
+        if self._dictionary is None:
+            drivers = {}
+            for car in frame["cars"]:
+                if car["team"] not in self.teams:
+                    self.teams.append(car["team"])
+                drivers[car["num"]] = {"code": car["code"], "team": self.teams.index(car["team"])}
+            self._dictionary = _encode_dictionary({"drivers": drivers, "teams": self.teams})
+        return self._dictionary
+
+    def encode_frame(self, seq: int, frame: Dict) -> bytes:
+        cars = frame["cars"]
+        values = [FRAME_REPLAY, seq & 0xFFFFFFFF, int(frame["t"] * 1000), len(cars)]
+        for car in cars:
+            if car["team"] not in self.teams:
+                self.teams.append(car["team"])
+            values.extend((
+                car["num"] & 0xFF,
+                self.teams.index(car["team"]),
+                _clamp(int(round(car["x"] * 65535)), 0, 65535),
+                _clamp(int(round(car["y"] * 65535)), 0, 65535),
+                _clamp(car["speed"], 0, 65535),
+                _clamp(car["gear"], 0, 255),
+                1 if car["drs"] else 0,
+                _clamp(car["throttle"], 0, 255),
+                _clamp(car["brake"], 0, 255),
+            ))
+        return _frame_struct(REPLAY_HEADER, REPLAY_CAR, len(cars)).pack(*values)
+
+
+def binary_subprotocol(websocket) -> Optional[str]:
+    """The subprotocol to accept if the client offered the binary codec."""
+    if BINARY_SUBPROTOCOL in websocket.scope.get("subprotocols", []):
+        return BINARY_SUBPROTOCOL
+    return None
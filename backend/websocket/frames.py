@@ -0,0 +1,137 @@
+"""
+SilverWall WebSocket - Telemetry Frame Encoding
+Snapshot-plus-delta frames for /ws/live
+"""
+
+import json
+import secrets
+from typing import Dict, List, Optional, Tuple
+
+# Send a full keyframe at least this often (20 x 0.5s = every 10s while live)
+KEYFRAME_INTERVAL = 20
+
+# Snapshot fields that are carried on every frame, not diffed per car
+FRAME_FIELDS = ("status", "session_key", "message", "timestamp", "delay")
+
+# Names this process's frame numbering. seq starts over when the server
+# restarts, so a resume token is only honoured if it names the same stream
+STREAM_ID = secrets.token_hex(4)
+
+
+def diff_cars(previous: List[Dict], current: List[Dict]) -> Tuple[List[Dict], List[int]]:
+    """
+    Compare two car lists keyed by driver_number.
+    Returns (changed, removed): new cars in full, existing cars with only the
+    fields that changed (plus driver_number), and the numbers of cars that left.
+    """
+    previous_map = {car["driver_number"]: car for car in previous}
+    changed = []
+    for car in current:
+        driver_num = car["driver_number"]
+        old = previous_map.pop(driver_num, None)
+        if old is None:
+            changed.append(car)
+            continue
+        fields = {key: value for key, value in car.items() if old.get(key) != value}
+        if fields:
+            fields["driver_number"] = driver_num
+            changed.append(fields)
+    return changed, list(previous_map)
+
+
+def encode_keyframe(seq: int, payload: Dict) -> str:
+    """Full snapshot tagged with its frame sequence number and stream."""
+    return json.dumps({"type": "keyframe", "seq": seq, "stream": STREAM_ID, **payload})
+
+
+def encode_snapshot(seq: int, payload: Dict) -> str:
+    """Full snapshot as sent to json clients (no type, like the frames before seq)."""
+    return json.dumps({**payload, "seq": seq, "stream": STREAM_ID})
+
+
+def parse_since(token: str) -> Optional[int]:
+    """
+    The seq in a "<stream>.<seq>" resume token, or None if it is malformed
+    or names another stream (frames from before a restart).
+    """
+    stream, _, seq = token.partition(".")
+    return int(seq) if stream == STREAM_ID and seq.isdigit() else None
+
+
+def encode_delta(seq: int, payload: Dict, previous_cars: List[Dict]) -> str:
+    """Only the cars and fields that changed since frame seq - 1."""
+    changed, removed = diff_cars(previous_cars, payload.get("cars", []))
+    frame = {"type": "delta", "seq": seq}
+    frame.update({key: payload[key] for key in FRAME_FIELDS if key in payload})
+    frame["cars"] = changed
+    if removed:
+        frame["removed"] = removed
+    return json.dumps(frame)
+
+
+def encode_heartbeat(seq: int, timestamp: str) -> str:
+    """Sent instead of a frame when nothing changed since frame seq."""
+    return json.dumps({"type": "heartbeat", "seq": seq, "timestamp": timestamp})
+
+
+def encode_event(data: str, event: Optional[str] = None, event_id: Optional[str] = None) -> str:
+    """One Server-Sent Events message around an already JSON-encoded frame."""
+    lines = []
+    if event is not None:
+        lines.append(f"event: {event}")
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {data}")
+    return "\n".join(lines) + "\n\n"
+
+
+def encode_positions(seq: int, t_ms: int, drivers: List[int], xs, ys, zs) -> str:
+    """Interpolated positions for one ?interp= tick (columns as from TelemetryStore.interpolate)."""
+    return json.dumps({
+        "type": "positions",
+        "seq": seq,
+        "t": t_ms,
+        "cars": [
+            {"driver_number": driver_num, "x": round(x, 1), "y": round(y, 1), "z": round(z, 1)}
+            for driver_num, x, y, z in zip(drivers, xs, ys, zs)
+        ],
+    })
+
+
+class DeltaEncoder:
+    """
+    Tracks the previous frame so each new snapshot can be encoded as a delta,
+    with a keyframe on the first frame and every KEYFRAME_INTERVAL frames.
+    """
+
+    def __init__(self, keyframe_interval: int = KEYFRAME_INTERVAL, seq: int = 0):
+        self.keyframe_interval = keyframe_interval
+        self.seq = seq  # Number of the current frame; frames count up from seq + 1
+        self.payload: Optional[Dict] = None
+        self._previous_cars: Optional[List[Dict]] = None
+        self._last_keyframe_seq = seq
+        self._keyframe: Optional[Tuple[int, str]] = None  # (seq, message)
+
+    def push(self, payload: Dict) -> None:
+        """Advance to the next frame."""
+        self._previous_cars = self.payload.get("cars", []) if self.payload is not None else None
+        self.payload = payload
+        self.seq += 1
+
+    def encode(self) -> str:
+        """Encode the current frame as a delta, or a keyframe when one is due."""
+        if self._previous_cars is None or self.seq - self._last_keyframe_seq >= self.keyframe_interval:
+            self._last_keyframe_seq = self.seq
+            return self.keyframe()
+        return encode_delta(self.seq, self.payload, self._previous_cars)
+
+    @property
+    def encoded_keyframe(self) -> bool:
+        """True if encode() sent the current frame as a keyframe."""
+        return self._last_keyframe_seq == self.seq
+
+    def keyframe(self) -> str:
+        """Full keyframe for the current frame, encoded at most once per seq."""
+        if self._keyframe is None or self._keyframe[0] != self.seq:
+            self._keyframe = (self.seq, encode_keyframe(self.seq, self.payload))
+        return self._keyframe[1]
@@ -0,0 +1,503 @@
+"""
+SilverWall WebSocket - Live Telemetry Hub
+One shared OpenF1 poller per session, fanning each encoded frame out to every subscriber
+"""
+
+import asyncio
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional, Tuple, Union
+from fastapi import WebSocket
+from openf1_fetcher import fetch_live_telemetry
+from playout import playout_delay_ms
+from telemetry_store import find_store, now_ms
+from websocket.codec import LiveBinaryEncoder, pack_heartbeat, pack_positions
+from websocket.frames import (
+    STREAM_ID, DeltaEncoder, encode_event, encode_heartbeat, encode_positions, encode_snapshot
+)
+from websocket.outbound import MAX_CLIENT_LAG, ClientQueue
+from websocket.projection import Projection, ProjectedView
+
+Message = Union[str, bytes]
+
+# Frame interval: 0.5s if live, 5s if waiting/offline. Frames go out on a
+# fixed schedule, however long the fetch behind them took.
+LIVE_POLL_INTERVAL = 0.5
+IDLE_POLL_INTERVAL = 5
+
+# Wire formats a subscriber can ask for:
+# - "json": the full fetch_live_telemetry payload on every frame (default)
+# - "delta": a keyframe on connect and periodically, changed fields in between
+# - "binary": fixed-layout struct frames plus a driver dictionary (websocket.codec)
+FRAME_MODES = ("json", "delta", "binary")
+# GET /api/live/stream subscribers use "sse": the json frames, wrapped as
+# Server-Sent Events with the frame's seq as the event id
+SSE_MODE = "sse"
+
+# Interpolated position stream (?interp=<Hz>), sent alongside the normal frames.
+# Live frames and positions ticks are both played out the session's measured
+# upstream delay behind real time (see playout.py), so this far back there are
+# normally samples on both sides of the render clock to blend between.
+MAX_INTERP_RATE = 30
+
+# Snapshot fields that differ on every fetch without the frame showing anything
+# new: when it was built, and how old a stale-while-revalidate copy is
+VOLATILE_FIELDS = frozenset(("timestamp", "age"))
+
+# Recent delta-mode frames kept for ?since= resumes (a minute of live frames)
+REPLAY_FRAMES = 120
+
+# How a broadcast frame may be treated by a backed-up client queue:
+# - KEEP: always delivered (keyframes, dictionaries, status changes)
+# - LATEST: superseded by the next frame, so the oldest can be dropped
+# - DELTA: droppable, but only together with the deltas after it
+KEEP, LATEST, DELTA = "keep", "latest", "delta"
+
+# WebSocket close code for a client too slow to keep up ("try again later")
+CLOSE_TOO_SLOW = 1013
+
+
+class LiveTelemetryHub:
+    """
+    Broadcast hub for a single session's live telemetry.
+
+    The producer task starts with the first subscriber and stops when the last
+    one leaves. Each frame is fetched once and encoded once per wire format in
+    use, then queued for every subscribed socket. Each socket has its own
+    writer (websocket.outbound), so a slow client only ever falls behind itself.
+    """
+
+    def __init__(self, session_key: Optional[int] = None, seq: int = 0):
+        self.session_key = session_key
+        self.subscribers: Dict[WebSocket, str] = {}  # socket -> frame mode
+        self.queues: Dict[WebSocket, ClientQueue] = {}
+        self.evicted = 0
+        # Filtered subscriptions: socket -> projection, and one shared view per
+        # distinct projection in use (websocket.projection)
+        self.projections: Dict[WebSocket, Projection] = {}
+        self.views: Dict[Projection, ProjectedView] = {}
+        self.latest_message: Optional[str] = None
+        self.delta = DeltaEncoder(seq=seq)
+        # (seq, delta-mode message) for the last REPLAY_FRAMES frames, in order
+        self.replay: Deque[Tuple[int, str]] = deque(maxlen=REPLAY_FRAMES)
+        self.binary = LiveBinaryEncoder()
+        self._binary_frame: Optional[tuple] = None  # (seq, frame bytes)
+        self._sse_frame: Optional[tuple] = None  # (seq, event)
+        self._dictionary_changed = False
+        self._task: Optional[asyncio.Task] = None
+        # socket -> [tick interval, next due (loop time)] for ?interp= subscribers
+        self.interp: Dict[WebSocket, List[float]] = {}
+        self.interp_seq = 0
+        self._interp_task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def subscribe(self, websocket: WebSocket, mode: str = "json", interp_rate: Optional[float] = None,
+                        since: Optional[int] = None) -> None:
+        """
+        Add a socket, sending it the most recent frame straight away. A client
+        resuming after frame `since` is only sent what it missed. With
+        interp_rate it also gets interpolated positions that many times a second.
+        """
+        self.subscribers[websocket] = mode
+        self._queue(websocket).put(self.initial_messages(mode, since))
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+        if interp_rate:
+            self.interp[websocket] = [1 / min(interp_rate, MAX_INTERP_RATE), 0.0]
+            if self._interp_task is None or self._interp_task.done():
+                self._interp_task = asyncio.create_task(self._run_interpolation())
+
+    async def unsubscribe(self, websocket: WebSocket) -> None:
+        """Remove a socket, stopping the producer if nobody is left."""
+        self._forget(websocket)
+        queue = self.queues.pop(websocket, None)
+        if queue is not None:
+            await queue.close()
+        if not self.subscribers:
+            await self.stop()
+
+    async def stop(self) -> None:
+        tasks = (self._task, self._interp_task)
+        self._task = self._interp_task = None
+        for task in tasks:
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        queues = list(self.queues.values())
+        self.queues.clear()
+        for queue in queues:
+            await queue.close()
+
+    def _queue(self, websocket: WebSocket) -> ClientQueue:
+        queue = self.queues.get(websocket)
+        if queue is None:
+            queue = ClientQueue(websocket, self._send_failed)
+            self.queues[websocket] = queue
+        return queue
+
+    def _forget(self, websocket: WebSocket) -> None:
+        self.subscribers.pop(websocket, None)
+        self.interp.pop(websocket, None)
+        self._release_view(self.projections.pop(websocket, None))
+
+    def _release_view(self, projection: Optional[Projection]) -> None:
+        if projection is not None and projection not in self.projections.values():
+            self.views.pop(projection, None)
+
+    def set_projection(self, websocket: WebSocket, projection: Optional[Projection]) -> bool:
+        """
+        Switch a json or delta subscriber to a field/driver projection (None
+        for the full frame) and send it the current frame in that shape.
+        Subscribers with identical projections share one encoding per frame.
+        Returns False for binary subscribers, whose layout is fixed.
+        """
+        mode = self.subscribers.get(websocket)
+        if mode is None or mode == "binary":
+            return False
+        previous = self.projections.pop(websocket, None)
+        if projection is not None:
+            self.projections[websocket] = projection
+            view = self.views.get(projection)
+            if view is None:
+                view = ProjectedView(projection, self.delta.seq, self.delta.payload)
+                self.views[projection] = view
+            messages = view.initial_messages(mode)
+        else:
+            messages = self.initial_messages(mode)
+        if previous != projection:
+            self._release_view(previous)
+        self._queue(websocket).put(messages)
+        return True
+
+    def _stream(self, websocket: WebSocket) -> Any:
+        """Key of the encoding a socket is sent: its mode, plus its projection if it has one."""
+        mode = self.subscribers[websocket]
+        projection = self.projections.get(websocket)
+        return mode if projection is None else (mode, projection)
+
+    def _delta_encoder(self, websocket: WebSocket) -> DeltaEncoder:
+        projection = self.projections.get(websocket)
+        return self.delta if projection is None else self.views[projection].delta
+
+    async def _send_failed(self, websocket: WebSocket) -> None:
+        """Called from a socket's writer when a send fails: drop the socket."""
+        self._forget(websocket)
+        self.queues.pop(websocket, None)
+
+    def _evict(self, websocket: WebSocket) -> None:
+        """Disconnect a client that has fallen more than MAX_CLIENT_LAG behind."""
+        self._forget(websocket)
+        queue = self.queues.pop(websocket, None)
+        self.evicted += 1
+        print(f"⚠️ LIVE client {queue.lag():.1f}s behind, disconnecting")
+        asyncio.create_task(_close_slow(websocket, queue))
+
+    async def drain(self) -> None:
+        """Wait until every queued message has been written."""
+        await asyncio.gather(*(queue.drain() for queue in list(self.queues.values())))
+
+    def client_stats(self) -> List[Dict]:
+        """Mode and outbound queue state of every subscriber."""
+        return [
+            {"mode": self.subscribers.get(ws), "filtered": ws in self.projections, **queue.stats()}
+            for ws, queue in list(self.queues.items())
+        ]
+
+    def initial_messages(self, mode: str, since: Optional[int] = None) -> List[Message]:
+        """What a new subscriber is sent before the next broadcast."""
+        if self.delta.payload is None:
+            return []
+        if since == self.delta.seq:
+            # Reconnected without missing a frame
+            return [self.binary.dictionary()] if mode == "binary" else []
+        if mode == "delta":
+            return self.replay_since(since) if since is not None else [self.delta.keyframe()]
+        if mode == "binary":
+            return [self.binary.dictionary(), self.binary_frame()]
+        if mode == SSE_MODE:
+            return [self.sse_frame()]
+        return [self.latest_message]
+
+    def replay_since(self, since: int) -> List[str]:
+        """
+        The delta-mode frames after `since`, or just the current keyframe if
+        they have left the replay ring or would be bigger than it.
+        """
+        keyframe = self.delta.keyframe()
+        if since < self.delta.seq and self.replay and self.replay[0][0] <= since + 1:
+            missed = [message for seq, message in self.replay if seq > since]
+            if sum(len(message) for message in missed) < len(keyframe):
+                return missed
+        return [keyframe]
+
+    def binary_frame(self) -> bytes:
+        """Binary encoding of the current frame, packed at most once per seq."""
+        seq = self.delta.seq
+        if self._binary_frame is None or self._binary_frame[0] != seq:
+            self._binary_frame = (seq, self.binary.encode_frame(seq, self.delta.payload))
+        return self._binary_frame[1]
+
+    def sse_frame(self) -> str:
+        """Server-Sent Event for the current frame, encoded at most once per seq."""
+        seq = self.delta.seq
+        if self._sse_frame is None or self._sse_frame[0] != seq:
+            self._sse_frame = (seq, encode_event(self.latest_message, event_id=f"{STREAM_ID}.{seq}"))
+        return self._sse_frame[1]
+
+    def encode(self, mode: str) -> List[Message]:
+        """Encode the current frame for one wire format."""
+        if mode == "delta":
+            return [self.replay[-1][1]]
+        if mode == "binary":
+            if self._dictionary_changed:
+                return [self.binary.dictionary(), self.binary_frame()]
+            return [self.binary_frame()]
+        if mode == SSE_MODE:
+            return [self.sse_frame()]
+        return [self.latest_message]
+
+    async def publish(self, data: Dict) -> None:
+        """Encode a new snapshot once per mode in use and broadcast it."""
+        previous = self.delta.payload
+        self.delta.push(data)
+        self.latest_message = encode_snapshot(self.delta.seq, data)
+        self._dictionary_changed = self.binary.update_dictionary(data)
+        # Delta-encoded every frame, subscribed or not, so resumes can be replayed
+        self.replay.append((self.delta.seq, self.delta.encode()))
+        for view in self.views.values():
+            view.push(data)
+        # Clients must never miss the session going live, stale or finished
+        status_changed = previous is None or previous.get("status") != data.get("status")
+
+        messages, kinds = {}, {}
+        for stream in {self._stream(ws) for ws in self.subscribers}:
+            if isinstance(stream, tuple):
+                mode, view = stream[0], self.views[stream[1]]
+                messages[stream] = view.encode(mode)
+                delta = view.delta
+            else:
+                mode = stream
+                messages[stream] = self.encode(mode)
+                delta = self.delta
+            if status_changed:
+                if mode == "delta":
+                    # Kept frames may arrive after dropped deltas, so this one can't be a delta
+                    messages[stream] = [delta.keyframe()]
+                kinds[stream] = KEEP
+            elif mode == "delta":
+                kinds[stream] = KEEP if delta.encoded_keyframe else DELTA
+            elif mode == "binary" and self._dictionary_changed:
+                kinds[stream] = KEEP
+            else:
+                kinds[stream] = LATEST
+        await self.broadcast(messages, kinds)
+
+    def unchanged(self, frame: Dict) -> bool:
+        """
+        True if a new frame would repeat the last one published. Compared by
+        content: stale, offline and error payloads are new dicts on every fetch.
+        """
+        previous = self.delta.payload
+        if previous is None:
+            return False
+        if frame is previous:
+            return True
+        keys = (frame.keys() | previous.keys()) - VOLATILE_FIELDS
+        return all(frame.get(key) == previous.get(key) for key in keys)
+
+    async def heartbeat(self) -> None:
+        """Tell subscribers the last frame still stands, without resending it."""
+        now = now_ms()
+        streams = {self._stream(ws) for ws in self.subscribers}
+        messages = {}
+        if streams - {"binary"}:
+            text = encode_heartbeat(self.delta.seq, datetime.fromtimestamp(now / 1000, timezone.utc).isoformat())
+            messages.update({stream: [text] for stream in streams - {"binary", SSE_MODE}})
+            if SSE_MODE in streams:
+                messages[SSE_MODE] = [encode_event(text, event="heartbeat")]
+        if "binary" in streams:
+            messages["binary"] = [pack_heartbeat(self.delta.seq, now)]
+        await self.broadcast(messages)
+
+    async def broadcast(self, messages: Dict[Any, List[Message]], kinds: Optional[Dict[Any, str]] = None) -> None:
+        """
+        Queue pre-encoded frames for every subscriber. Both dicts are keyed by
+        mode, or (mode, projection) for filtered subscribers; kinds says
+        whether a backed-up client may skip them (LATEST by default).
+        """
+        kinds = kinds or {}
+        for ws, mode in list(self.subscribers.items()):
+            queue = self._queue(ws)
+            stream = self._stream(ws)
+            if mode == "delta" and queue.needs_keyframe and self.delta.payload is not None:
+                # Deltas were dropped for this client; catch it up in one go
+                queue.needs_keyframe = False
+                queue.put([self._delta_encoder(ws).keyframe()])
+            else:
+                kind = kinds.get(stream, LATEST)
+                queue.put(messages[stream], droppable=kind != KEEP, delta=kind == DELTA)
+            self._check_lag(ws)
+
+    def _check_lag(self, websocket: WebSocket) -> None:
+        queue = self.queues.get(websocket)
+        if queue is not None and queue.lag() > MAX_CLIENT_LAG:
+            self._evict(websocket)
+
+    async def resync(self, websocket: WebSocket) -> None:
+        """Resend the current keyframe to a delta client that detected a gap."""
+        if self.delta.payload is not None and websocket in self.subscribers:
+            self._queue(websocket).put([self._delta_encoder(websocket).keyframe()])
+
+    def interpolate(self) -> Optional[tuple]:
+        """
+        (t_ms, drivers, xs, ys, zs) for every car at the render clock, from the
+        position history the location feed already records. No OpenF1 calls.
+        """
+        payload = self.delta.payload
+        if payload is None or payload.get("status") not in ("live", "stale"):
+            return None
+        session_key = payload.get("session_key")
+        store = find_store(session_key)
+        if store is None:
+            return None
+        t_ms = now_ms() - playout_delay_ms(session_key)
+        return (t_ms,) + store.interpolate(t_ms)
+
+    def playout(self, data: Dict) -> Dict:
+        """
+        Place every car at the playout clock (now minus the measured upstream
+        delay) instead of wherever its last sample happened to be, and report
+        that delay in the frame as "delay" (seconds).
+        """
+        if data.get("status") not in ("live", "stale"):
+            return data
+        session_key = data.get("session_key")
+        delay_ms = playout_delay_ms(session_key)
+        frame = {**data, "delay": round(delay_ms / 1000, 2)}
+
+        store = find_store(session_key)
+        if store is not None and store.drivers:
+            drivers, xs, ys, zs = store.interpolate(now_ms() - delay_ms)
+            positions = {
+                driver_num: {"x": round(x, 1), "y": round(y, 1), "z": round(z, 1)}
+                for driver_num, x, y, z in zip(drivers, xs, ys, zs)
+            }
+            frame["cars"] = [
+                {**car, **positions[car["driver_number"]]} if car["driver_number"] in positions else car
+                for car in data.get("cars", [])
+            ]
+        return frame
+
+    async def _run_interpolation(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self.interp:
+            now = loop.time()
+            due = [ws for ws, (_, next_due) in self.interp.items() if next_due <= now]
+            positions = self.interpolate() if due else None
+            if positions is not None:
+                # Encode the tick once per format: struct frames for binary
+                # subscribers, JSON for everyone else
+                self.interp_seq += 1
+                kinds = {ws: self.subscribers.get(ws) == "binary" for ws in due}
+                encoded = {
+                    binary: (pack_positions if binary else encode_positions)(self.interp_seq, *positions)
+                    for binary in set(kinds.values())
+                }
+                for ws in due:
+                    if ws in self.queues:
+                        self.queues[ws].put([encoded[kinds[ws]]], droppable=True)
+                        self._check_lag(ws)
+
+            for ws in due:
+                if ws in self.interp:
+                    slot = self.interp[ws]
+                    slot[1] = max(slot[1] + slot[0], now)
+            if self.interp:
+                await asyncio.sleep(max(0.0, min(slot[1] for slot in self.interp.values()) - loop.time()))
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        next_due = loop.time()
+        while self.subscribers:
+            try:
+                data = await fetch_live_telemetry(self.session_key)
+            except Exception as e:
+                print(f"⚠️ LIVE fetch error: {e}")
+                data = {"status": "error", "message": "Telemetery stream error", "cars": []}
+
+            # Between sessions and under red flags the feeds repeat themselves;
+            # skip the encoding and send a heartbeat instead
+            frame = self.playout(data)
+            if self.unchanged(frame):
+                await self.heartbeat()
+            else:
+                await self.publish(frame)
+
+            # Keep a steady cadence: the next frame is due one interval after
+            # this one was, not after the fetch finished. A fetch that overran
+            # its slot just starts the schedule again from now.
+            interval = LIVE_POLL_INTERVAL if data.get("status") == "live" else IDLE_POLL_INTERVAL
+            next_due = max(next_due + interval, loop.time())
+            await asyncio.sleep(next_due - loop.time())
+
+
+async def _close_slow(websocket: WebSocket, queue: Optional[ClientQueue]) -> None:
+    if queue is not None:
+        await queue.close()
+    try:
+        await websocket.close(code=CLOSE_TOO_SLOW)
+    except Exception:
+        pass
+
+
+# One hub per session; None is the "latest session" hub used by /ws/live
+_hubs: Dict[Optional[int], LiveTelemetryHub] = {}
+# Last frame number of each released hub, so a recreated hub carries on
+# counting and an old ?since= can never name one of its frames
+_last_seq: Dict[Optional[int], int] = {}
+
+
+def get_hub(session_key: Optional[int] = None) -> LiveTelemetryHub:
+    """Get or create the hub for a session."""
+    hub = _hubs.get(session_key)
+    if hub is None:
+        hub = LiveTelemetryHub(session_key, seq=_last_seq.pop(session_key, 0))
+        _hubs[session_key] = hub
+    return hub
+
+
+async def release_hub(hub: LiveTelemetryHub, websocket: WebSocket) -> None:
+    """Unsubscribe a socket and forget the hub once it has no subscribers."""
+    await hub.unsubscribe(websocket)
+    if not hub.subscribers and _hubs.get(hub.session_key) is hub:
+        del _hubs[hub.session_key]
+        _last_seq[hub.session_key] = hub.delta.seq
+
+
+async def close_hubs() -> None:
+    """Stop every producer task. Called on shutdown."""
+    for hub in list(_hubs.values()):
+        await hub.stop()
+    _hubs.clear()
+
+
+def live_metrics() -> Dict:
+    """Per-hub subscriber counts and per-client send lag, for /api/live/metrics."""
+    return {
+        "hubs": [
+            {
+                "session_key": hub.session_key,
+                "subscribers": len(hub.subscribers),
+                "projections": len(hub.views),
+                "evicted": hub.evicted,
+                "clients": hub.client_stats(),
+            }
+            for hub in list(_hubs.values())
+        ]
+    }
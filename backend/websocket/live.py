@@ -4,40 +4,135 @@ Streams real car positions from OpenF1 API
 """
 
 import asyncio
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from openf1_fetcher import fetch_live_telemetry
+import json
+from fastapi import APIRouter, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from limiter import limiter
+from websocket.codec import binary_subprotocol
+from websocket.frames import parse_since
+from websocket.hub import FRAME_MODES, SSE_MODE, get_hub, live_metrics, release_hub
+from websocket.projection import parse_projection
+from websocket.sse import EventStreamClient
 
 router = APIRouter()
 
+
+@router.get("/api/live/metrics")
+@limiter.limit("30/minute")
+async def get_live_metrics(request: Request):
+    """
+    Subscriber counts per live hub and, per client, how many messages are
+    queued, how far behind (seconds) its oldest unsent one is, and how many
+    were dropped to keep it current.
+    """
+    return live_metrics()
+
+
+@router.get("/api/live/stream")
+@limiter.limit("30/minute")
+async def live_event_stream(request: Request):
+    """
+    The /ws/live frames as Server-Sent Events, for clients behind proxies
+    that break WebSockets. SSE subscribers share the /ws/live hub, so this
+    costs no extra OpenF1 calls and each frame is encoded once for all of them.
+
+    Every frame is a message event whose id is "<stream>.<seq>"; while nothing
+    changes a "heartbeat" event is sent instead. EventSource reconnects with
+    Last-Event-ID and is then sent only a newer frame, if there is one (or the
+    current frame, if the server has restarted since).
+    """
+    since = parse_since(request.headers.get("last-event-id", ""))
+
+    async def events():
+        hub = get_hub()
+        client = EventStreamClient()
+        await hub.subscribe(client, SSE_MODE, since=since)
+        try:
+            while True:
+                event = await client.next_event()
+                if event is None:
+                    break
+                yield event
+        finally:
+            # The response task may already be cancelled (client went away)
+            await asyncio.shield(release_hub(hub, client))
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",  # Don't let nginx-style proxies buffer events
+    })
+
+
 @router.websocket("/ws/live")
 async def websocket_live(websocket: WebSocket):
     """
-    LIVE MODE WebSocket - Fetches real car positions from OpenF1 API
+    LIVE MODE WebSocket - Streams real car positions from OpenF1 API.
+    All clients of a session share one poller; this handler only subscribes
+    the socket and waits for it to go away. Live frames go out on a steady
+    cadence with cars placed at the session's playout clock, and carry the
+    estimated OpenF1 delay in seconds as "delay". While the snapshot is
+    unchanged the hub sends {"type": "heartbeat", "seq"} instead of a frame.
+    A client that can't keep up skips stale frames; one more than 10s behind
+    is closed with code 1013.
+
+    Every frame carries a "seq" that counts up by one per published frame.
+    Full frames (json frames and keyframes) and the binary dictionary also
+    carry "stream", which names the numbering and changes when the server
+    restarts.
+
+    Query params:
+    - mode=delta: keyframe + delta frames with a `seq` number. A client that
+      sees a gap in `seq` can send {"type": "resync"} for a fresh keyframe.
+    - mode=binary (or the silverwall.bin.v1 subprotocol): compact struct
+      frames, see websocket/codec.py for the layout.
+    - since=<stream>.<seq>: resume after a reconnect. Instead of starting
+      cold the client gets only the frames it missed: the replayed deltas in
+      delta mode (or one keyframe if the gap is too large), nothing if it
+      missed none. A token from another stream is ignored.
+    - interp=<Hz>: additionally stream {"type": "positions"} frames with every
+      car's position interpolated from recorded samples, up to 30 per second.
+
+    json and delta clients that only need part of each frame can send
+    {"type": "subscribe", "fields": ["position", "gap"], "drivers": [1, 44]}
+    (either list optional). From then on every car carries only those fields
+    plus driver_number, and only the listed drivers are included. Sending
+    {"type": "subscribe"} with neither list goes back to full frames.
     """
-    await websocket.accept()
+    subprotocol = binary_subprotocol(websocket)
+    await websocket.accept(subprotocol=subprotocol)
     print("🏎️ LIVE: Client connected to /ws/live")
-    
+
+    hub = get_hub()
+    mode = "binary" if subprotocol else websocket.query_params.get("mode", "json")
+    if mode not in FRAME_MODES:
+        mode = "json"
+    interp = websocket.query_params.get("interp", "")
+    interp_rate = int(interp) if interp.isdigit() else None
+    since = parse_since(websocket.query_params.get("since", ""))
+
     try:
+        await hub.subscribe(websocket, mode, interp_rate, since)
+        # Frames are pushed by the hub; reading here handles control messages
+        # and detects disconnects
         while True:
+            data = await websocket.receive_text()
             try:
-                # Fetch live state
-                data = await fetch_live_telemetry()
-                
-                # Send to client
-                await websocket.send_json(data)
-                
-                # Polling interval: 0.5s if live, 5s if waiting
-                if data.get("status") == "live":
-                    await asyncio.sleep(0.5)
-                else:
-                    await asyncio.sleep(5)
-                    
-            except Exception as e:
-                print(f"⚠️ LIVE fetch error: {e}")
-                await websocket.send_json({"status": "error", "message": "Telemetery stream error", "cars": []})
-                await asyncio.sleep(5)
-            
+                command = json.loads(data)
+            except ValueError:
+                continue
+            if not isinstance(command, dict):
+                continue
+            if command.get("type") == "resync":
+                await hub.resync(websocket)
+            elif command.get("type") == "subscribe":
+                try:
+                    hub.set_projection(websocket, parse_projection(command))
+                except ValueError as e:
+                    print(f"⚠️ LIVE: Ignoring subscription: {e}")
+
     except WebSocketDisconnect:
         print("🏎️ LIVE: Client disconnected")
     except Exception as e:
         print(f"❌ WebSocket error: {e}")
+    finally:
+        await release_hub(hub, websocket)
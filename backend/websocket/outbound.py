@@ -0,0 +1,124 @@
+"""
+SilverWall WebSocket - Per-Client Send Queues
+Bounded outbound queue and writer task per subscriber, so one slow client
+never holds up the broadcast loop or anyone else
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Union
+
+from fastapi import WebSocket
+
+Message = Union[str, bytes]
+
+# Queued messages per client before stale frames start being dropped
+QUEUE_SIZE = 8
+# A client whose oldest queued message is older than this (seconds) is disconnected
+MAX_CLIENT_LAG = 10.0
+
+
+class ClientQueue:
+    """
+    Outbound messages for one socket. Droppable messages (position frames,
+    positions ticks, heartbeats) give way to newer ones once the queue is
+    full; keyframes, dictionaries and status changes are always delivered.
+    Dropping a delta breaks the client's delta chain, so the rest of its queued
+    deltas go too and needs_keyframe asks the hub for a keyframe next time.
+    """
+
+    def __init__(self, websocket: WebSocket, on_error: Callable[[WebSocket], Awaitable[None]],
+                 max_size: int = QUEUE_SIZE):
+        self.websocket = websocket
+        self.on_error = on_error
+        self.max_size = max_size
+        # (message, droppable, is_delta, enqueued at)
+        self.items: Deque[tuple] = deque()
+        self.needs_keyframe = False
+        self.sent = 0
+        self.dropped = 0
+        self._sending_since: Optional[float] = None
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._task = asyncio.create_task(self._run())
+
+    def put(self, messages: List[Message], droppable: bool = False, delta: bool = False) -> None:
+        now = time.monotonic()
+        for message in messages:
+            self.items.append((message, droppable, delta, now))
+        while len(self.items) > self.max_size and self._drop_oldest():
+            pass
+        if self.items:
+            self._idle.clear()
+            self._wakeup.set()
+
+    def _drop_oldest(self) -> bool:
+        """Drop the oldest droppable message. Returns False if none can go."""
+        for i, item in enumerate(self.items):
+            if item[1]:
+                break
+        else:
+            return False
+        if item[2]:
+            # Without this delta the later ones can't be applied either
+            kept = [queued for queued in self.items if not queued[2]]
+            self.dropped += len(self.items) - len(kept)
+            self.items = deque(kept)
+            self.needs_keyframe = True
+        else:
+            del self.items[i]
+            self.dropped += 1
+        return True
+
+    def lag(self) -> float:
+        """Seconds the oldest undelivered message has been waiting."""
+        oldest = [self.items[0][3]] if self.items else []
+        if self._sending_since is not None:
+            oldest.append(self._sending_since)
+        return time.monotonic() - min(oldest) if oldest else 0.0
+
+    async def drain(self) -> None:
+        """Wait until everything queued so far has been written."""
+        await self._idle.wait()
+
+    async def close(self) -> None:
+        if not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._idle.set()
+
+    async def _run(self) -> None:
+        while True:
+            if not self.items:
+                self._idle.set()
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            message, _, _, enqueued = self.items.popleft()
+            self._sending_since = enqueued
+            try:
+                if isinstance(message, bytes):
+                    await self.websocket.send_bytes(message)
+                else:
+                    await self.websocket.send_text(message)
+            except Exception:
+                self.items.clear()
+                await self.on_error(self.websocket)
+                self._idle.set()
+                return
+            finally:
+                self._sending_since = None
+            self.sent += 1
+
+    def stats(self) -> Dict:
+        return {
+            "queued": len(self.items),
+            "lag": round(self.lag(), 3),
+            "sent": self.sent,
+            "dropped": self.dropped,
+        }
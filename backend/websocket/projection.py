@@ -0,0 +1,86 @@
+"""
+SilverWall WebSocket - Projected Live Frames
+Field- and driver-filtered views of the live frames for partial consumers
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from websocket.frames import DeltaEncoder, encode_snapshot
+
+# Car fields and drivers a single subscription may list
+MAX_FIELDS = 32
+MAX_DRIVERS = 30
+
+# (car fields, driver numbers), each sorted, or None for "all"
+Projection = Tuple[Optional[Tuple[str, ...]], Optional[Tuple[int, ...]]]
+
+
+def parse_projection(command: Dict[str, Any]) -> Optional[Projection]:
+    """
+    Read a {"type": "subscribe", "fields": [...], "drivers": [...]} message.
+    Either list can be left out for "all"; None means the full frame.
+    Raises ValueError if a list is malformed or too long.
+    """
+    fields = command.get("fields")
+    drivers = command.get("drivers")
+    if fields is not None:
+        if not isinstance(fields, list) or len(fields) > MAX_FIELDS or not all(isinstance(f, str) for f in fields):
+            raise ValueError("fields must be a list of car field names")
+        # driver_number is what deltas and clients key cars by, so it always stays
+        fields = tuple(sorted(set(fields) | {"driver_number"}))
+    if drivers is not None:
+        if (not isinstance(drivers, list) or len(drivers) > MAX_DRIVERS
+                or not all(isinstance(d, int) and not isinstance(d, bool) for d in drivers)):
+            raise ValueError("drivers must be a list of driver numbers")
+        drivers = tuple(sorted(set(drivers)))
+    if fields is None and drivers is None:
+        return None
+    return fields, drivers
+
+
+def project(payload: Dict, projection: Projection) -> Dict:
+    """A frame with only the selected cars, each with only the selected fields."""
+    fields, drivers = projection
+    cars: List[Dict] = payload.get("cars", [])
+    if drivers is not None:
+        wanted = set(drivers)
+        cars = [car for car in cars if car.get("driver_number") in wanted]
+    if fields is not None:
+        cars = [{key: car[key] for key in fields if key in car} for car in cars]
+    return {**payload, "cars": cars}
+
+
+class ProjectedView:
+    """
+    One projection of the live frames, encoded once per frame for every
+    subscriber that asked for it. Frame numbers follow the full stream, so
+    seq, heartbeats and resync work the same as for unfiltered clients.
+    """
+
+    def __init__(self, projection: Projection, seq: int = 0, payload: Optional[Dict] = None):
+        self.projection = projection
+        # Given the full stream's current frame, start on it (as the same seq)
+        self.delta = DeltaEncoder(seq=seq - 1 if payload is not None else seq)
+        self.latest_message: Optional[str] = None
+        self._delta_message: Optional[Tuple[int, str]] = None  # (seq, message)
+        if payload is not None:
+            self.push(payload)
+
+    def push(self, payload: Dict) -> None:
+        """Advance to the next full frame."""
+        self.delta.push(project(payload, self.projection))
+        self.latest_message = encode_snapshot(self.delta.seq, self.delta.payload)
+
+    def encode(self, mode: str) -> List[str]:
+        """The current frame for a json or delta subscriber."""
+        if mode != "delta":
+            return [self.latest_message]
+        if self._delta_message is None or self._delta_message[0] != self.delta.seq:
+            self._delta_message = (self.delta.seq, self.delta.encode())
+        return [self._delta_message[1]]
+
+    def initial_messages(self, mode: str) -> List[str]:
+        """What a subscriber switching to this view is sent first."""
+        if self.delta.payload is None:
+            return []
+        return [self.delta.keyframe()] if mode == "delta" else [self.latest_message]
@@ -0,0 +1,38 @@
+"""
+SilverWall WebSocket - Server-Sent Events Clients
+Lets an HTTP event stream subscribe to a live hub like a WebSocket does
+"""
+
+import asyncio
+from typing import Optional
+
+
+class EventStreamClient:
+    """
+    Stands in for a WebSocket in LiveTelemetryHub. The hub's writer task hands
+    it events the hub already encoded for every SSE subscriber, and the
+    response body yields them. Holding just one event means a client that
+    stops reading backs up in the hub's queue, where slow clients are handled.
+    """
+
+    def __init__(self):
+        self.events: asyncio.Queue = asyncio.Queue(maxsize=1)
+        self.closed = False
+
+    async def send_text(self, message: str) -> None:
+        await self.events.put(message)
+
+    async def close(self, code: int = 1000) -> None:
+        """End the stream (the hub closes clients that fall too far behind)."""
+        self.closed = True
+        try:
+            self.events.put_nowait(None)
+        except asyncio.QueueFull:
+            self.events.get_nowait()
+            self.events.put_nowait(None)
+
+    async def next_event(self) -> Optional[str]:
+        """The next event to write, or None once the stream is closed."""
+        if self.closed and self.events.empty():
+            return None
+        return await self.events.get()
@@ -5,6 +5,7 @@ Streams telemetry frames to React client
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from pipeline.fake_monza_timeline import TIMELINE
+from websocket.codec import ReplayBinaryEncoder, binary_subprotocol
 import asyncio
 import json
 
@@ -12,11 +13,19 @@ router = APIRouter()
 
 @router.websocket("/ws/monza")
 async def ws_monza(websocket: WebSocket):
-    await websocket.accept()
+    subprotocol = binary_subprotocol(websocket)
+    await websocket.accept(subprotocol=subprotocol)
     print(f"✓ WebSocket client connected. Timeline size: {len(TIMELINE)}")
     
     if not TIMELINE:
         print("⚠ ERROR: Timeline is empty!")
+
+    # Binary clients get a driver dictionary once, then struct-packed frames
+    encoder = None
+    if subprotocol or websocket.query_params.get("mode") == "binary":
+        encoder = ReplayBinaryEncoder()
+        if TIMELINE:
+            await websocket.send_bytes(encoder.dictionary(TIMELINE[0].dict()))
     
     # Playback state
     current_frame_idx = 0
@@ -52,7 +61,10 @@ async def ws_monza(websocket: WebSocket):
             if is_playing:
                 if current_frame_idx < len(TIMELINE):
                     frame = TIMELINE[current_frame_idx]
-                    await websocket.send_json(frame.dict())
+                    if encoder is not None:
+                        await websocket.send_bytes(encoder.encode_frame(current_frame_idx, frame.dict()))
+                    else:
+                        await websocket.send_json(frame.dict())
                     current_frame_idx += 1
                     await asyncio.sleep(0.1 / playback_speed)
                 else: